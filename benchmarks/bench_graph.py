@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+
+"""Benchmark for navigation of family relationships.
+
+Script finds relatives of every person in a GEDCOM file the same way as
+writers do (parents, spouse and children in each family, ancestors for
+ancestor tree) using either pointer dereferencing of ``ged4py`` records or
+:py:class:`ged2doc.graph.FamilyGraph` index. Name and sex of each relative
+are needed for references, with ``index`` method they are taken from the
+records of relatives, with ``refs`` method from the index and
+:py:class:`ged2doc.name.NameCache` filled when INDI records are scanned,
+like writers do. It reports time, the number of record lookups (each
+pointer dereference is a lookup in record cache) and the number of records
+parsed from file. With ``--cache-size`` (e.g. 0, like
+in streaming mode) every lookup which misses the record cache reads the
+file again, with ``--preload`` all records are parsed before measurement
+and only navigation is measured.
+
+Usage::
+
+    python benchmarks/bench_graph.py [-n REPEAT] [--cache-size N | --preload] \
+        FILE.ged
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import gc
+import io
+import time
+
+from ged2doc.graph import FamilyGraph
+from ged2doc.name import NameCache
+from ged2doc.reader import CachingReader
+
+# number of generations in ancestor tree
+_TREE_GEN = 4
+
+
+def _pointers(reader):
+    """Navigation with pointer dereferencing, returns number of links."""
+    links = 0
+    names = NameCache()
+
+    def ancestors(person, gen):
+        if person is None or gen == 0:
+            return 0
+        names.get(person)
+        person.sex
+        return 1 + ancestors(person.mother, gen - 1) + \
+            ancestors(person.father, gen - 1)
+
+    for indi in reader.records0("INDI"):
+        links += ancestors(indi, _TREE_GEN) - 1
+        for fam in indi.sub_tags("FAMS"):
+            spouses = [rec for rec in fam.sub_tags("HUSB", "WIFE",
+                                                   follow=False)
+                       if rec.value != indi.xref_id]
+            if spouses and spouses[0].ref is not None:
+                names.get(spouses[0].ref)
+                spouses[0].ref.sex
+                links += 1
+            children = fam.sub_tags("CHIL")
+            for child in children:
+                names.get(child)
+                child.sex
+            links += len(children)
+    return links
+
+
+def _walk(reader, graph, relative):
+    """Navigation with relationship index, ``relative`` returns object with
+    ``sex`` attribute and name for reference ID; returns number of links.
+    """
+    links = 0
+
+    def ancestors(xref_id, gen):
+        if xref_id is None or gen == 0:
+            return 0
+        relative(xref_id)
+        return 1 + ancestors(graph.mother(xref_id), gen - 1) + \
+            ancestors(graph.father(xref_id), gen - 1)
+
+    for offset, tag in reader.index0:
+        if tag != "INDI":
+            continue
+        xref_id = reader.read_record(offset).xref_id
+        links += ancestors(xref_id, _TREE_GEN) - 1
+        for _, spouse, children in graph.families(xref_id):
+            if spouse is not None:
+                relative(spouse)
+                links += 1
+            for child in children:
+                relative(child)
+            links += len(children)
+    return links
+
+
+def _index(reader):
+    """Navigation with relationship index, records of relatives are read
+    to get their names and sex, returns number of links."""
+    graph = FamilyGraph(reader)
+    graph.build()
+    names = NameCache()
+
+    def relative(xref_id):
+        person = reader.record(xref_id)
+        if person is not None:
+            names.get(person)
+            return person.sex
+        return None
+
+    return _walk(reader, graph, relative)
+
+
+def _refs(reader):
+    """Navigation with relationship index, names and sex of relatives are
+    taken from index like writers do, returns number of links."""
+    graph = FamilyGraph(reader)
+    names = NameCache()
+    # writers add INDI records and their names to index when they scan
+    # records for ordering
+    for offset, tag in reader.index0:
+        if tag == "INDI":
+            indi = reader.read_record(offset)
+            graph.add_record(indi)
+            names.get(indi)
+
+    def relative(xref_id):
+        return graph.sex(xref_id)
+
+    return _walk(reader, graph, relative)
+
+
+def _run(path, method, cache_size, preload):
+    """Returns time in seconds, numbers of lookups and parsed records, and
+    number of links."""
+    with io.open(path, "rb") as gfile:
+        reader = CachingReader(gfile, cache_size=cache_size)
+        # index is built by reader in both cases, do not count it
+        reader.index0
+        if preload:
+            reader.preload()
+            # first full collection after parsing is expensive
+            gc.collect()
+        cache = reader.cache
+        hits, misses = cache.hits, cache.misses
+        t0 = time.time()
+        links = method(reader)
+        seconds = time.time() - t0
+        return (seconds, cache.hits - hits + cache.misses - misses,
+                cache.misses - misses, links)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", "--repeat", default=3, type=int,
+                        help="Number of repetitions, default: %(default)s")
+    parser.add_argument("--cache-size", default=None, type=int,
+                        help="Size of record cache, default is no limit")
+    parser.add_argument("--preload", default=False, action="store_true",
+                        help="Parse all records before measurement")
+    parser.add_argument("input", help="GEDCOM file name")
+    args = parser.parse_args()
+
+    print("{:10s} {:>10s} {:>10s} {:>10s} {:>10s}".format(
+        "method", "time, s", "lookups", "parsed", "links"))
+    for name, method in (("pointers", _pointers), ("index", _index),
+                         ("refs", _refs)):
+        results = [_run(args.input, method, args.cache_size, args.preload)
+                   for _ in range(args.repeat)]
+        seconds = min(result[0] for result in results)
+        _, lookups, parsed, links = results[0]
+        print("{:10s} {:10.3f} {:10d} {:10d} {:10d}".format(
+            name, seconds, lookups, parsed, links))
+
+
+if __name__ == "__main__":
+    main()
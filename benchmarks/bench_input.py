@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+"""Benchmark for reading GEDCOM file via buffered or memory-mapped file.
+
+Script reads all INDI records from a GEDCOM file and follows their parent
+pointers, record cache is disabled so every pointer dereference reads the
+file again. Each input method is measured with cold page cache (file pages
+are evicted using ``posix_fadvise`` before each run, this is only a hint
+and may not work on all file systems) and warm page cache.
+
+Usage::
+
+    python benchmarks/bench_input.py [-n REPEAT] FILE.ged
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import io
+import os
+import time
+
+from ged2doc.mmapfile import MappedFile
+from ged2doc.reader import CachingReader
+
+
+def _drop_cache(path):
+    """Ask OS to evict file pages from page cache."""
+    with io.open(path, "rb") as fobj:
+        os.fsync(fobj.fileno())
+        os.posix_fadvise(fobj.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def _run(path, mapped):
+    """Read all persons and their parents, return time in seconds."""
+    t0 = time.time()
+    gfile = MappedFile(path) if mapped else io.open(path, "rb")
+    reader = CachingReader(gfile, cache_size=0)
+    count = 0
+    for indi in reader.records0("INDI"):
+        for parent in (indi.mother, indi.father):
+            if parent is not None:
+                count += 1
+    gfile.close()
+    return time.time() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", "--repeat", default=3, type=int,
+                        help="Number of repetitions, default: %(default)s")
+    parser.add_argument("input", help="GEDCOM file name")
+    args = parser.parse_args()
+
+    print("{:10s} {:>10s} {:>10s}".format("method", "cold, s", "warm, s"))
+    for mapped in (False, True):
+        cold = []
+        warm = []
+        for _ in range(args.repeat):
+            _drop_cache(args.input)
+            cold.append(_run(args.input, mapped))
+            warm.append(_run(args.input, mapped))
+        print("{:10s} {:10.3f} {:10.3f}".format(
+            "mmap" if mapped else "buffered", min(cold), min(warm)))
+
+
+if __name__ == "__main__":
+    main()
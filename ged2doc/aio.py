@@ -0,0 +1,175 @@
+"""Module with asyncio API for conversions.
+
+Conversion is CPU-bound and takes long time for large files, calling
+:py:func:`ged2doc.api.convert` from a coroutine blocks event loop.
+:py:class:`Converter` runs conversions (parsing, plotting, image resizing)
+in an executor, limits the number of concurrent conversions and image
+decodes, and lets other threads run between batches of persons. This
+module requires Python 3.5 or later.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__all__ = ["Converter", "ConversionCancelled", "convert_async"]
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+import weakref
+
+from . import api
+
+
+_log = logging.getLogger(__name__)
+
+
+class ConversionCancelled(Exception):
+    """Exception which stops conversion in executor when coroutine which
+    waits for it is cancelled.
+    """
+
+
+class Converter(object):
+    """Runs conversions for asyncio applications.
+
+    Conversions wait until the number of running conversions is below the
+    limit, so one large file delays at most one of the conversion slots.
+    Instance can be used from several event loops (e.g. consecutive
+    ``asyncio.run()`` calls), each loop has its own conversion slots, while
+    executor and image decode limit are shared by all loops.
+
+    :param int max_conversions: Maximum number of conversions running at
+        the same time.
+    :param int max_image_decodes: Maximum number of images decoded at the
+        same time by all conversions, ``None`` (default) means no limit.
+    :param executor: ``concurrent.futures.Executor`` instance which runs
+        conversions, it has to run them in threads of this process. If
+        ``None`` (default) then thread pool with ``max_conversions``
+        threads is made, and it is shut down by :py:meth:`shutdown`.
+    :param int batch_size: Number of persons rendered between switches to
+        other threads (e.g. thread which runs event loop).
+    :raises ValueError: If ``max_conversions`` is less than 1.
+    """
+
+    def __init__(self, max_conversions=2, max_image_decodes=None,
+                 executor=None, batch_size=20):
+        if max_conversions < 1:
+            raise ValueError("max_conversions must be positive: {0}".format(
+                max_conversions))
+        self._max_conversions = max_conversions
+        # maps event loop to its semaphore, semaphore is made when first
+        # used so that it belongs to running loop
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._images = None
+        if max_image_decodes is not None:
+            self._images = threading.BoundedSemaphore(max_image_decodes)
+        self._own_executor = executor is None
+        if executor is None:
+            executor = concurrent.futures.ThreadPoolExecutor(max_conversions)
+        self._executor = executor
+        self._batch_size = batch_size
+
+    async def convert(self, input, output, options=None):
+        """Convert GEDCOM file into a document.
+
+        Parameters and return value are the same as for
+        :py:func:`ged2doc.api.convert`, ``progress`` callback in options is
+        called in executor thread. If this coroutine is cancelled then
+        conversion stops after current person, and conversion slot is kept
+        until it stops.
+
+        :raises ValueError: If document type is not known or cannot be
+            determined.
+        :raises OSError: If input file cannot be located.
+        """
+        async with self._semaphore():
+            cancelled = threading.Event()
+            options = dict(options or {})
+            options["progress"] = self._make_progress(
+                cancelled, options.get("progress"))
+            if self._images is not None:
+                options.setdefault("image_limiter", self._images)
+            future = asyncio.wrap_future(self._executor.submit(
+                _convert, cancelled, input, output, options))
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                cancelled.set()
+                _log.debug("convert: cancelled, waiting for executor")
+                try:
+                    await future
+                except Exception:
+                    pass
+                raise
+
+    def _semaphore(self):
+        """Returns semaphore with conversion slots of running event loop.
+        """
+        loop = asyncio.get_event_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self._max_conversions)
+                self._semaphores[loop] = semaphore
+        return semaphore
+
+    def _make_progress(self, cancelled, callback):
+        """Returns progress callback for a conversion.
+
+        :param cancelled: ``threading.Event`` which is set when conversion
+            is cancelled.
+        :param callback: Progress callback from options or ``None``.
+        """
+        batch_size = self._batch_size
+
+        def progress(count, total):
+            if cancelled.is_set():
+                raise ConversionCancelled()
+            if callback is not None:
+                callback(count, total)
+            if count % batch_size == 0:
+                # release interpreter lock so that event loop can run
+                time.sleep(0)
+
+        return progress
+
+    def shutdown(self, wait=True):
+        """Shut down executor if it was made by this instance.
+
+        :param bool wait: If ``True`` then wait until running conversions
+            finish.
+        """
+        if self._own_executor:
+            self._executor.shutdown(wait)
+
+
+def _convert(cancelled, input, output, options):
+    """Run conversion in executor unless it is already cancelled.
+    """
+    if cancelled.is_set():
+        raise ConversionCancelled()
+    return api.convert(input, output, options)
+
+
+# converter used by convert_async(), made when first used
+_converter = None
+
+
+async def convert_async(input, output, options=None, converter=None):
+    """Convert GEDCOM file into a document without blocking event loop.
+
+    Parameters and return value are the same as for
+    :py:func:`ged2doc.api.convert`.
+
+    :param converter: :py:class:`Converter` instance, by default shared
+        instance with default limits is used.
+    """
+    global _converter
+    if converter is None:
+        if _converter is None:
+            _converter = Converter()
+        converter = _converter
+    return await converter.convert(input, output, options)
@@ -0,0 +1,95 @@
+"""Module with conversion API for applications which embed ged2doc.
+
+:py:func:`convert` makes one document from one GEDCOM file. Everything that
+depends on input data (file locator, parsed records, writer and its
+caches) is made for each call, resources which do not depend on input
+(translations catalogs, HTML style sheet template, namespaces of ODT
+elements) are loaded once per process and are not modified after that.
+Conversions can run concurrently in several threads of the same process,
+each thread needs its own input and output file objects. Garbage collector
+stays enabled during conversions unless the application allows pausing it
+with :py:func:`ged2doc.reader.allow_gc_pause`.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__all__ = ["convert", "DOC_TYPES"]
+
+import logging
+import os
+
+from .html_writer import HtmlWriter
+from .i18n import I18N
+from .input import make_file_locator
+from .odt_writer import OdtWriter
+
+
+_log = logging.getLogger(__name__)
+
+DOC_TYPES = {"html": HtmlWriter, "odt": OdtWriter}
+"""Maps document type to writer class."""
+
+_EXTENSIONS = {".htm": "html", ".html": "html", ".odt": "odt"}
+
+
+def convert(input, output, options=None):
+    """Convert GEDCOM file into a document.
+
+    Options are given as a dictionary, these keys are used by this method
+    (all are optional):
+
+    - ``type`` -- document type, one of the keys of :py:data:`DOC_TYPES`,
+      by default it is determined from extension of output file name, and
+      it is required if ``output`` is a file object;
+    - ``lang`` -- output language, default is "en";
+    - ``date_format`` -- date format, default depends on language;
+    - ``file_name_pattern`` -- pattern for GEDCOM file name in ZIP archive,
+      default is "\\*.ged\\*";
+    - ``image_path`` -- directory with image files, default is ``None``.
+
+    All other options are passed as keyword arguments to the writer class
+    (e.g. ``name_fmt``, ``tree_width``, ``progress``, or ``image_limiter``,
+    see :py:class:`ged2doc.writer.Writer`,
+    :py:class:`ged2doc.html_writer.HtmlWriter` and
+    :py:class:`ged2doc.odt_writer.OdtWriter`). Options ``parse_jobs`` and
+    ``render_jobs`` start worker processes, which should be avoided in
+    multi-threaded applications.
+
+    :param input: Path of the input file or file object open in binary
+        mode, can be a GEDCOM file or a ZIP archive.
+    :param output: Path of the output file or file object open in binary
+        mode.
+    :param dict options: Conversion options, dictionary is not modified.
+    :return: :py:class:`ged2doc.stats.Statistics` instance with statistics
+        of persons in the document, ``None`` if ``make_stat`` option is
+        ``False``.
+    :raises ValueError: If document type is not known or cannot be
+        determined.
+    :raises OSError: If input file cannot be located.
+    """
+    kwargs = dict(options or {})
+    doc_type = kwargs.pop("type", None)
+    lang = kwargs.pop("lang", "en")
+    date_format = kwargs.pop("date_format", None)
+    file_name_pattern = kwargs.pop("file_name_pattern", "*.ged*")
+    image_path = kwargs.pop("image_path", None)
+
+    if doc_type is None:
+        if hasattr(output, "write"):
+            raise ValueError("Document type is required for file object")
+        ext = os.path.splitext(output)[1].lower()
+        doc_type = _EXTENSIONS.get(ext)
+        if doc_type is None:
+            raise ValueError("Cannot determine document type from file "
+                             "extension: {0!r}".format(output))
+    try:
+        writer_class = DOC_TYPES[doc_type]
+    except KeyError:
+        raise ValueError("Unknown document type: {0!r}".format(doc_type))
+
+    flocator = make_file_locator(input, file_name_pattern, image_path)
+    tr = I18N(lang, date_format)
+    writer = writer_class(flocator, output, tr, **kwargs)
+    _log.debug("convert: %s document, language %s", doc_type, lang)
+    writer.save()
+    return writer.statistics
@@ -0,0 +1,340 @@
+"""Module for converting many GEDCOM files in one process.
+
+``ged2doc-batch`` command reads a manifest with pairs of input and output
+files and converts them with :py:func:`ged2doc.api.convert` in a pool of
+worker processes. Python startup, imports, translations and other shared
+resources are loaded once per worker and re-used for all files that the
+worker converts. Failure of one conversion does not stop other
+conversions, status and time of each conversion are written to a summary.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__all__ = ["BatchResult", "read_manifest", "run_batch"]
+
+import collections
+import io
+import logging
+import multiprocessing
+import shlex
+import sys
+import time
+from argparse import ArgumentParser
+
+from . import api
+from . import html_writer
+from .cli import add_input_arguments, add_output_arguments
+from .i18n import I18N
+from .reader import allow_gc_pause
+from .writer import _fork_context
+
+
+_log = logging.getLogger(__name__)
+
+
+BatchResult = collections.namedtuple("BatchResult",
+                                     "input output status seconds error")
+"""Result of one conversion, status is "ok" or "error", error is an error
+message or ``None``.
+"""
+
+
+def read_manifest(manifest):
+    """Read list of conversions from manifest file.
+
+    Each non-empty line of a manifest contains input and output file names
+    separated by spaces, names with spaces can be quoted like in shell.
+    Lines starting with ``#`` are comments.
+
+    :param manifest: File object open in text mode.
+    :return: List of (input, output) tuples.
+    :raises ValueError: If line does not have exactly two file names.
+    """
+    tasks = []
+    for lineno, line in enumerate(manifest, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        names = shlex.split(line)
+        if len(names) != 2:
+            raise ValueError("Line {0}: expected input and output file "
+                             "names: {1!r}".format(lineno, line))
+        tasks.append(tuple(names))
+    return tasks
+
+
+def _init_worker(lang, date_format):
+    """Load shared resources in a worker process.
+
+    With fork start method resources loaded by parent process are already
+    there and this is cheap.
+    """
+    I18N(lang, date_format)
+    html_writer._style_template()
+
+
+def _run_task(task):
+    """Run one conversion.
+
+    :param tuple task: Tuple (input, output, options).
+    :return: :py:class:`BatchResult` instance.
+    """
+    input, output, options = task
+    start = time.time()
+    try:
+        api.convert(input, output, options)
+    except Exception as exc:
+        _log.debug("Conversion of %s failed", input, exc_info=True)
+        return BatchResult(input, output, "error", time.time() - start,
+                           "{0}: {1}".format(type(exc).__name__, exc))
+    return BatchResult(input, output, "ok", time.time() - start, None)
+
+
+def _worker_main(conn, lang, date_format):
+    """Main function of a worker process.
+
+    Receives tasks from connection one at a time and sends back results,
+    stops when it receives ``None`` or connection is closed. Worker runs
+    one conversion at a time so it can disable garbage collector while
+    records are parsed.
+    """
+    allow_gc_pause()
+    _init_worker(lang, date_format)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        conn.send(_run_task(task))
+
+
+class _Worker(object):
+    """Worker process with at most one conversion in progress.
+
+    Parent process knows which file each worker converts, so that file can
+    be reported when worker dies (e.g. crash in image library or killed
+    when out of memory) or runs for too long.
+    """
+
+    def __init__(self, context, lang, date_format):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main,
+                                       args=(child_conn, lang, date_format))
+        self.process.daemon = True
+        self.process.start()
+        child_conn.close()
+        # tuple (index, task) of current conversion or None
+        self.current = None
+        self.start = None
+
+    def submit(self, index, task):
+        """Send task to worker process."""
+        self.conn.send(task)
+        self.current = (index, task)
+        self.start = time.time()
+
+    def result(self, timeout):
+        """Check status of current conversion.
+
+        :param float timeout: Maximum conversion time in seconds or
+            ``None``.
+        :return: :py:class:`BatchResult` if conversion finished or failed,
+            ``None`` if it is still running.
+        """
+        input, output, _ = self.current[1]
+        seconds = time.time() - self.start
+        try:
+            if self.conn.poll():
+                return self.conn.recv()
+        except (EOFError, IOError):
+            pass
+        else:
+            if self.process.is_alive():
+                if timeout is None or seconds < timeout:
+                    return None
+                self.process.terminate()
+                self.process.join()
+                return BatchResult(input, output, "error", seconds,
+                                   "Timed out after {0:g} seconds".format(
+                                       timeout))
+        self.process.join()
+        return BatchResult(input, output, "error", seconds,
+                           "Worker process died with exit code {0}".format(
+                               self.process.exitcode))
+
+    def stop(self):
+        """Stop worker process."""
+        if self.process.is_alive():
+            if self.current is None:
+                try:
+                    self.conn.send(None)
+                except (EOFError, IOError):
+                    self.process.terminate()
+            else:
+                self.process.terminate()
+        self.process.join()
+        self.conn.close()
+
+
+# Interval between checks of running conversions in seconds
+_POLL_INTERVAL = 0.05
+
+
+def run_batch(tasks, options=None, jobs=None, timeout=None):
+    """Convert many files.
+
+    Files are converted by worker processes, each worker converts one file
+    at a time. If worker process dies or conversion runs longer than
+    ``timeout`` then that file is reported as failed and new worker
+    replaces the old one.
+
+    :param list tasks: List of (input, output) tuples.
+    :param dict options: Conversion options used for all files, see
+        :py:func:`ged2doc.api.convert`, options are sent to worker
+        processes so they have to be picklable.
+    :param int jobs: Number of worker processes, ``None`` (default) means
+        the number of CPUs.
+    :param float timeout: Maximum time in seconds for conversion of one
+        file, ``None`` (default) means no limit.
+    :return: List of :py:class:`BatchResult` in the order of tasks.
+    """
+    options = options or {}
+    lang = options.get("lang", "en")
+    date_format = options.get("date_format")
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    jobs = max(1, min(jobs, len(tasks)))
+    pending = collections.deque(
+        (index, (input, output, options))
+        for index, (input, output) in enumerate(tasks))
+    results = [None] * len(tasks)
+    if not pending:
+        return results
+
+    # load shared resources before workers are forked
+    _init_worker(lang, date_format)
+    context = _fork_context() or multiprocessing
+
+    _log.debug("Converting %d files with %d processes", len(tasks), jobs)
+    workers = []
+    try:
+        workers = [_Worker(context, lang, date_format)
+                   for _ in range(jobs)]
+        while True:
+            for worker in workers:
+                if worker.current is None and pending:
+                    worker.submit(*pending.popleft())
+            busy = [worker for worker in workers if worker.current]
+            if not busy:
+                break
+            finished = False
+            for worker in busy:
+                result = worker.result(timeout)
+                if result is None:
+                    continue
+                finished = True
+                index = worker.current[0]
+                results[index] = result
+                worker.current = None
+                if not worker.process.is_alive():
+                    workers[workers.index(worker)] = _Worker(
+                        context, lang, date_format)
+            if not finished:
+                time.sleep(_POLL_INTERVAL)
+    finally:
+        for worker in workers:
+            worker.stop()
+    return results
+
+
+def main(argv=None):
+    """Console script for ``ged2doc-batch`` command.
+
+    Returns 0 if all files were converted, 1 otherwise.
+
+    :param list argv: Command line arguments, default is ``sys.argv[1:]``.
+    """
+    parser = ArgumentParser(prog="ged2doc-batch",
+                            description="Convert many GEDCOM files listed "
+                            "in a manifest file.")
+    parser.add_argument('-v', "--verbose", action="count", default=0,
+                        help="Print some info to standard output, "
+                        "-vv prints debug info.")
+    parser.add_argument('-j', "--jobs", default=None, type=int,
+                        metavar="NUMBER",
+                        help="Number of worker processes, default is the "
+                        "number of CPUs.")
+    parser.add_argument("--timeout", default=None, type=float,
+                        metavar="SECONDS",
+                        help="Maximum time for conversion of one file, "
+                        "default is no limit.")
+    parser.add_argument("--summary", default=None, metavar="PATH",
+                        help="File for summary of conversions, default is "
+                        "standard output.")
+    group = parser.add_argument_group("Input Options")
+    add_input_arguments(group)
+    group = parser.add_argument_group("Output Options")
+    add_output_arguments(group)
+    parser.add_argument("manifest",
+                        help="File with input and output file names, one "
+                        "pair per line, use '-' for standard input.")
+    args = parser.parse_args(argv)
+
+    if args.verbose == 0:
+        log_level = logging.WARN
+    elif args.verbose == 1:
+        log_level = logging.INFO
+    else:
+        log_level = logging.DEBUG
+    logging.basicConfig(level=log_level)
+
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs option must be positive")
+    if args.timeout is not None and args.timeout <= 0:
+        parser.error("--timeout option must be positive")
+    if len(args.language) > 1:
+        parser.error("--language option accepts one language")
+    try:
+        if args.manifest == "-":
+            tasks = read_manifest(sys.stdin)
+        else:
+            with io.open(args.manifest, encoding="utf-8") as manifest:
+                tasks = read_manifest(manifest)
+    except (IOError, ValueError) as exc:
+        parser.error("Error reading manifest: {0}".format(exc))
+
+    options = dict(lang=args.language[0], date_format=args.date_format,
+                   image_path=args.image_path,
+                   file_name_pattern=args.file_name_pattern,
+                   sort_order=args.sort_order,
+                   events_without_dates=not args.no_missing_date,
+                   make_images=not args.no_image,
+                   make_toc=not args.no_toc,
+                   make_stat=not args.no_stat,
+                   tree_width=args.tree_width,
+                   projection=args.projection)
+    if args.type is not None:
+        options["type"] = args.type
+
+    start = time.time()
+    results = run_batch(tasks, options, args.jobs, args.timeout)
+    failed = len([result for result in results if result.status != "ok"])
+    _log.info("%d files converted, %d failed in %.2f seconds",
+              len(results) - failed, failed, time.time() - start)
+
+    lines = [u"status\tseconds\tinput\toutput\terror"]
+    for result in results:
+        lines.append(u"{0}\t{1:.3f}\t{2}\t{3}\t{4}".format(
+            result.status, result.seconds, result.input, result.output,
+            result.error or ""))
+    if args.summary is None:
+        for line in lines:
+            print(line)
+    else:
+        with io.open(args.summary, "w", encoding="utf-8") as summary:
+            for line in lines:
+                summary.write(line + u"\n")
+
+    return 1 if failed else 0
@@ -4,18 +4,24 @@
 
 from __future__ import absolute_import, division, print_function
 
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
 import logging
 import os
+import sys
 
 from .size import String2Size
 from .i18n import I18N, DATE_FORMATS
+from .graph import RELATION_ALL, RELATIONS
 from .input import make_file_locator
 from .html_writer import HtmlWriter
+from .ir import IRReader, IRWriter
+from .multi_writer import MultiWriter
 from .name import (FMT_SURNAME_FIRST, FMT_COMMA, FMT_MAIDEN,
                    FMT_MAIDEN_ONLY, FMT_CAPITAL)
 from .odt_writer import OdtWriter
+from .reader import allow_gc_pause
 from .utils import languages, system_lang
+from .watch import Watcher
 import ged2doc
 import ged4py
 from ged4py.model import (ORDER_LIST, ORDER_SURNAME_GIVEN)
@@ -29,7 +35,10 @@ def main():
     version = "ged2doc {0} (ged4py {1})".format(ged2doc.__version__,
                                                 ged4py.__version__)
 
-    parser = ArgumentParser(description='Convert GEDCOM file into document.')
+    parser = ArgumentParser(description='Convert GEDCOM file into document.',
+                            epilog="Use ged2doc-diff command to compare "
+                            "two GEDCOM files and ged2doc-batch command to "
+                            "convert many files.")
     parser.add_argument('-v', "--verbose", action="count", default=0,
                         help="Print some info to standard output, "
                         "-vv prints debug info.")
@@ -38,55 +47,86 @@ def main():
     parser.add_argument("input",
                         help="Location of input file, input file can be "
                         "either GEDCOM file or ZIP archive which can also "
-                        "include images.")
-    parser.add_argument("output", help="Location of output file.")
+                        "include images, use '-' for standard input. Files "
+                        "compressed with gzip, bzip2 or xz are accepted too.")
+    parser.add_argument("output", nargs="?",
+                        help="Location of output file.")
 
     group = parser.add_argument_group("Input Options")
-    group.add_argument('-i', "--image-path", metavar="PATH",
-                       help="Directory containing files with images")
-    group.add_argument('-p', "--file-name-pattern", metavar="PATTERN",
-                       default="*.ged*",
-                       help="Pattern to search for GEDCOM file inside ZIP "
-                       "archive, default: %(default)s")
+    add_input_arguments(group)
     group.add_argument("--encoding",
                        help="Input file encoding, default is to guess "
                        "from file contents")
     group.add_argument("--encoding-errors", default="strict", metavar="MODE",
                        help="Mode for handling decoding errors, one of strict,"
                        " ignore, or replace; default: %(default)s")
+    group.add_argument("--record-cache-size", default=None, type=int,
+                       metavar="NUMBER",
+                       help="Maximum number of parsed GEDCOM records to keep "
+                       "in memory, default is no limit.")
+    group.add_argument("--cache-dir", default=None, metavar="PATH",
+                       help="Directory for storing snapshots of parsed "
+                       "GEDCOM files, repeated conversions of the same file "
+                       "load snapshot instead of parsing.")
+    group.add_argument("--zip-memory-limit", default=64, type=int,
+                       metavar="MB",
+                       help="Maximum size of compressed GEDCOM file in ZIP "
+                       "archive which is decompressed into memory, larger "
+                       "files use temporary file; default: %(default)s")
+    group.add_argument("--spool-memory-limit", default=64, type=int,
+                       metavar="MB",
+                       help="Maximum size of input data from standard input "
+                       "or compressed file which is kept in memory, larger "
+                       "data use temporary file; default: %(default)s")
+    group.add_argument("--streaming", default=False, action="store_true",
+                       help="Do not keep all parsed GEDCOM records in memory,"
+                       " use for very large files.")
+    group.add_argument("--parse-jobs", default=1, type=int, metavar="NUMBER",
+                       help="Number of processes used for parsing GEDCOM "
+                       "file, default: %(default)s")
+    group.add_argument('-j', "--jobs", default=1, type=int, metavar="NUMBER",
+                       help="Number of processes used for rendering person "
+                       "sections, ignored with --streaming or "
+                       "--record-cache-size; default: %(default)s")
+    group.add_argument("--incremental", default=False, action="store_true",
+                       help="Re-use person sections rendered by previous "
+                       "conversion if records that they depend on did not "
+                       "change, requires --cache-dir.")
+    group.add_argument("--from-ir", default=False, action="store_true",
+                       help="Input file contains intermediate representation "
+                       "of a document produced with --dump-ir option.")
 
     group = parser.add_argument_group("Output Options")
-    group.add_argument('-t', "--type", default=None, choices=['html', 'odt'],
-                       help=("Type of the output document, possible values:"
-                             " %(choices)s; by default type is determined by"
-                             " output file extension (*.odt, *.html, or *.htm"
-                             " are recognized)"))
-    group.add_argument('-l', "--language", default=system_lang(),
-                       metavar="LANG_CODE", choices=languages(),
-                       help="Language for output document, supported "
-                       "languages are: %(choices)s. Default is to use "
-                       "system  language (=%(default)s).")
-    group.add_argument('-d', "--date-format", default=None, metavar="FMT",
-                       choices=DATE_FORMATS,
-                       help="Date format in output document, one of "
-                       "%(choices)s; if missing then language-specific "
-                       "format is used.")
-    group.add_argument('-s', "--sort-order", default=ORDER_SURNAME_GIVEN,
-                       metavar="ORDER", choices=ORDER_LIST,
-                       help="Ordering of the individuals, one of "
+    group.add_argument('-o', "--output", dest="outputs", action="append",
+                       default=[], metavar="PATH",
+                       help="Location of output file, can be repeated to "
+                       "produce several documents (e.g. HTML and ODT) from "
+                       "one conversion; type of each document is determined "
+                       "by file extension.")
+    add_output_arguments(group)
+    group.add_argument("--root", default=None, metavar="XREF",
+                       help="Reference ID of a person (e.g. @I123@), only "
+                       "persons related to this person are included in "
+                       "output document.")
+    group.add_argument("--radius", default=None, type=int, metavar="NUMBER",
+                       help="Maximum number of relationship steps (parent, "
+                       "child, or spouse) from --root person, default is no "
+                       "limit.")
+    group.add_argument("--relation", default=RELATION_ALL, choices=RELATIONS,
+                       help="Relations followed from --root person, one of "
                        "%(choices)s; default: %(default)s.")
-    group.add_argument("--no-missing-date", default=False, action="store_true",
-                       help="Do not output events if they have no dates.")
-    group.add_argument("--no-image", default=False, action="store_true",
-                       help="Disable images in output document.")
-    group.add_argument("--no-toc", default=False, action="store_true",
-                       help="Disable Table of Contents in output document.")
-    group.add_argument("--no-stat", default=False, action="store_true",
-                       help="Disable Name Statistics in output document.")
-    group.add_argument('-w', "--tree-width", default=4, type=int,
-                       metavar="NUMBER",
-                       help="Number of generations in ancestors tree, "
-                       "default: %(default)s")
+    group.add_argument("--watch", default=False, action="store_true",
+                       help="Keep running and update output document every "
+                       "time input file changes, only persons affected by "
+                       "the change are rendered again.")
+    group.add_argument("--watch-interval", default=1., type=float,
+                       metavar="SECONDS",
+                       help="Interval between checks of input file in watch "
+                       "mode; default: %(default)s")
+    group.add_argument("--dump-ir", default=False, action="store_true",
+                       help="Write intermediate representation of a "
+                       "document to output file instead of a document, it "
+                       "can be rendered later with --from-ir option.")
 
     group = parser.add_argument_group("Name Format Options")
     group.add_argument("--name-surname-first", dest='name_fmt',
@@ -164,34 +204,246 @@ def main():
              " -- %(message)s"
     logging.basicConfig(level=log_level, format=logfmt)
 
-    # instantiate file locator
+    # single conversion at a time, see allow_gc_pause() for tradeoff
+    allow_gc_pause()
+
+    if args.incremental and args.cache_dir is None:
+        parser.error("--incremental option requires --cache-dir")
+    if args.watch and args.input == "-":
+        parser.error("--watch option cannot be used with standard input")
+    if args.from_ir and (args.dump_ir or args.watch):
+        parser.error("--from-ir option cannot be used with --dump-ir or "
+                     "--watch")
+    if args.root is None:
+        if args.radius is not None or args.relation != RELATION_ALL:
+            parser.error("--radius and --relation options require --root")
+    elif args.radius is not None and args.radius < 0:
+        parser.error("--radius option cannot be negative")
+    elif args.from_ir or args.watch:
+        parser.error("--root option cannot be used with --from-ir or "
+                     "--watch")
+
+    outputs = args.outputs
+    if args.output is not None:
+        outputs.insert(0, args.output)
+    if not outputs:
+        parser.error("output file is required")
+    if len(outputs) > 1:
+        if args.type is not None:
+            parser.error("--type option cannot be used with several output "
+                         "files")
+        if args.dump_ir or args.watch:
+            parser.error("--dump-ir and --watch options cannot be used with "
+                         "several output files")
+    if len(args.language) > 1 and (args.from_ir or args.dump_ir or
+                                   args.watch):
+        parser.error("--from-ir, --dump-ir and --watch options cannot be "
+                     "used with several languages")
+
+    input_file = args.input
+    if input_file == "-":
+        # binary stream for standard input
+        input_file = getattr(sys.stdin, "buffer", sys.stdin)
+
+    def make_locator():
+        # watched file can be truncated by editor while it is read, which
+        # kills process reading it through memory map
+        return make_file_locator(input_file, args.file_name_pattern,
+                                 args.image_path,
+                                 args.zip_memory_limit * 1024 * 1024,
+                                 args.spool_memory_limit * 1024 * 1024,
+                                 use_mmap=not args.watch)
+
+    # instantiate file locator, IR has all data needed for rendering
+    # including translation options
+    flocator = ir_reader = None
     try:
-        flocator = make_file_locator(args.input, args.file_name_pattern,
-                                     args.image_path)
+        if args.from_ir:
+            ir_reader = IRReader(input_file)
+        else:
+            flocator = make_locator()
     except Exception as exc:
         parser.error("Error reading input file: {0}".format(exc))
 
-    tr = I18N(args.language, args.date_format)
+    if ir_reader is not None:
+        translations = [I18N(ir_reader.language, ir_reader.date_format)]
+    else:
+        translations = [I18N(lang, args.date_format)
+                        for lang in args.language]
 
     name_fmt = 0
     for option in args.name_fmt or []:
         name_fmt |= option
 
     # guess output type if not set
-    if args.type is None:
-        ext = os.path.splitext(args.output)[1]
-        if ext.lower() == ".odt":
-            args.type = "odt"
-        elif ext.lower() in (".htm", ".html"):
-            args.type = "html"
-        else:
-            parser.error("Cannot determine document type from file extension,"
-                         " use --type option to specify document type")
+    doc_types = []
+    for output in outputs:
+        doc_type = args.type
+        if doc_type is None and not args.dump_ir:
+            ext = os.path.splitext(output)[1]
+            if ext.lower() == ".odt":
+                doc_type = "odt"
+            elif ext.lower() in (".htm", ".html"):
+                doc_type = "html"
+            else:
+                parser.error("Cannot determine document type from file "
+                             "extension, use --type option to specify "
+                             "document type")
+        doc_types.append(doc_type)
+
+    # list of (output, doc_type, tr) for every document
+    documents = []
+    for tr in translations:
+        for output, doc_type in zip(outputs, doc_types):
+            if len(translations) > 1:
+                root, ext = os.path.splitext(output)
+                output = root + "." + tr.lang + ext
+            documents.append((output, doc_type, tr))
 
     _log.debug("args: %s", args)
 
-    if args.type == "html":
-        writer = HtmlWriter(flocator, args.output, tr,
+    if args.watch:
+        output, doc_type, tr = documents[0]
+        watcher = Watcher(args.input, make_locator,
+                          lambda flocator, output: _make_writer(
+                              args, flocator, output, doc_type, tr,
+                              name_fmt),
+                          output, args.watch_interval)
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if len(documents) == 1:
+        output, doc_type, tr = documents[0]
+        writer = _make_writer(args, flocator, output, doc_type, tr, name_fmt)
+    else:
+        # one extraction pass for all documents
+        writers = [_make_writer(args, flocator, output, doc_type, tr,
+                                name_fmt)
+                   for output, doc_type, tr in documents]
+        writer = MultiWriter(flocator, writers,
+                             encoding=args.encoding,
+                             encoding_errors=args.encoding_errors,
+                             sort_order=args.sort_order,
+                             name_fmt=name_fmt,
+                             events_without_dates=not args.no_missing_date,
+                             make_toc=not args.no_toc,
+                             make_stat=not args.no_stat,
+                             make_images=not args.no_image,
+                             record_cache_size=args.record_cache_size,
+                             cache_dir=args.cache_dir,
+                             streaming=args.streaming,
+                             parse_jobs=args.parse_jobs,
+                             projection=args.projection,
+                             incremental=args.incremental,
+                             render_jobs=args.jobs,
+                             root=args.root, radius=args.radius,
+                             relation=args.relation)
+    try:
+        if ir_reader is not None:
+            ir_reader.render(writer)
+        else:
+            writer.save()
+    except Exception as exc:
+        _log.error("caught exception: %s", exc, exc_info=True)
+        _log.error("Error while producing a document: {0}".format(exc))
+
+
+def add_input_arguments(group):
+    """Add input options which are shared by ged2doc and ged2doc-batch
+    commands.
+
+    :param group: Argument parser or argument group.
+    """
+    group.add_argument('-i', "--image-path", metavar="PATH",
+                       help="Directory containing files with images")
+    group.add_argument('-p', "--file-name-pattern", metavar="PATTERN",
+                       default="*.ged*",
+                       help="Pattern to search for GEDCOM file inside ZIP "
+                       "archive, default: %(default)s")
+    group.add_argument("--projection", default=False, action="store_true",
+                       help="Skip parsing of GEDCOM data which is not used "
+                       "in output (e.g. source citations).")
+
+
+def add_output_arguments(group):
+    """Add output options which are shared by ged2doc and ged2doc-batch
+    commands.
+
+    :param group: Argument parser or argument group.
+    """
+    group.add_argument('-t', "--type", default=None, choices=['html', 'odt'],
+                       help=("Type of the output document, possible values:"
+                             " %(choices)s; by default type is determined by"
+                             " output file extension (*.odt, *.html, or *.htm"
+                             " are recognized)"))
+    group.add_argument('-l', "--language", default=system_lang(),
+                       metavar="LANG_CODE", type=_language_list,
+                       help="Language for output document, supported "
+                       "languages are: {0}. Default is to use "
+                       "system  language (=%(default)s). Comma-separated "
+                       "list of languages produces document for each "
+                       "language, language code is added to output file "
+                       "name.".format(", ".join(languages())))
+    group.add_argument('-d', "--date-format", default=None, metavar="FMT",
+                       choices=DATE_FORMATS,
+                       help="Date format in output document, one of "
+                       "%(choices)s; if missing then language-specific "
+                       "format is used.")
+    group.add_argument('-s', "--sort-order", default=ORDER_SURNAME_GIVEN,
+                       metavar="ORDER", choices=ORDER_LIST,
+                       help="Ordering of the individuals, one of "
+                       "%(choices)s; default: %(default)s.")
+    group.add_argument("--no-missing-date", default=False, action="store_true",
+                       help="Do not output events if they have no dates.")
+    group.add_argument("--no-image", default=False, action="store_true",
+                       help="Disable images in output document.")
+    group.add_argument("--no-toc", default=False, action="store_true",
+                       help="Disable Table of Contents in output document.")
+    group.add_argument("--no-stat", default=False, action="store_true",
+                       help="Disable Name Statistics in output document.")
+    group.add_argument('-w', "--tree-width", default=4, type=int,
+                       metavar="NUMBER",
+                       help="Number of generations in ancestors tree, "
+                       "default: %(default)s")
+
+
+def _language_list(value):
+    """Converts comma-separated list of language codes into a list.
+    """
+    langs = [lang.strip() for lang in value.split(",")]
+    for lang in langs:
+        if lang not in languages():
+            raise ArgumentTypeError("unsupported language: {0!r}".format(
+                lang))
+    return langs
+
+
+def _make_writer(args, flocator, output, doc_type, tr, name_fmt):
+    """Make writer instance from command line options.
+    """
+    if args.dump_ir:
+        writer = IRWriter(flocator, output, tr,
+                          encoding=args.encoding,
+                          encoding_errors=args.encoding_errors,
+                          sort_order=args.sort_order,
+                          name_fmt=name_fmt,
+                          events_without_dates=not args.no_missing_date,
+                          make_toc=not args.no_toc,
+                          make_stat=not args.no_stat,
+                          make_images=not args.no_image,
+                          tree_width=args.tree_width,
+                          record_cache_size=args.record_cache_size,
+                          cache_dir=args.cache_dir,
+                          streaming=args.streaming,
+                          parse_jobs=args.parse_jobs,
+                          projection=args.projection,
+                          root=args.root, radius=args.radius,
+                          relation=args.relation)
+    elif doc_type == "html":
+        writer = HtmlWriter(flocator, output, tr,
                             encoding=args.encoding,
                             encoding_errors=args.encoding_errors,
                             sort_order=args.sort_order,
@@ -204,9 +456,18 @@ def main():
                             page_width=args.html_page_width,
                             image_width=args.html_image_width,
                             image_height=args.html_image_height,
-                            image_upscale=args.html_image_upscale)
-    elif args.type == "odt":
-        writer = OdtWriter(flocator, args.output, tr,
+                            image_upscale=args.html_image_upscale,
+                            record_cache_size=args.record_cache_size,
+                            cache_dir=args.cache_dir,
+                            streaming=args.streaming,
+                            parse_jobs=args.parse_jobs,
+                            projection=args.projection,
+                            incremental=args.incremental,
+                            render_jobs=args.jobs,
+                            root=args.root, radius=args.radius,
+                            relation=args.relation)
+    elif doc_type == "odt":
+        writer = OdtWriter(flocator, output, tr,
                            encoding=args.encoding,
                            encoding_errors=args.encoding_errors,
                            sort_order=args.sort_order,
@@ -224,10 +485,14 @@ def main():
                            margin_bottom=args.odt_margin_bottom,
                            image_width=args.odt_image_width,
                            image_height=args.odt_image_height,
-                           first_page=args.first_page)
-
-    try:
-        writer.save()
-    except Exception as exc:
-        _log.error("caught exception: %s", exc, exc_info=True)
-        _log.error("Error while producing a document: {0}".format(exc))
+                           first_page=args.first_page,
+                           record_cache_size=args.record_cache_size,
+                           cache_dir=args.cache_dir,
+                           streaming=args.streaming,
+                           parse_jobs=args.parse_jobs,
+                           projection=args.projection,
+                           incremental=args.incremental,
+                           render_jobs=args.jobs,
+                           root=args.root, radius=args.radius,
+                           relation=args.relation)
+    return writer
@@ -0,0 +1,210 @@
+"""Module with sortable keys for GEDCOM dates.
+
+Event dates from ``ged4py`` are :py:class:`ged4py.detail.date.DateValue`
+instances, comparing them finds the earliest calendar date in each value
+and converts both calendar dates to tuples on every comparison.
+:py:func:`date_key` converts a date once into :py:class:`DateKey` made of
+plain integers: ordering data and the range of Julian Day Numbers (JDN)
+of the days which date can refer to.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__all__ = ["DateKey", "date_key", "DateKeyCache", "jdn_year",
+           "QUALIFIER_EXACT", "QUALIFIER_PERIOD", "QUALIFIER_FROM",
+           "QUALIFIER_TO", "QUALIFIER_RANGE", "QUALIFIER_BEFORE",
+           "QUALIFIER_AFTER", "QUALIFIER_ABOUT", "QUALIFIER_CALCULATED",
+           "QUALIFIER_ESTIMATED", "QUALIFIER_INTERPRETED", "QUALIFIER_PHRASE",
+           "QUALIFIER_NONE"]
+
+from collections import namedtuple
+import re
+
+from ged4py.detail.date import CalendarDate
+
+
+DateKey = namedtuple("DateKey", "order earliest latest qualifier")
+"""Sortable representation of a date.
+
+``order`` is a tuple of integers (year, month, day) which orders dates
+exactly like comparison of ``DateValue`` instances (unknown month or day
+are 99, dates without calendar date are at year 9999). ``earliest`` and
+``latest`` are the Julian Day Numbers of the first and the last day which
+date can refer to, ``None`` if unknown (e.g. for open ranges or calendars
+other than Gregorian and Julian). ``qualifier`` is one of the
+``QUALIFIER_*`` constants. Only ``order`` should be used for sorting.
+"""
+
+QUALIFIER_EXACT = "exact"
+QUALIFIER_PERIOD = "period"
+QUALIFIER_FROM = "from"
+QUALIFIER_TO = "to"
+QUALIFIER_RANGE = "range"
+QUALIFIER_BEFORE = "before"
+QUALIFIER_AFTER = "after"
+QUALIFIER_ABOUT = "about"
+QUALIFIER_CALCULATED = "calculated"
+QUALIFIER_ESTIMATED = "estimated"
+QUALIFIER_INTERPRETED = "interpreted"
+QUALIFIER_PHRASE = "phrase"
+QUALIFIER_NONE = "none"
+
+# maps DateValue template to qualifier and to flags telling whether
+# earliest and latest days are bounded
+_TEMPLATES = {
+    "$date": (QUALIFIER_EXACT, True, True),
+    "FROM $date1 TO $date2": (QUALIFIER_PERIOD, True, True),
+    "FROM $date": (QUALIFIER_FROM, True, False),
+    "TO $date": (QUALIFIER_TO, False, True),
+    "BETWEEN $date1 AND $date2": (QUALIFIER_RANGE, True, True),
+    "BEFORE $date": (QUALIFIER_BEFORE, False, True),
+    "AFTER $date": (QUALIFIER_AFTER, True, False),
+    "ABOUT $date": (QUALIFIER_ABOUT, True, True),
+    "CALCULATED $date": (QUALIFIER_CALCULATED, True, True),
+    "ESTIMATED $date": (QUALIFIER_ESTIMATED, True, True),
+    "INTERPRETED $date ($phrase)": (QUALIFIER_INTERPRETED, True, True),
+    "($phrase)": (QUALIFIER_PHRASE, False, False),
+}
+
+# year with optional "B.C." or dual year ("1699/00") suffix
+_YEAR_RE = re.compile(r"(\d+)(?:\s*(B\.?C\.?)|/(\d+))?", re.I)
+
+_MONTH_DAYS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# key of dates without calendar dates, same ordering as DateValue()
+_NO_DATE_ORDER = CalendarDate().as_tuple
+_NO_DATE = DateKey(_NO_DATE_ORDER, None, None, QUALIFIER_NONE)
+
+
+def _jdn(year, month, day, calendar):
+    """Returns Julian Day Number of a day.
+
+    :param int year: Astronomical year number (1 B.C. is 0).
+    :param int month: Month number, 1 to 12.
+    :param int day: Day number.
+    :param str calendar: "GREGORIAN" or "JULIAN".
+    """
+    a = (14 - month) // 12
+    y = year + 4800 - a
+    m = month + 12 * a - 3
+    jdn = day + (153 * m + 2) // 5 + 365 * y + y // 4 - 32083
+    if calendar == "GREGORIAN":
+        jdn += y // 400 - y // 100 + 38
+    return jdn
+
+
+def _month_days(year, month, calendar):
+    """Returns number of days in a month."""
+    if month == 2:
+        leap = year % 4 == 0
+        if calendar == "GREGORIAN":
+            leap = leap and (year % 100 != 0 or year % 400 == 0)
+        if leap:
+            return 29
+    return _MONTH_DAYS[month - 1]
+
+
+def _day_range(date):
+    """Returns JDN of the first and the last day of a calendar date.
+
+    :param date: :py:class:`ged4py.detail.date.CalendarDate` instance.
+    :return: Tuple of two integers, or ``None`` if calendar is not
+        supported or year cannot be parsed.
+    """
+    calendar = date.calendar
+    if calendar not in ("GREGORIAN", "JULIAN") or not date.year:
+        return None
+    match = _YEAR_RE.match(date.year)
+    if match is None:
+        return None
+    year = int(match.group(1))
+    if match.group(2):
+        # 1 B.C. is year 0
+        year = 1 - year
+    elif match.group(3):
+        # dual dating, only used for January to March of the later year
+        year += 1
+
+    month = date.month_num
+    if month is None:
+        return (_jdn(year, 1, 1, calendar), _jdn(year, 12, 31, calendar))
+    days = _month_days(year, month, calendar)
+    day = date.day
+    if day is None or not 1 <= day <= days:
+        return (_jdn(year, month, 1, calendar),
+                _jdn(year, month, days, calendar))
+    jdn = _jdn(year, month, day, calendar)
+    return (jdn, jdn)
+
+
+def jdn_year(jdn):
+    """Returns Gregorian year of a day.
+
+    :param int jdn: Julian Day Number.
+    :return: Astronomical year number (1 B.C. is 0).
+    """
+    f = jdn + 1401 + (4 * jdn + 274277) // 146097 * 3 // 4 - 38
+    e = 4 * f + 3
+    month = ((5 * (e % 1461 // 4) + 2) // 153 + 2) % 12 + 1
+    return e // 1461 - 4716 + (14 - month) // 12
+
+
+def date_key(date):
+    """Make sortable key for a date.
+
+    :param date: :py:class:`ged4py.detail.date.DateValue` instance or
+        ``None``.
+    :return: :py:class:`DateKey` instance.
+    """
+    if date is None:
+        return _NO_DATE
+    dates = [val for val in date.kw.values() if isinstance(val, CalendarDate)]
+    qualifier, bounded_earliest, bounded_latest = _TEMPLATES.get(
+        date.template, (QUALIFIER_NONE, False, False))
+    if not dates:
+        return DateKey(_NO_DATE_ORDER, None, None, qualifier)
+
+    order = min(val.as_tuple for val in dates)
+    earliest = latest = None
+    ranges = [_day_range(val) for val in dates]
+    if None not in ranges:
+        if bounded_earliest:
+            earliest = min(first for first, _ in ranges)
+        if bounded_latest:
+            latest = max(last for _, last in ranges)
+    return DateKey(order, earliest, latest, qualifier)
+
+
+class DateKeyCache(object):
+    """Cache of :py:class:`DateKey` instances.
+
+    ``ged4py`` replaces text of DATE records with parsed ``DateValue``, so
+    cache is keyed by the contents of parsed value, which is the same for
+    the same date text. Many events share their dates (e.g. years without
+    month and day), each distinct date is converted only once.
+    """
+
+    def __init__(self):
+        self._keys = {}
+
+    def get(self, date):
+        """Returns sortable key for a date.
+
+        :param date: :py:class:`ged4py.detail.date.DateValue` instance or
+            ``None``.
+        :return: :py:class:`DateKey` instance.
+        """
+        if date is None:
+            return _NO_DATE
+        items = [date.template]
+        for name, val in date.kw.items():
+            if isinstance(val, CalendarDate):
+                items += [name, val.year, val.month, val.day, val.calendar]
+            else:
+                items += [name, val]
+        items = tuple(items)
+        try:
+            return self._keys[items]
+        except KeyError:
+            key = self._keys[items] = date_key(date)
+            return key
@@ -0,0 +1,130 @@
+"""Module for comparing two versions of GEDCOM file.
+
+Comparison works on raw record data without parsing GEDCOM files, every
+level-0 record is hashed (see :py:func:`ged2doc.scan.record_hashes`) and
+records are matched by their reference IDs.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__all__ = ["RecordDiff", "file_hashes", "diff_hashes", "diff_files"]
+
+import codecs
+import collections
+import logging
+from argparse import ArgumentParser
+
+from .input import make_file_locator
+from . import reader, scan
+
+
+_log = logging.getLogger(__name__)
+
+
+RecordDiff = collections.namedtuple("RecordDiff", "added removed modified")
+"""Result of comparison, each attribute is a sorted list of (tag, xref_id)
+tuples for added, removed and modified records.
+"""
+
+
+def file_hashes(flocator):
+    """Compute hashes of level-0 records in GEDCOM file.
+
+    :param flocator: Instance of :py:class:`ged2doc.input.FileLocator`
+    :return: Dictionary mapping xref_id to tuple (tag, hash).
+    :raises OSError: If GEDCOM file cannot be located.
+    """
+    gfile = flocator.open_gedcom()
+    if not gfile:
+        raise OSError("Failed to locate input file")
+    # skip UTF-8 BOM, reference IDs are ASCII in practice so UTF-8 works
+    # for all ASCII-compatible encodings
+    gfile.seek(0)
+    offset = 0
+    if gfile.read(3) == codecs.BOM_UTF8:
+        offset = 3
+    with reader._gc_disabled():
+        return scan.record_hashes(gfile, offset, "utf_8", "replace")
+
+
+def diff_hashes(old, new, tags=("INDI", "FAM")):
+    """Compare record hashes of two files.
+
+    :param dict old: Hashes of old file records, as returned from
+        :py:func:`file_hashes`.
+    :param dict new: Hashes of new file records.
+    :param tags: Tags of the records to compare, ``None`` means all records.
+    :return: :py:class:`RecordDiff` instance.
+    """
+    def _keys(hashes):
+        return set(key for key, (tag, _) in hashes.items()
+                   if tags is None or tag in tags)
+
+    old_keys = _keys(old)
+    new_keys = _keys(new)
+    added = sorted((new[key][0], key) for key in new_keys - old_keys)
+    removed = sorted((old[key][0], key) for key in old_keys - new_keys)
+    modified = sorted((new[key][0], key) for key in new_keys & old_keys
+                      if new[key] != old[key])
+    return RecordDiff(added, removed, modified)
+
+
+def diff_files(old_flocator, new_flocator, tags=("INDI", "FAM")):
+    """Compare records in two GEDCOM files.
+
+    :param old_flocator: :py:class:`ged2doc.input.FileLocator` for old file.
+    :param new_flocator: :py:class:`ged2doc.input.FileLocator` for new file.
+    :param tags: Tags of the records to compare, ``None`` means all records.
+    :return: :py:class:`RecordDiff` instance.
+    """
+    return diff_hashes(file_hashes(old_flocator), file_hashes(new_flocator),
+                       tags)
+
+
+def main(argv=None):
+    """Console script for ``ged2doc-diff`` command.
+
+    Prints one line per added, removed or modified record. Returns 0 if
+    there are no differences, 1 otherwise.
+
+    :param list argv: Command line arguments, default is ``sys.argv[1:]``.
+    """
+    parser = ArgumentParser(prog="ged2doc-diff",
+                            description="Compare INDI and FAM records in "
+                            "two GEDCOM files.")
+    parser.add_argument('-v', "--verbose", action="count", default=0,
+                        help="Print some info to standard output, "
+                        "-vv prints debug info.")
+    parser.add_argument('-p', "--file-name-pattern", metavar="PATTERN",
+                        default="*.ged*",
+                        help="Name pattern for GEDCOM file inside ZIP "
+                        "archive; default: %(default)s")
+    parser.add_argument("--all", default=False, action="store_true",
+                        help="Compare all records, not only INDI and FAM.")
+    parser.add_argument("old", help="Location of old input file.")
+    parser.add_argument("new", help="Location of new input file.")
+    args = parser.parse_args(argv)
+
+    if args.verbose == 0:
+        log_level = logging.WARN
+    elif args.verbose == 1:
+        log_level = logging.INFO
+    else:
+        log_level = logging.DEBUG
+    logging.basicConfig(level=log_level)
+    reader.allow_gc_pause()
+
+    try:
+        old = make_file_locator(args.old, args.file_name_pattern, None)
+        new = make_file_locator(args.new, args.file_name_pattern, None)
+        result = diff_files(old, new, None if args.all else ("INDI", "FAM"))
+    except Exception as exc:
+        parser.error("Error reading input file: {0}".format(exc))
+
+    for status, records in zip(("added", "removed", "modified"), result):
+        for tag, xref_id in records:
+            print("{0:8s} {1:4s} {2}".format(status, tag, xref_id))
+    _log.info("%d added, %d removed, %d modified records",
+              len(result.added), len(result.removed), len(result.modified))
+
+    return 1 if any(result) else 0
@@ -3,10 +3,15 @@
 
 from __future__ import absolute_import, division, print_function
 
-__all__ = ['Event', 'indi_events', 'indi_attributes', 'family_events']
+__all__ = ['Event', 'indi_events', 'indi_attributes', 'family_events',
+           'RecordEvents', 'EventCache']
 
 from collections import namedtuple
 
+from ged4py import model
+from .dates import DateKeyCache
+from .reader import RecordCache
+
 # Event structure, reflection of <EVENT_DETAIL>. Only relevant
 # pieces appear here.
 Event = namedtuple("Event", "tag value type date place note cause")
@@ -25,6 +30,38 @@ _fam_events_tags = set([
     'ANUL', 'CENS', 'DIV', 'DIVF', 'ENGA', 'MARB', 'MARC',
     'MARR', 'MARL', 'MARS', 'RESI', 'EVEN'])
 
+_all_tags = _indi_events_tags | _indi_attr_tags | _fam_events_tags
+
+# Tags of event details
+_detail_tags = frozenset(['TYPE', 'DATE', 'PLAC', 'NOTE', 'CAUS'])
+
+
+def _make_event(rec):
+    """Make event from event sub-record.
+
+    Event details are extracted in one pass over sub-records, like
+    ``rec.sub_tag_value()`` first sub-record with each tag is used and
+    pointers are resolved.
+
+    :param rec: Event record (:py:class:`ged4py.model.Record` instance)
+    :return: :py:class:`Event` instance.
+    """
+    details = {}
+    for sub in rec.sub_records or ():
+        tag = sub.tag
+        if tag in _detail_tags and tag not in details:
+            if isinstance(sub, model.Pointer):
+                sub = sub.ref
+            details[tag] = None if sub is None else sub.value
+    get = details.get
+    return Event(tag=rec.tag,
+                 value=rec.value,
+                 type=get('TYPE'),
+                 date=get('DATE'),
+                 place=get('PLAC'),
+                 note=get('NOTE'),
+                 cause=get('CAUS'))
+
 
 def _get_events(record, tags):
     """Return events corresponding to a record.
@@ -33,17 +70,8 @@ def _get_events(record, tags):
     :param tags: List/set of tag names.
     :return: List of :py:class:`Event` instances.
     """
-    events = []
-    for rec in record.sub_records:
-        if rec.tag in tags:
-            events.append(Event(tag=rec.tag,
-                                value=rec.value,
-                                type=rec.sub_tag_value('TYPE'),
-                                date=rec.sub_tag_value('DATE'),
-                                place=rec.sub_tag_value('PLAC'),
-                                note=rec.sub_tag_value('NOTE'),
-                                cause=rec.sub_tag_value('CAUS')))
-    return events
+    return [_make_event(rec) for rec in record.sub_records
+            if rec.tag in tags]
 
 
 def indi_events(person, tags=None):
@@ -74,3 +102,97 @@ def family_events(family, tags=None):
     :return: List of :py:class:`Event` instances.
     """
     return _get_events(family, tags or _fam_events_tags)
+
+
+class RecordEvents(object):
+    """Events and attributes of a record grouped by tag.
+
+    All events and attributes (of individuals and families) are extracted
+    from a record in one pass, and they are grouped by tag so that events
+    with a particular tag do not need another pass over sub-records.
+
+    :param record: GEDCOM record (:py:class:`ged4py.model.Record` instance)
+
+    :ivar list events: List of :py:class:`Event` instances in the order of
+        sub-records.
+    """
+
+    def __init__(self, record):
+        self.events = _get_events(record, _all_tags)
+        self._by_tag = {}
+        for event in self.events:
+            self._by_tag.setdefault(event.tag, []).append(event)
+
+    def tag(self, tag):
+        """Returns events with given tag.
+
+        :param str tag: Tag name, e.g. "BIRT".
+        :return: List of :py:class:`Event` instances.
+        """
+        return self._by_tag.get(tag, [])
+
+    def select(self, tags):
+        """Returns events with any of given tags.
+
+        :param tags: Set of tag names.
+        :return: List of :py:class:`Event` instances in the order of
+            sub-records.
+        """
+        return [event for event in self.events if event.tag in tags]
+
+    def indi_events(self):
+        """Returns all events of an individual, same as
+        :py:func:`indi_events`.
+        """
+        return self.select(_indi_events_tags)
+
+    def indi_attributes(self):
+        """Returns all attributes of an individual, same as
+        :py:func:`indi_attributes`.
+        """
+        return self.select(_indi_attr_tags)
+
+    def family_events(self):
+        """Returns all events of a family, same as :py:func:`family_events`.
+        """
+        return self.select(_fam_events_tags)
+
+
+class EventCache(object):
+    """Cache of :py:class:`RecordEvents` keyed by record reference ID.
+
+    Events of a person are used in the person section and in the sections
+    of the person parents (child birth), cache makes them only once. Cache
+    should only be used while records do not change.
+
+    :param int max_size: Maximum number of records in a cache, ``None``
+        (default) means unlimited.
+
+    :ivar dates: :py:class:`ged2doc.dates.DateKeyCache` instance with
+        sortable keys of event dates.
+    """
+
+    def __init__(self, max_size=None):
+        self._cache = RecordCache(max_size)
+        self.dates = DateKeyCache()
+
+    def get(self, record):
+        """Returns events of a record.
+
+        :param record: GEDCOM record (:py:class:`ged4py.model.Record`
+            instance)
+        :return: :py:class:`RecordEvents` instance.
+        """
+        events = self._cache.get(record.xref_id)
+        if events is None:
+            events = RecordEvents(record)
+            self._cache.put(record.xref_id, events)
+        return events
+
+    def find(self, xref_id):
+        """Returns events of a record if they are in a cache.
+
+        :param str xref_id: Record reference ID.
+        :return: :py:class:`RecordEvents` instance or ``None``.
+        """
+        return self._cache.get(xref_id)
@@ -0,0 +1,237 @@
+"""Module with cache of rendered person fragments.
+
+Rendering of a person section (formatting of names and dates, resizing of
+images, plotting ancestor trees) is the most expensive part of conversion.
+When a GEDCOM file is converted again after a small change most of the
+persons render identically, this module keeps rendered fragments between
+runs so that only persons affected by the change are rendered again.
+
+Each fragment is stored together with a key which is a hash of all GEDCOM
+records that the fragment depends on: person record itself, families where
+person is a spouse with spouses and children, and families where person is
+a child with parents and further ancestors (as many generations as shown
+in ancestor tree). Hashes of records are computed from raw record data (see
+:py:func:`ged2doc.scan.record_hashes`), records that are referenced by
+pointers from these records (e.g. notes) are included in the hash too.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__all__ = ["FragmentCache"]
+
+import hashlib
+import logging
+import os
+import pickle
+
+from ged4py import model
+from .reader import _dump_atomic, _gc_disabled
+
+
+_log = logging.getLogger(__name__)
+
+
+def _pointers(record):
+    """Generator for reference IDs of all pointers in a record and its
+    sub-records.
+    """
+    for sub in record.sub_records:
+        if isinstance(sub, model.Pointer):
+            yield sub.value
+        for xref_id in _pointers(sub):
+            yield xref_id
+
+
+class FragmentCache(object):
+    """Persistent cache of rendered person fragments.
+
+    Fragments are loaded from a file when cache is created and saved by
+    :py:meth:`save`, only fragments that were used or added since loading
+    are saved. Fragment data is opaque for this class, it only has to be
+    picklable.
+
+    :param str path: Name of the cache file, if ``None`` then fragments
+        are only kept in memory.
+    :param dict hashes: Hashes of raw records, dictionary mapping xref_id to
+        tuple (tag, hash), as returned from
+        :py:func:`ged2doc.scan.record_hashes`.
+    :param int generations: Number of ancestor generations that fragment
+        depends on.
+
+    :ivar int hits: Number of fragments found in cache.
+    :ivar int misses: Number of fragments which had to be rendered.
+    """
+
+    def __init__(self, path, hashes, generations):
+        self._path = path
+        self._hashes = hashes
+        self._generations = max(generations, 1)
+        self._record_hashes = {}
+        self._person_keys = {}
+        # reverse dependencies, map xref_id to the set of records whose
+        # hash includes it, or the set of persons whose key includes it
+        self._referrers = {}
+        self._dependents = {}
+        self._fragments = {}
+        self._used = {}
+        self.hits = 0
+        self.misses = 0
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, "rb") as cachefile, _gc_disabled():
+                    self._fragments = pickle.load(cachefile)
+            except Exception as exc:
+                _log.warning("Failed to read fragment cache %s: %s",
+                             path, exc)
+
+    def _record_hash(self, record):
+        """Returns hash of a record including records that it points to,
+        except individuals and families, or ``None`` if record is unknown.
+        """
+        xref_id = record.xref_id
+        try:
+            return self._record_hashes[xref_id]
+        except KeyError:
+            pass
+        digest = None
+        tag_hash = self._hashes.get(xref_id)
+        if tag_hash is not None:
+            digest = hashlib.sha1(tag_hash[1])
+            for pointer in _pointers(record):
+                self._referrers.setdefault(pointer, set()).add(xref_id)
+                tag, phash = self._hashes.get(pointer, (None, b""))
+                if tag not in ('INDI', 'FAM'):
+                    digest.update(pointer.encode("utf_8") + b":" + phash)
+            digest = digest.digest()
+        self._record_hashes[xref_id] = digest
+        return digest
+
+    def key(self, person, extra=b""):
+        """Returns key for person fragment.
+
+        :param person: INDI record (:py:class:`ged4py.model.Individual`).
+        :param bytes extra: Additional data for the key, e.g. image data.
+        :return: Key (bytes) or ``None`` if fragment cannot be cached
+            (e.g. record hash is not known).
+        """
+        xref_id = person.xref_id
+        try:
+            person_key = self._person_keys[xref_id]
+        except KeyError:
+            person_key = self._person_keys[xref_id] = self._person_key(person)
+        if person_key is None:
+            return None
+        return hashlib.sha1(person_key + extra).digest()
+
+    def _person_key(self, person):
+        """Returns hash of all records that person fragment depends on.
+        """
+        # dangling pointers dereference to None, they are included in the
+        # hash of the record that contains them
+        records = [person]
+        for fam in person.sub_tags("FAMS"):
+            if fam is None:
+                continue
+            records.append(fam)
+            records += fam.sub_tags("HUSB", "WIFE", "CHIL")
+        generation = [person]
+        for _ in range(self._generations):
+            parents = []
+            for child in generation:
+                if child is None:
+                    continue
+                for fam in child.sub_tags("FAMC"):
+                    if fam is None:
+                        continue
+                    records.append(fam)
+                    parents += fam.sub_tags("HUSB", "WIFE")
+            records += parents
+            generation = parents
+
+        digest = hashlib.sha1()
+        for record in records:
+            if record is None:
+                continue
+            self._dependents.setdefault(record.xref_id, set()).add(
+                person.xref_id)
+            rhash = self._record_hash(record)
+            if rhash is None:
+                return None
+            digest.update(record.xref_id.encode("utf_8") + b":" + rhash)
+        return digest.digest()
+
+    def update(self, hashes):
+        """Replace record hashes after GEDCOM file has changed.
+
+        Keys of the persons that depend on changed records are computed
+        again when :py:meth:`key` is called, all other keys are re-used.
+        Records must be parsed from the new file contents.
+
+        :param dict hashes: Hashes of raw records of the new file, same
+            format as for constructor.
+        :return: Set of reference IDs of the persons whose keys have to be
+            re-computed.
+        """
+        old = self._hashes
+        changed = set(xref_id for xref_id, tag_hash in hashes.items()
+                      if old.get(xref_id) != tag_hash)
+        changed.update(xref_id for xref_id in old if xref_id not in hashes)
+        self._hashes = hashes
+
+        # pointers to INDI and FAM records are not included in record hash
+        records = set(changed)
+        for xref_id in changed:
+            tags = (old.get(xref_id, (None,))[0],
+                    hashes.get(xref_id, (None,))[0])
+            if not all(tag in ('INDI', 'FAM') for tag in tags):
+                records.update(self._referrers.get(xref_id, ()))
+
+        persons = set()
+        for xref_id in records:
+            self._record_hashes.pop(xref_id, None)
+            persons.update(self._dependents.pop(xref_id, ()))
+        for xref_id in persons:
+            self._person_keys.pop(xref_id, None)
+        return persons
+
+    def get(self, xref_id, key):
+        """Returns cached fragment or ``None``.
+
+        :param str xref_id: Person reference ID.
+        :param bytes key: Fragment key returned from :py:meth:`key`.
+        """
+        if key is not None:
+            fkey, data = self._fragments.get(xref_id, (None, None))
+            if fkey == key:
+                self.hits += 1
+                self._used[xref_id] = (key, data)
+                return data
+        self.misses += 1
+        return None
+
+    def put(self, xref_id, key, data):
+        """Store fragment in cache.
+
+        :param str xref_id: Person reference ID.
+        :param bytes key: Fragment key returned from :py:meth:`key`, if
+            ``None`` then nothing is stored.
+        :param data: Fragment data.
+        """
+        if key is not None:
+            self._used[xref_id] = (key, data)
+
+    def save(self):
+        """Save fragments to cache file.
+
+        Only fragments which were used (or added) are saved, other fragments
+        are also removed from memory, and counters are reset.
+        """
+        if self._path is not None:
+            try:
+                with _gc_disabled():
+                    _dump_atomic(self._path, self._used)
+            except (IOError, OSError) as exc:
+                _log.warning("Failed to save fragment cache %s: %s",
+                             self._path, exc)
+        self._fragments, self._used = self._used, {}
+        self.hits = self.misses = 0
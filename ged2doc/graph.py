@@ -0,0 +1,267 @@
+"""Module with index of family relationships.
+
+Navigation methods of ``ged4py`` records (e.g. ``person.mother`` or
+``fam.sub_tags("CHIL")``) dereference pointers, which means reading and
+parsing of the records they point to, and sub-records are scanned again on
+every call. :py:class:`FamilyGraph` keeps reference IDs of related records
+taken from pointer values, so walking the family graph does not need the
+records of the persons that are visited, and each relation is a dictionary
+lookup. Index also keeps sex of each person, which together with cached
+names (:py:class:`ged2doc.name.NameCache`) is all that is needed to make a
+reference to a relative.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__all__ = ["FamilyGraph", "RELATION_ALL", "RELATION_ANCESTORS",
+           "RELATION_DESCENDANTS", "RELATIONS"]
+
+import collections
+import logging
+
+from .reader import _gc_disabled
+
+
+_log = logging.getLogger(__name__)
+
+RELATION_ALL = "all"
+"""Parents, children and spouses are related."""
+
+RELATION_ANCESTORS = "ancestors"
+"""Only parents are related."""
+
+RELATION_DESCENDANTS = "descendants"
+"""Only children are related."""
+
+RELATIONS = [RELATION_ALL, RELATION_ANCESTORS, RELATION_DESCENDANTS]
+
+
+class FamilyGraph(object):
+    """Index of relationships between persons and families.
+
+    Index maps person reference ID to families where the person is a child
+    or a spouse, and family reference ID to its spouses and children.
+    Entries are made from records when they are first needed, so the cost
+    is proportional to the number of visited persons, not to the size of
+    the file. Records which are already read can be added with
+    :py:meth:`add_record`, and :py:meth:`build` makes complete index in one
+    pass.
+
+    :param reader: Reader instance, e.g.
+        :py:class:`ged2doc.reader.CachingReader`.
+    """
+
+    def __init__(self, reader):
+        self._reader = reader
+        # maps xref_id to (famc, fams, sex) tuple, sex is None for missing
+        # records
+        self._persons = {}
+        # maps xref_id to (husband, wife, spouses, children) tuple, spouses
+        # are HUSB and WIFE in the order of sub-records
+        self._families = {}
+
+    @property
+    def reader(self):
+        """Reader instance used by this index."""
+        return self._reader
+
+    def add_record(self, record):
+        """Add relations of INDI or FAM record to index.
+
+        Records with other tags are ignored.
+
+        :param record: :py:class:`ged4py.model.Record` instance.
+        """
+        # single pass over sub-records, pointer values are not resolved
+        if record.tag == 'INDI':
+            famc = []
+            fams = []
+            sex = None
+            for sub in record.sub_records:
+                if sub.tag == "FAMC" and sub.value:
+                    famc.append(sub.value)
+                elif sub.tag == "FAMS" and sub.value:
+                    fams.append(sub.value)
+                elif sub.tag == "SEX" and sex is None:
+                    # same as ged4py.model.Individual.sex
+                    sex = sub.value
+            self._persons[record.xref_id] = (famc, fams,
+                                             "U" if sex is None else sex)
+        elif record.tag == 'FAM':
+            husband = wife = None
+            spouses = []
+            children = []
+            for sub in record.sub_records:
+                tag, value = sub.tag, sub.value
+                if not value:
+                    continue
+                if tag == "CHIL":
+                    children.append(value)
+                elif tag == "HUSB":
+                    spouses.append(value)
+                    husband = husband or value
+                elif tag == "WIFE":
+                    spouses.append(value)
+                    wife = wife or value
+            self._families[record.xref_id] = (husband, wife, spouses,
+                                              children)
+
+    def build(self):
+        """Add all INDI and FAM records of a file to index.
+        """
+        with _gc_disabled():
+            for offset, tag in self._reader.index0:
+                if tag in ('INDI', 'FAM'):
+                    self.add_record(self._reader.read_record(offset))
+        _log.debug("build: %d persons, %d families", len(self._persons),
+                   len(self._families))
+
+    def _person(self, xref_id):
+        """Returns tuple of FAMC and FAMS lists and sex for a person.
+        """
+        try:
+            return self._persons[xref_id]
+        except KeyError:
+            pass
+        record = self._reader.record(xref_id)
+        if record is not None and record.tag == 'INDI':
+            self.add_record(record)
+        else:
+            self._persons[xref_id] = ([], [], None)
+        return self._persons[xref_id]
+
+    def _family(self, xref_id):
+        """Returns tuple of husband, wife, spouses and children for a family.
+        """
+        try:
+            return self._families[xref_id]
+        except KeyError:
+            pass
+        record = self._reader.record(xref_id)
+        if record is not None and record.tag == 'FAM':
+            self.add_record(record)
+        else:
+            self._families[xref_id] = (None, None, [], [])
+        return self._families[xref_id]
+
+    def sex(self, xref_id):
+        """Returns person sex, "M", "F", or "U", or ``None`` if there is no
+        such person.
+
+        :param str xref_id: Person reference ID.
+        """
+        return self._person(xref_id)[2]
+
+    def mother(self, xref_id):
+        """Returns reference ID of person mother or ``None``.
+
+        Like ``ged4py.model.Individual.mother`` only the first family where
+        person is a child is used.
+
+        :param str xref_id: Person reference ID.
+        """
+        famc = self._person(xref_id)[0]
+        if famc:
+            return self._family(famc[0])[1]
+        return None
+
+    def father(self, xref_id):
+        """Returns reference ID of person father or ``None``.
+
+        Like ``ged4py.model.Individual.father`` only the first family where
+        person is a child is used.
+
+        :param str xref_id: Person reference ID.
+        """
+        famc = self._person(xref_id)[0]
+        if famc:
+            return self._family(famc[0])[0]
+        return None
+
+    def families(self, xref_id):
+        """Returns families where person is a spouse.
+
+        :param str xref_id: Person reference ID.
+        :return: List of (family, spouse, children) tuples, family and
+            spouse are reference IDs, spouse is ``None`` if unknown,
+            children is a list of reference IDs.
+        """
+        families = []
+        for fam in self._person(xref_id)[1]:
+            _, _, spouses, children = self._family(fam)
+            spouses = [spouse for spouse in spouses if spouse != xref_id]
+            families.append((fam, spouses[0] if spouses else None,
+                             children))
+        return families
+
+    def parents(self, xref_id):
+        """Returns list of reference IDs of person parents.
+
+        :param str xref_id: Person reference ID.
+        """
+        parents = []
+        for fam in self._person(xref_id)[0]:
+            husband, wife, _, _ = self._family(fam)
+            parents += [parent for parent in (husband, wife) if parent]
+        return parents
+
+    def spouses(self, xref_id):
+        """Returns list of reference IDs of person spouses.
+
+        :param str xref_id: Person reference ID.
+        """
+        spouses = []
+        for fam in self._person(xref_id)[1]:
+            husband, wife, _, _ = self._family(fam)
+            spouses += [spouse for spouse in (husband, wife)
+                        if spouse and spouse != xref_id]
+        return spouses
+
+    def children(self, xref_id):
+        """Returns list of reference IDs of person children.
+
+        :param str xref_id: Person reference ID.
+        """
+        children = []
+        for fam in self._person(xref_id)[1]:
+            children += self._family(fam)[3]
+        return children
+
+    def relatives(self, xref_id, radius=None, relation=RELATION_ALL):
+        """Find persons within given number of steps from a person.
+
+        Breadth-first walk over family graph, one step is a relation to a
+        parent, a child, or a spouse (siblings are two steps apart).
+
+        :param str xref_id: Reference ID of the starting person.
+        :param int radius: Maximum number of steps, ``None`` means no limit.
+        :param str relation: Which relations to follow, one of
+            :py:data:`RELATIONS`.
+        :return: Dictionary mapping reference IDs of persons (including
+            starting person) to their distance from starting person.
+        :raises ValueError: If ``relation`` is not known.
+        """
+        if relation == RELATION_ALL:
+            steps = (self.parents, self.children, self.spouses)
+        elif relation == RELATION_ANCESTORS:
+            steps = (self.parents,)
+        elif relation == RELATION_DESCENDANTS:
+            steps = (self.children,)
+        else:
+            raise ValueError("Unknown relation: {0!r}".format(relation))
+
+        distances = {xref_id: 0}
+        queue = collections.deque([xref_id])
+        while queue:
+            person = queue.popleft()
+            distance = distances[person] + 1
+            if radius is not None and distance > radius:
+                continue
+            for step in steps:
+                for relative in step(person):
+                    if relative not in distances:
+                        distances[relative] = distance
+                        queue.append(relative)
+        _log.debug("relatives: found %d persons within %s steps of %s",
+                   len(distances), radius, xref_id)
+        return distances
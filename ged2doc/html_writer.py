@@ -11,17 +11,34 @@ import io
 import logging
 import pkg_resources
 import string
+import threading
 from PIL import Image
 
 from ged4py import model
-from .plotter import Plotter
 from .size import Size
 from . import utils
+from . import graph
 from . import writer
 
 
 _log = logging.getLogger(__name__)
 
+# style sheet template, loaded once per process
+_style = None
+_style_lock = threading.Lock()
+
+
+def _style_template():
+    """Returns template of the document style sheet.
+    """
+    global _style
+    with _style_lock:
+        if _style is None:
+            style = pkg_resources.resource_string(__name__,
+                                                  "data/styles/default")
+            _style = string.Template(style.decode('utf-8'))
+        return _style
+
 # this is no-op function, only used to mark translatable strings,
 # to extract all strings run "pygettext -k TR ..."
 
@@ -63,6 +80,30 @@ class HtmlWriter(writer.Writer):
     :param bool image_upscale: If True then smaller images will be
         re-scaled to extend to image size.
     :param int tree_width: Number of generations in ancestor tree.
+    :param int record_cache_size: Maximum number of parsed GEDCOM records
+        kept in memory, ``None`` (default) means unlimited.
+    :param str cache_dir: Directory for snapshots of parsed GEDCOM data,
+        ``None`` (default) disables snapshots.
+    :param bool streaming: If ``True`` then use two-pass mode which does
+        not keep all parsed records in memory.
+    :param int parse_jobs: Number of processes used for parsing GEDCOM
+        file.
+    :param bool projection: If ``True`` then skip parsing of GEDCOM data
+        which is not used in output document.
+    :param bool incremental: If ``True`` then re-use person sections
+        rendered by previous conversion, requires ``cache_dir``.
+    :param int render_jobs: Number of processes used for rendering person
+        sections.
+    :param str root: Reference ID of a person, if given then only persons
+        related to this person are included.
+    :param int radius: Maximum number of relationship steps from root
+        person, ``None`` (default) means no limit.
+    :param str relation: Relations which are followed from root person,
+        one of the constants defined in :py:mod:`ged2doc.graph` module.
+    :param progress: Callable which is called with the number of rendered
+        persons and total number of persons after each person.
+    :param image_limiter: Context manager which is held while image is
+        decoded and resized, e.g. shared ``threading.Semaphore``.
     """
 
     def __init__(self, flocator, output, tr, encoding=None,
@@ -72,14 +113,28 @@ class HtmlWriter(writer.Writer):
                  events_without_dates=True,
                  page_width="800px", image_width="300px",
                  image_height="300px", image_upscale=False,
-                 tree_width=4):
+                 tree_width=4, record_cache_size=None,
+                 cache_dir=None, streaming=False, parse_jobs=1,
+                 projection=False, incremental=False, render_jobs=1,
+                 root=None, radius=None, relation=graph.RELATION_ALL,
+                 progress=None, image_limiter=None):
 
         writer.Writer.__init__(self, flocator, tr, encoding=encoding,
                                encoding_errors=encoding_errors,
                                sort_order=sort_order, name_fmt=name_fmt,
                                make_images=make_images, make_stat=make_stat,
                                make_toc=make_toc,
-                               events_without_dates=events_without_dates)
+                               events_without_dates=events_without_dates,
+                               record_cache_size=record_cache_size,
+                               cache_dir=cache_dir,
+                               streaming=streaming,
+                               parse_jobs=parse_jobs,
+                               projection=projection,
+                               incremental=incremental,
+                               render_jobs=render_jobs,
+                               root=root, radius=radius,
+                               relation=relation, progress=progress,
+                               image_limiter=image_limiter)
 
         self._page_width = Size(page_width)
         self._image_width = Size(image_width)
@@ -95,6 +150,59 @@ class HtmlWriter(writer.Writer):
             self._close = True
         self._toc = []
 
+    def render_person(self, xref_id):
+        """Produce HTML fragment for a single person.
+
+        Returned fragment contains the same HTML as the person section of
+        the document produced by :py:meth:`~ged2doc.writer.Writer.save`
+        (including ancestor tree), nothing is written to the output file.
+
+        :param str xref_id: Person reference ID, e.g. "@I1@".
+        :return: HTML fragment, unicode string.
+        :raises KeyError: If there is no person with given ID.
+        """
+        html, _ = writer.Writer.render_person(self, xref_id)
+        return html.decode('utf-8')
+
+    _fragments_supported = True
+
+    def _fragment_options(self):
+        """Returns list of options which affect rendered person sections.
+        """
+        return writer.Writer._fragment_options(self) + [
+            self._page_width, self._image_width, self._image_height,
+            self._image_upscale, self._tree_width]
+
+    def _fragment_generations(self):
+        """Returns number of ancestor generations rendered for each person.
+        """
+        return self._tree_width
+
+    def _begin_fragment(self):
+        """Start collecting HTML output into a fragment.
+        """
+        self._saved_output = self._output, self._toc
+        self._output = io.BytesIO()
+        self._toc = []
+
+    def _end_fragment(self):
+        """Stop collecting output into a fragment and return fragment.
+
+        :return: Tuple of HTML (bytes) and list of TOC entries.
+        """
+        data = self._output.getvalue(), self._toc
+        self._output, self._toc = self._saved_output
+        return data
+
+    def _replay_fragment(self, data):
+        """Add previously collected fragment to output document.
+
+        :param data: Fragment data returned from :py:meth:`_end_fragment`.
+        """
+        html, toc = data
+        self._output.write(html)
+        self._toc += toc
+
     def _render_prolog(self):
         """Generate initial document header/title.
         """
@@ -104,9 +212,7 @@ class HtmlWriter(writer.Writer):
                 ' charset=utf-8">\n']
         doc += ['<title>', 'Family Tree', '</title>\n']
         d = dict(page_width=self._page_width ^ 'px')
-        style = pkg_resources.resource_string(__name__, "data/styles/default")
-        style = style.decode('utf-8')
-        doc += [string.Template(style).substitute(d)]
+        doc += [_style_template().substitute(d)]
         doc += ['</head>\n', '<body>\n']
         doc += ['<div id="contents_div"/>\n']
         for line in doc:
@@ -300,6 +406,12 @@ class HtmlWriter(writer.Writer):
     def _getImageFragment(self, image_data):
         '''Returns <img> HTML fragment for given image data (byte array).
         '''
+        with self._decoding_image():
+            return self._makeImageFragment(image_data)
+
+    def _makeImageFragment(self, image_data):
+        '''Decodes and resizes image, see :py:meth:`_getImageFragment`.
+        '''
 
         imgfile = io.BytesIO(image_data)
         img = Image.open(imgfile)
@@ -337,9 +449,9 @@ class HtmlWriter(writer.Writer):
         :return: Image data (XML contents), bytes
         """
         width = self._page_width ^ 'px'
-        plotter = Plotter(width=width, gen_dist="12pt", font_size="9pt",
-                          fullxml=False, refs=True, max_gen=self._tree_width)
-        img = plotter.parent_tree(person, 'px')
+        img = self._parent_tree(person, 'px', width=width, gen_dist="12pt",
+                                font_size="9pt", fullxml=False, refs=True,
+                                max_gen=self._tree_width)
         if img is not None:
             return img[0]
         return None
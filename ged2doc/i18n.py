@@ -17,6 +17,7 @@ import gettext
 import logging
 import pkg_resources
 import string
+import threading
 
 from ged4py.detail.date import CalendarDate
 
@@ -162,9 +163,47 @@ class _NullFallback(object):
         return None
 
 
+# maps (lang, domain) to translations catalog or None, catalogs are not
+# modified after loading and are shared by all I18N instances
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def _catalog(lang, domain):
+    """Returns translations catalog for a language.
+
+    Catalog is loaded from MO file once per process.
+
+    :param str lang: Output language such as "en", "ru".
+    :param domain: gettext domain (message file name)
+    :return: ``gettext.GNUTranslations`` instance or ``None`` if MO file
+        does not exist.
+    """
+    key = (lang, domain)
+    with _catalogs_lock:
+        if key in _catalogs:
+            return _catalogs[key]
+        catalog = None
+        path = "data/lang/{}/{}.mo".format(lang, domain)
+        try:
+            _LOG.debug("Opening translations file %r", path)
+            mofile = pkg_resources.resource_stream(__name__, path)
+            _LOG.debug("mofile = %r", mofile)
+            catalog = gettext.GNUTranslations(mofile)
+            catalog.add_fallback(_NullFallback())
+            _LOG.debug("catalog = %r", catalog)
+        except IOError:
+            _LOG.warn("Cannot locate translations for language %r", lang)
+        _catalogs[key] = catalog
+        return catalog
+
+
 class I18N(object):
     """Class with methods responsible for various aspects of translations.
 
+    Instances do not change after construction and can be shared between
+    threads, translations catalogs are loaded once per process.
+
     :param str lang: Output language such as "en", "ru".
     :param str datefmt: Printable date format.
     :param domain: gettext domain (message file name)
@@ -175,19 +214,19 @@ class I18N(object):
         self._datefmt = datefmt
         if self._datefmt is None:
             self._datefmt = DEFAULT_DATE_FORMAT.get(lang, "YMD")
-        self._tr = None
+        self._tr = _catalog(lang, domain)
 
-        # open MO file
-        path = "data/lang/{}/{}.mo".format(lang, domain)
-        try:
-            _LOG.debug("Opening translations file %r", path)
-            mofile = pkg_resources.resource_stream(__name__, path)
-            _LOG.debug("mofile = %r", mofile)
-            self._tr = gettext.GNUTranslations(mofile)
-            self._tr.add_fallback(_NullFallback())
-            _LOG.debug("self._tr = %r", self._tr)
-        except IOError:
-            _LOG.warn("Cannot locate translations for language %r", lang)
+    @property
+    def lang(self):
+        """Output language (`str`).
+        """
+        return self._lang
+
+    @property
+    def datefmt(self):
+        """Printable date format (`str`).
+        """
+        return self._datefmt
 
     def tr(self, text, gender=None):
         """Translates given text , takes into account gender.
@@ -45,18 +45,56 @@ from __future__ import absolute_import, division, print_function
 
 __all__ = ["make_file_locator", "FileLocator", "MultipleMatchesError"]
 
+import bz2
 import errno
 import fnmatch
+import gzip
 import io
 import logging
 import os
 import shutil
+import struct
+import sys
 import tempfile
 import zipfile
 
+try:
+    import lzma
+except ImportError:
+    # Python 2
+    lzma = None
+
+from .mmapfile import MappedFile
 
 _log = logging.getLogger(__name__)
 
+# Default size limit for GEDCOM files decompressed into memory from ZIP
+_ZIP_MEMORY_LIMIT = 64 * 1024 * 1024
+
+# Default size limit for input data spooled into memory, larger data is
+# spooled to temporary file
+_SPOOL_MEMORY_LIMIT = 64 * 1024 * 1024
+
+
+def _bz2_open(fobj):
+    """Returns file object for bzip2-compressed data in a file object.
+    """
+    if sys.version_info[0] < 3:
+        # BZ2File in Python 2 only accepts file names
+        return io.BytesIO(bz2.decompress(fobj.read()))
+    return bz2.BZ2File(fobj)
+
+
+# Magic numbers of compressed files and corresponding decompressors
+_DECOMPRESSORS = [(b"\x1f\x8b", lambda fobj: gzip.GzipFile(fileobj=fobj)),
+                  (b"BZh", _bz2_open)]
+if lzma is not None:
+    _DECOMPRESSORS.append((b"\xfd7zXZ\x00", lzma.LZMAFile))
+
+# Signature and size of the local file header in ZIP archive
+_ZIP_LOCAL_SIGNATURE = b"PK\003\004"
+_ZIP_LOCAL_SIZE = 30
+
 
 class MultipleMatchesError(RuntimeError):
     """Class for exceptions generated when there is more than one file
@@ -314,20 +352,17 @@ class _FSLocator(FileLocator):
             If ``image_path`` is ``None`` then file system is not searched for
             files. If `image_path` is an empty string then current directory is
             searched.
+    :param bool use_mmap: If ``False`` then input file is never
+            memory-mapped.
     """
 
-    def __init__(self, input_file, image_path=None):
+    def __init__(self, input_file, image_path=None, use_mmap=True):
 
         self._input_file = input_file
+        self._use_mmap = use_mmap
         if image_path is None:
             # use parent folder of GEDCOM file for image search
-            if hasattr(input_file, 'read'):
-                # it's probably a file
-                image_path = getattr(input_file, "name", None)
-            else:
-                image_path = input_file
-            if image_path:
-                image_path = os.path.dirname(os.path.abspath(image_path))
+            image_path = _image_dir(input_file)
             _log.debug("_FSLocator: use image folder: %r", image_path)
         self._image_path = image_path
         self._fsearch = _FSFileSearch(image_path)
@@ -339,6 +374,15 @@ class _FSLocator(FileLocator):
         if hasattr(self._input_file, 'read'):
             # it's likely a file
             return self._input_file
+        if self._use_mmap and os.path.isfile(self._input_file) and \
+                os.path.getsize(self._input_file) > 0:
+            # regular files are memory-mapped, fall back to regular file if
+            # that fails (e.g. on some network file systems)
+            try:
+                return MappedFile(self._input_file)
+            except (EnvironmentError, ValueError) as exc:
+                _log.debug("_FSLocator.open_gedcom: failed to map file: %s",
+                           exc)
         return io.open(self._input_file, 'rb')
 
     def open_image(self, name):
@@ -385,6 +429,11 @@ class _ZipLocator(FileLocator):
     """Implementation of FileLocator interface which can find files located
     in zip archive.
 
+    GEDCOM file stored in archive without compression is read directly from
+    the archive. Compressed GEDCOM file is decompressed into memory if its
+    size does not exceed ``memory_limit``, otherwise it is decompressed into
+    temporary file.
+
     :param str input_file: Path of the input ZIP file or file object.
     :param str file_name_pattern: name pattern to search for a GEDCOM file
     :param str image_path: Directory on a filesystem where images are found.
@@ -393,14 +442,24 @@ class _ZipLocator(FileLocator):
             If ``image_path`` is ``None`` then filesystem is not searched
             for files. If ``image_path`` is an empty string then current
             directory is searched.
+    :param int memory_limit: Maximum size of GEDCOM file in bytes which is
+            decompressed into memory.
+    :param bool use_mmap: If ``False`` then uncompressed GEDCOM file is
+            read from archive instead of memory-mapping it.
     """
 
-    def __init__(self, input_file, file_name_pattern, image_path):
+    def __init__(self, input_file, file_name_pattern, image_path,
+                 memory_limit=_ZIP_MEMORY_LIMIT, use_mmap=True):
         self._zip = zipfile.ZipFile(input_file, 'r')
         self._toc = self._zip.namelist()
         self._pattern = file_name_pattern
         self._zipsearch = _ZIPFileSearch(self._toc)
         self._fsearch = _FSFileSearch(image_path)
+        self._memory_limit = memory_limit
+        self._use_mmap = use_mmap
+        self._path = None
+        if not hasattr(input_file, 'read'):
+            self._path = input_file
 
     def open_gedcom(self):
         '''Returns file object for the input GEDCOM file.'''
@@ -414,6 +473,25 @@ class _ZipLocator(FileLocator):
         member = matches[0]
         _log.debug("_ZipLocator.open_gedcom: %r", member)
 
+        info = self._zip.getinfo(member)
+        encrypted = info.flag_bits & 0x1
+        if self._use_mmap and self._path is not None and not encrypted \
+                and info.file_size > 0 \
+                and info.compress_type == zipfile.ZIP_STORED:
+            # uncompressed file can be read directly from archive
+            try:
+                offset = self._data_offset(info)
+                _log.debug("_ZipLocator.open_gedcom: map member at offset %d",
+                           offset)
+                return MappedFile(self._path, offset, info.file_size)
+            except (EnvironmentError, ValueError, zipfile.BadZipfile) as exc:
+                _log.debug("_ZipLocator.open_gedcom: failed to map member: "
+                           "%s", exc)
+
+        if info.file_size <= self._memory_limit:
+            _log.debug("_ZipLocator.open_gedcom: decompress into memory")
+            return io.BytesIO(self._zip.read(member))
+
         # wee need a file on disk which supports seek, open in binary mode
         fobj = tempfile.NamedTemporaryFile("w+b",
                                            suffix=os.path.basename(member))
@@ -422,6 +500,20 @@ class _ZipLocator(FileLocator):
         fobj.seek(0)
         return fobj
 
+    def _data_offset(self, info):
+        """Returns position of member data in archive file.
+
+        :param info: :py:class:`zipfile.ZipInfo` instance.
+        """
+        with io.open(self._path, 'rb') as fobj:
+            fobj.seek(info.header_offset)
+            header = fobj.read(_ZIP_LOCAL_SIZE)
+        if len(header) != _ZIP_LOCAL_SIZE or \
+                header[:4] != _ZIP_LOCAL_SIGNATURE:
+            raise zipfile.BadZipfile("Bad magic number for file header")
+        name_size, extra_size = struct.unpack("<HH", header[26:30])
+        return info.header_offset + _ZIP_LOCAL_SIZE + name_size + extra_size
+
     def open_image(self, name):
         '''Returns file object for the named image file.'''
 
@@ -449,16 +541,25 @@ class _ZipLocator(FileLocator):
             return open(fname.os_path(), 'rb')
 
 
-def make_file_locator(input_file, file_name_pattern, image_path):
+def make_file_locator(input_file, file_name_pattern, image_path,
+                      zip_memory_limit=_ZIP_MEMORY_LIMIT,
+                      spool_memory_limit=_SPOOL_MEMORY_LIMIT,
+                      use_mmap=True):
     """Create and return file locator instance
 
     For a given input file (which can be GEDCOM file or ZIP archive) return
     corresponding file locator object (instance of :py:class:`FileLocator`
     type).
 
+    Input file can be compressed with gzip, bzip2 or xz, it is decompressed
+    and copied to a spool buffer. Input file object which does not support
+    ``seek()`` (e.g. pipe or standard input) is also copied to a spool
+    buffer. Spool buffer is kept in memory if data size does not exceed
+    ``spool_memory_limit`` and is written to a temporary file otherwise.
+
     :param input_file: Path of the input file or file object, can be a ZIP
             archive or a GEDCOM file. If argument is a file object then it
-            must support ``seek()`` method and be open in a binary mode.
+            must be open in a binary mode.
     :param str file_name_pattern: If input file is a ZIP archive then this
             pattern is used to search for a GEDCOM file in archive. Could
             be "\*.ged" for example or can include more specific pattern.
@@ -469,20 +570,158 @@ def make_file_locator(input_file, file_name_pattern, image_path):
             `None` then filesystem is not searched for files. If
             `image_path` is an empty string then current directory is
             searched.
+    :param int zip_memory_limit: Maximum size in bytes of compressed GEDCOM
+            file in ZIP archive which is decompressed into memory, larger
+            files are decompressed into temporary file.
+    :param int spool_memory_limit: Maximum size in bytes of the data spooled
+            into memory.
+    :param bool use_mmap: If ``False`` then input file is never
+            memory-mapped, e.g. because it can be truncated while it is
+            read.
     :return: :py:class:`FileLocator` instance.
     :raises OSError: if file is not found
-    :raises AttributeError: if file object is given as input file but it
-            does not support ``seek()`` method.
     """
 
-    if zipfile.is_zipfile(input_file):
-        return _ZipLocator(input_file, file_name_pattern, image_path)
-    elif hasattr(input_file, 'read'):
-        if not hasattr(input_file, 'seek'):
-            raise AttributeError('File object has no `seek` attribute')
-        input_file.seek(0)
-        return _FSLocator(input_file, image_path)
+    orig_input = input_file
+    if hasattr(input_file, 'read'):
+        input_file = _open_stream(input_file, spool_memory_limit)
     elif os.path.exists(input_file):
-        return _FSLocator(input_file, image_path)
+        with io.open(input_file, 'rb') as fobj:
+            compressed = _decompressor(fobj.read(8)) is not None
+        if compressed:
+            with io.open(input_file, 'rb') as fobj:
+                input_file = _open_stream(fobj, spool_memory_limit)
     else:
         raise OSError(errno.ENOENT, input_file)
+
+    if zipfile.is_zipfile(input_file):
+        return _ZipLocator(input_file, file_name_pattern, image_path,
+                           zip_memory_limit, use_mmap)
+    if hasattr(input_file, 'read'):
+        input_file.seek(0)
+    if image_path is None and input_file is not orig_input:
+        # spooled data has no name, look for images near original file
+        image_path = _image_dir(orig_input)
+    return _FSLocator(input_file, image_path, use_mmap)
+
+
+def _image_dir(input_file):
+    """Returns default folder for image search, which is the folder
+    containing input file.
+
+    :param input_file: Path of the input file or file object.
+    :return: Folder name or ``None`` if input file has no name.
+    """
+    path = input_file
+    if hasattr(input_file, 'read'):
+        # it's probably a file, temporary files may have integer names
+        path = getattr(input_file, "name", None)
+        if not isinstance(path, (type(u""), type(b""))):
+            path = None
+    if path:
+        return os.path.dirname(os.path.abspath(path))
+    return None
+
+
+def _decompressor(data):
+    """Returns decompressor for the data starting with given bytes.
+
+    :param bytes data: First few bytes of the data.
+    :return: Callable which takes file object and returns file object for
+        decompressed data or ``None`` if data is not compressed.
+    """
+    for magic, decompressor in _DECOMPRESSORS:
+        if data.startswith(magic):
+            return decompressor
+    return None
+
+
+def _open_stream(stream, max_size):
+    """Returns seekable file object for the data in a stream.
+
+    Stream is returned as is if it supports ``seek()`` and is not
+    compressed, otherwise decompressed data is copied to a spool buffer.
+
+    :param stream: File object open in binary mode.
+    :param int max_size: Maximum size of the spool buffer kept in memory.
+    :return: File object open in binary mode.
+    """
+    seekable = hasattr(stream, 'seek')
+    if seekable and hasattr(stream, 'seekable'):
+        seekable = stream.seekable()
+
+    if seekable:
+        stream.seek(0)
+        head = stream.read(8)
+        stream.seek(0)
+    else:
+        # read enough bytes to guess compression, stream may return less
+        # data than requested
+        head = b""
+        while len(head) < 8:
+            data = stream.read(8 - len(head))
+            if not data:
+                break
+            head += data
+        stream = _PrefixedStream(head, stream)
+
+    decompressor = _decompressor(head)
+    if decompressor is not None:
+        _log.debug("_open_stream: decompress input stream")
+        stream = decompressor(stream)
+    elif seekable:
+        return stream
+
+    return _spool(stream, max_size)
+
+
+def _spool(stream, max_size):
+    """Copy data from stream into a memory buffer or temporary file.
+
+    :param stream: File object open in binary mode.
+    :param int max_size: Maximum size of the data kept in memory.
+    :return: File object open in binary mode positioned at the beginning.
+    """
+    buffer = io.BytesIO()
+    while True:
+        data = stream.read(1024 * 1024)
+        if not data:
+            buffer.seek(0)
+            return buffer
+        buffer.write(data)
+        if buffer.tell() > max_size:
+            break
+
+    _log.debug("_spool: data is too large, spooling to temporary file")
+    fobj = tempfile.TemporaryFile("w+b")
+    fobj.write(buffer.getvalue())
+    del buffer
+    shutil.copyfileobj(stream, fobj, 1024 * 1024)
+    fobj.seek(0)
+    return fobj
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Read-only stream which returns prefix bytes and then data from other
+    stream.
+
+    :param bytes prefix: Data to return first.
+    :param stream: File object open in binary mode.
+    """
+
+    def __init__(self, prefix, stream):
+        io.RawIOBase.__init__(self)
+        self._prefix = prefix
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            data = self._prefix[:len(buffer)]
+            self._prefix = self._prefix[len(data):]
+        else:
+            data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
@@ -0,0 +1,368 @@
+"""Module with intermediate representation (IR) of output document.
+
+Producing a document consists of extraction, which navigates GEDCOM records
+and formats (and translates) names, dates and events, and rendering of that
+data by a specific writer. IR is the data passed from extraction to
+rendering: sections, person data (attributes, families, events, notes,
+image and ancestors shown in ancestor tree) and statistics. It is produced
+by :py:class:`IRWriter` which is a regular writer, and it can be rendered
+by any other writer with :py:class:`IRReader` without GEDCOM file.
+
+IR is stored as a sequence of lines, each line is a JSON array. First line
+is a header with format version and translation options, other lines are
+items whose first element is item type:
+
+- ``["section", level, ref_id, title, newpage]``
+- ``["image", hash, data]`` -- image data encoded with base64, each image is
+  stored once and is referenced by its hash from person items;
+- ``["person", tree, image, attributes, families, events, notes]`` -- tree
+  is ancestor tree, nested list ``[xref_id, sex, first, surname, maiden,
+  mother, father]``, parents are only present for persons with parents;
+- ``["name_stat", n_total, n_females, n_males]``
+- ``["name_freq", freq_table]``
+- ``["toc"]``
+- ``["end"]``
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__all__ = ["IRWriter", "IRReader", "IRPerson"]
+
+import base64
+from collections import namedtuple
+import hashlib
+import json
+import logging
+
+from ged4py import model
+from . import graph
+from . import writer
+
+
+_log = logging.getLogger(__name__)
+
+_FORMAT = "ged2doc-ir"
+_VERSION = 1
+
+_Name = namedtuple("_Name", "first surname maiden")
+
+
+class IRPerson(object):
+    """Person data stored in IR.
+
+    This class provides the subset of :py:class:`ged4py.model.Individual`
+    interface which is used by writers to render person section and by
+    :py:class:`ged2doc.plotter.Plotter` to plot ancestor tree.
+
+    :param str xref_id: Person reference ID.
+    :param str sex: Person sex, "F", "M" or "U".
+    :param name: Object with ``first``, ``surname`` and ``maiden``
+        attributes.
+    :param IRPerson mother: Mother or ``None``.
+    :param IRPerson father: Father or ``None``.
+    """
+
+    __slots__ = ["xref_id", "sex", "name", "mother", "father"]
+
+    def __init__(self, xref_id, sex, name, mother=None, father=None):
+        self.xref_id = xref_id
+        self.sex = sex
+        self.name = name
+        self.mother = mother
+        self.father = father
+
+
+def _dump_tree(person, generations, parents, names):
+    """Returns ancestor tree of a person as nested lists.
+
+    ``parents`` is a function returning (mother, father) of a person,
+    ``names`` is :py:class:`ged2doc.name.NameCache` which is also used for
+    ancestor trees in documents.
+    """
+    if person is None:
+        return None
+    name = names.get(person)
+    tree = [person.xref_id, person.sex, name.first, name.surname,
+            name.maiden]
+    if generations > 1:
+        mother, father = parents(person)
+        if mother or father:
+            tree += [_dump_tree(mother, generations - 1, parents, names),
+                     _dump_tree(father, generations - 1, parents, names)]
+    return tree
+
+
+def _load_tree(tree):
+    """Makes :py:class:`IRPerson` from nested lists.
+    """
+    if tree is None:
+        return None
+    xref_id, sex, first, surname, maiden = tree[:5]
+    mother = father = None
+    if len(tree) > 5:
+        mother, father = _load_tree(tree[5]), _load_tree(tree[6])
+    return IRPerson(xref_id, sex, _Name(first, surname, maiden),
+                    mother, father)
+
+
+class IRWriter(writer.Writer):
+    """Writer which produces intermediate representation of a document.
+
+    IR is language-specific, all text is translated and formatted using
+    ``tr`` and name format options. Ancestor trees are stored for
+    ``tree_width`` generations, IR can be rendered with the same or
+    smaller tree width.
+
+    :param flocator: Instance of :py:class:`ged2doc.input.FileLocator`
+    :param str output: Name for the output file or file object
+    :param tr: Instance of :py:class:`ged2doc.i18n.I18N` class
+    :param str encoding: GEDCOM file encoding, if ``None`` then encoding is
+        determined from file itself
+    :param str encoding_errors: Controls error handling behavior during string
+        decoding, one of "strict" (default), "ignore", or "replace".
+    :param sort_order: Determines ordering of person in output file, one of
+        the constants defined in :py:mod:`ged4py.model` module.
+    :param int name_fmt: Bit mask with flags from :py:mod:`ged2doc.name`
+    :param bool make_images: If ``True`` (default) then store images for
+        persons.
+    :param bool make_stat: If ``True`` (default) then store statistics
+        section.
+    :param bool make_toc: If ``True`` (default) then store Table of
+        Contents.
+    :param bool events_without_dates: If ``True`` (default) then store events
+        that have no associated dates.
+    :param int tree_width: Number of generations in ancestor tree.
+    :param int record_cache_size: Maximum number of parsed GEDCOM records
+        kept in memory, ``None`` (default) means unlimited.
+    :param str cache_dir: Directory for snapshots of parsed GEDCOM data,
+        ``None`` (default) disables snapshots.
+    :param bool streaming: If ``True`` then use two-pass mode which does
+        not keep all parsed records in memory.
+    :param int parse_jobs: Number of processes used for parsing GEDCOM
+        file.
+    :param bool projection: If ``True`` then skip parsing of GEDCOM data
+        which is not used in output document.
+    :param str root: Reference ID of a person, if given then only persons
+        related to this person are included.
+    :param int radius: Maximum number of relationship steps from root
+        person, ``None`` (default) means no limit.
+    :param str relation: Relations which are followed from root person,
+        one of the constants defined in :py:mod:`ged2doc.graph` module.
+    :param progress: Callable which is called with the number of rendered
+        persons and total number of persons after each person.
+    :param image_limiter: Context manager which is held while image is
+        decoded, not used by this writer because images are stored
+        without decoding.
+    """
+
+    def __init__(self, flocator, output, tr, encoding=None,
+                 encoding_errors="strict",
+                 sort_order=model.ORDER_SURNAME_GIVEN, name_fmt=0,
+                 make_images=True, make_stat=True, make_toc=True,
+                 events_without_dates=True, tree_width=4,
+                 record_cache_size=None, cache_dir=None, streaming=False,
+                 parse_jobs=1, projection=False, root=None, radius=None,
+                 relation=graph.RELATION_ALL,
+                 progress=None, image_limiter=None):
+
+        writer.Writer.__init__(self, flocator, tr, encoding=encoding,
+                               encoding_errors=encoding_errors,
+                               sort_order=sort_order, name_fmt=name_fmt,
+                               make_images=make_images, make_stat=make_stat,
+                               make_toc=make_toc,
+                               events_without_dates=events_without_dates,
+                               record_cache_size=record_cache_size,
+                               cache_dir=cache_dir,
+                               streaming=streaming,
+                               parse_jobs=parse_jobs,
+                               projection=projection,
+                               root=root, radius=radius,
+                               relation=relation, progress=progress,
+                               image_limiter=image_limiter)
+
+        self._tree_width = tree_width
+        self._images = set()
+
+        if hasattr(output, 'write'):
+            self._output = output
+            self._close = False
+        else:
+            self._output = open(output, 'wb')
+            self._close = True
+
+    def _item(self, *item):
+        """Write one IR item.
+        """
+        line = json.dumps(item, ensure_ascii=False, separators=(',', ':'))
+        self._output.write(line.encode("utf_8") + b"\n")
+
+    def _render_prolog(self):
+        """Write IR header.
+        """
+        from . import __version__
+        header = dict(format=_FORMAT, version=_VERSION,
+                      generator="ged2doc " + __version__,
+                      language=self._tr.lang, date_format=self._tr.datefmt,
+                      tree_width=self._tree_width)
+        self._output.write(json.dumps(header).encode("utf_8") + b"\n")
+
+    def _render_section(self, level, ref_id, title, newpage=False):
+        """Store new section.
+
+        :param int level: Section level (1, 2, 3, etc.).
+        :param str ref_id: Unique section identifier.
+        :param str title: Printable section name.
+        :param bool newpage: If ``True`` then section starts on a new page.
+        """
+        self._item("section", level, ref_id, title, newpage)
+
+    def _render_person(self, person, image_data, attributes, families,
+                       events, notes):
+        """Store person information.
+
+        :param person: :py:class:`ged4py.Individual` instance
+        :param bytes image_data: Either `None` or binary image data (typically
+                content of JPEG image)
+        :param list attributes: List of (attr_name, text) tuples, may be empty.
+        :param list families: List of strings (possibly empty).
+        :param list events: List of (date, text) tuples, may be empty.
+        :param list notes: List of strings.
+        """
+        image = None
+        if image_data:
+            image = hashlib.sha1(image_data).hexdigest()
+            if image not in self._images:
+                self._images.add(image)
+                self._item("image", image,
+                           base64.b64encode(image_data).decode('ascii'))
+        tree = _dump_tree(person, self._tree_width, self._parents,
+                          self._name_cache())
+        self._item("person", tree, image, attributes, families, events,
+                   notes)
+
+    def _render_name_stat(self, n_total, n_females, n_males):
+        """Store summary table.
+
+        :param int n_total: Total number of individuals.
+        :param int n_females: Number of female individuals.
+        :param int n_males: Number of male individuals.
+        """
+        self._item("name_stat", n_total, n_females, n_males)
+
+    def _render_name_freq(self, freq_table):
+        """Store name statistics table.
+
+        :param freq_table: list of (name, count) tuples.
+        """
+        self._item("name_freq", freq_table)
+
+    def _render_toc(self):
+        """Store table of contents.
+        """
+        self._item("toc")
+
+    def _finalize(self):
+        """Finalize output.
+        """
+        self._item("end")
+        if self._close:
+            self._output.close()
+
+
+class IRReader(object):
+    """Class which renders IR produced by :py:class:`IRWriter`.
+
+    Header of IR is read when instance is created, translation options
+    are available as attributes so that writer can be made with matching
+    :py:class:`ged2doc.i18n.I18N` instance.
+
+    :param input: Name of the IR file or file object opened in binary mode,
+        file opened by this class is closed by :py:meth:`render`.
+    :raises ValueError: If file is not in IR format or has unsupported
+        version.
+
+    :ivar str language: Language of the IR.
+    :ivar str date_format: Date format of the IR.
+    :ivar int tree_width: Number of generations in ancestor trees.
+    """
+
+    def __init__(self, input):
+        if hasattr(input, 'read'):
+            self._input = input
+            self._close = False
+        else:
+            self._input = open(input, 'rb')
+            self._close = True
+        try:
+            self._read_header()
+        except Exception:
+            self._finalize()
+            raise
+
+    def _read_header(self):
+        """Read IR header and set translation options.
+        """
+        try:
+            header = json.loads(self._input.readline().decode("utf_8"))
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("format") != _FORMAT:
+            raise ValueError("Input file is not in ged2doc IR format")
+        if header.get("version") != _VERSION:
+            raise ValueError("Unsupported IR version: {0}".format(
+                header.get("version")))
+        self.language = header["language"]
+        self.date_format = header["date_format"]
+        self.tree_width = header["tree_width"]
+
+    def render(self, writer):
+        """Produce output document from IR.
+
+        :param writer: Instance of :py:class:`ged2doc.writer.Writer`
+            sub-class, e.g. :py:class:`ged2doc.html_writer.HtmlWriter`.
+        :raises ValueError: If IR is incomplete or has unknown items.
+        """
+        try:
+            self._render_items(writer)
+        finally:
+            self._finalize()
+        writer._finalize()
+
+    def _render_items(self, writer):
+        """Pass IR items to writer, see :py:meth:`render`.
+        """
+        writer._render_prolog()
+        images = {}
+        complete = False
+        for line in self._input:
+            item = json.loads(line.decode("utf_8"))
+            kind = item[0]
+            if kind == "section":
+                writer._render_section(*item[1:])
+            elif kind == "image":
+                images[item[1]] = base64.b64decode(item[2])
+            elif kind == "person":
+                tree, image, attributes, families, events, notes = item[1:]
+                person = _load_tree(tree)
+                _log.debug('Render IR person: %s', person.xref_id)
+                writer._render_person(person, images.get(image), attributes,
+                                      families, events, notes)
+            elif kind == "name_stat":
+                writer._render_name_stat(*item[1:])
+            elif kind == "name_freq":
+                writer._render_name_freq(item[1])
+            elif kind == "toc":
+                writer._render_toc()
+            elif kind == "end":
+                complete = True
+                break
+            else:
+                raise ValueError("Unknown IR item: {0!r}".format(kind))
+        if not complete:
+            raise ValueError("IR file is incomplete")
+
+    def _finalize(self):
+        """Close input file if it was opened by this instance.
+        """
+        if self._close:
+            self._input.close()
@@ -0,0 +1,162 @@
+"""Module with memory-mapped file implementation.
+
+GEDCOM reader accesses input file mostly by seeking to record positions and
+reading a few lines from there. With regular buffered files every such
+access means a system call and a copy of the buffer, memory-mapped file
+avoids both and lets the OS page cache do the work.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__all__ = ["MappedFile"]
+
+import io
+import logging
+import mmap
+import os
+import re
+
+
+_log = logging.getLogger(__name__)
+
+# line terminators, same as supported by ged4py
+_re_eol = re.compile(br"\r\n|\r|\n")
+
+
+class MappedFile(io.RawIOBase):
+    """Read-only seekable file object backed by a memory map.
+
+    In addition to the standard methods of binary files this class
+    implements :py:meth:`readline` which understands all line terminators
+    used by GEDCOM files (LF, CR-LF, CR), so it does not need to be wrapped
+    into :py:class:`ged4py.detail.io.BinaryFileCR`.
+
+    On creation the OS is advised that the file is going to be read
+    sequentially (which is how GEDCOM index is built) and asked to start
+    readahead, :py:meth:`advise` can be used to change that later.
+
+    File object can also provide a view of a part of a file (e.g. a member
+    stored without compression in ZIP archive), in that case all positions
+    are relative to the beginning of that part.
+
+    Instances can be pickled (e.g. to pass them to worker processes), on
+    unpickling the same part of a file is mapped again, current position
+    is not preserved.
+
+    :param str path: Name of the file, file must be a regular non-empty file.
+    :param int offset: Position in a file where the view starts.
+    :param int size: Size of the view, ``None`` (default) means until the
+        end of a file.
+    :raises EnvironmentError: If file cannot be open or mapped.
+    """
+
+    def __init__(self, path, offset=0, size=None):
+        io.RawIOBase.__init__(self)
+        self.name = path
+        self._offset = offset
+        with io.open(path, 'rb') as fobj:
+            if size is None:
+                size = os.fstat(fobj.fileno()).st_size - offset
+            # mapping has to start at a multiple of allocation granularity
+            map_offset = offset - offset % mmap.ALLOCATIONGRANULARITY
+            self._start = offset - map_offset
+            self._end = self._start + size
+            self._size = size
+            self._map = mmap.mmap(fobj.fileno(), self._end,
+                                  access=mmap.ACCESS_READ, offset=map_offset)
+            if hasattr(os, "posix_fadvise"):
+                try:
+                    os.posix_fadvise(fobj.fileno(), offset, size,
+                                     os.POSIX_FADV_SEQUENTIAL)
+                    os.posix_fadvise(fobj.fileno(), offset, size,
+                                     os.POSIX_FADV_WILLNEED)
+                except OSError as exc:
+                    _log.debug("posix_fadvise failed: %s", exc)
+        self._pos = self._start
+        self.advise(sequential=True)
+
+    def advise(self, sequential):
+        """Give OS a hint about expected access pattern.
+
+        Does nothing on platforms which do not support ``madvise()``.
+
+        :param bool sequential: If ``True`` then file is going to be read
+            sequentially, otherwise access is random (e.g. following
+            pointers between records).
+        """
+        if not hasattr(self._map, "madvise"):
+            return
+        try:
+            if sequential:
+                self._map.madvise(mmap.MADV_SEQUENTIAL)
+                self._map.madvise(mmap.MADV_WILLNEED)
+            else:
+                self._map.madvise(mmap.MADV_NORMAL)
+        except (OSError, AttributeError) as exc:
+            _log.debug("madvise failed: %s", exc)
+
+    def __reduce__(self):
+        return (MappedFile, (self.name, self._offset, self._size))
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        if not self.closed:
+            self._map.close()
+        io.RawIOBase.close(self)
+
+    def tell(self):
+        return self._pos - self._start
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            pos = self._start + offset
+        elif whence == os.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == os.SEEK_END:
+            pos = self._end + offset
+        else:
+            raise ValueError("invalid whence value: {}".format(whence))
+        if pos < self._start:
+            raise ValueError("negative seek position {}".format(
+                pos - self._start))
+        self._pos = pos
+        return pos - self._start
+
+    def read(self, size=-1):
+        pos = min(self._pos, self._end)
+        end = self._end
+        if size is not None and size >= 0:
+            end = min(pos + size, end)
+        self._pos = end
+        return self._map[pos:end]
+
+    def readall(self):
+        return self.read()
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readline(self, limit=-1):
+        """Read one line including line terminator.
+
+        Line terminator can be LF, CR-LF or CR.
+
+        :param int limit: If non-negative then at most ``limit`` bytes are
+            read.
+        """
+        pos = min(self._pos, self._end)
+        end = self._end
+        if limit is not None and limit >= 0:
+            end = min(pos + limit, end)
+        match = _re_eol.search(self._map, pos, end)
+        if match is not None:
+            end = match.end()
+        self._pos = end
+        return self._map[pos:end]
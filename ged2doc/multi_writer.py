@@ -0,0 +1,246 @@
+"""Module which produces several output documents from one conversion.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__all__ = ["MultiWriter"]
+
+import logging
+
+from ged4py import model
+from . import graph
+from . import writer
+
+
+_log = logging.getLogger(__name__)
+
+
+class MultiWriter(writer.Writer):
+    """Writer which passes extracted data to several other writers.
+
+    GEDCOM file is parsed once, and data for every person (formatted and
+    translated attributes, events, image data) is extracted once and then
+    rendered by each of the writers, e.g. to produce HTML and ODT documents
+    at the same time. Only rendering methods of the writers are used, so
+    options that affect extraction (encoding, name format, sort order,
+    etc.) have to be given to this class.
+
+    Writers can use different translations (languages or date formats),
+    in that case language-dependent data is extracted separately for each
+    translation, while parsing, image data and plotted ancestor trees are
+    shared by all writers. Writers with the same language and date format
+    share all extracted data.
+
+    Fragments (and hence incremental mode and parallel rendering) are
+    supported if all writers support them.
+
+    :param flocator: Instance of :py:class:`ged2doc.input.FileLocator`
+    :param list writers: List of :py:class:`~ged2doc.writer.Writer`
+        instances, e.g. :py:class:`ged2doc.html_writer.HtmlWriter`.
+    :param str encoding: GEDCOM file encoding, if ``None`` then encoding is
+        determined from file itself
+    :param str encoding_errors: Controls error handling behavior during string
+        decoding, one of "strict" (default), "ignore", or "replace".
+    :param sort_order: Determines ordering of person in output file, one of
+        the constants defined in :py:mod:`ged4py.model` module.
+    :param int name_fmt: Bit mask with flags from :py:mod:`ged2doc.name`
+    :param bool make_images: If ``True`` (default) then generate images for
+        persons.
+    :param bool make_stat: If ``True`` (default) then generate statistics
+        section.
+    :param bool make_toc: If ``True`` (default) then generate Table of
+        Contents.
+    :param bool events_without_dates: If ``True`` (default) then show events
+        that have no associated dates.
+    :param int record_cache_size: Maximum number of parsed GEDCOM records
+        kept in memory, ``None`` (default) means unlimited.
+    :param str cache_dir: Directory for snapshots of parsed GEDCOM data,
+        ``None`` (default) disables snapshots.
+    :param bool streaming: If ``True`` then use two-pass mode which does
+        not keep all parsed records in memory.
+    :param int parse_jobs: Number of processes used for parsing GEDCOM
+        file.
+    :param bool projection: If ``True`` then skip parsing of GEDCOM data
+        which is not used in output document.
+    :param bool incremental: If ``True`` then re-use person sections
+        rendered by previous conversion, requires ``cache_dir``.
+    :param int render_jobs: Number of processes used for rendering person
+        sections.
+    :param str root: Reference ID of a person, if given then only persons
+        related to this person are included.
+    :param int radius: Maximum number of relationship steps from root
+        person, ``None`` (default) means no limit.
+    :param str relation: Relations which are followed from root person,
+        one of the constants defined in :py:mod:`ged2doc.graph` module.
+    :param progress: Callable which is called with the number of rendered
+        persons and total number of persons after each person.
+    :param image_limiter: Context manager which is held while image is
+        decoded, it is given to writers which do not have their own
+        limiter.
+    """
+
+    def __init__(self, flocator, writers, encoding=None,
+                 encoding_errors="strict",
+                 sort_order=model.ORDER_SURNAME_GIVEN, name_fmt=0,
+                 make_images=True, make_stat=True, make_toc=True,
+                 events_without_dates=True, record_cache_size=None,
+                 cache_dir=None, streaming=False, parse_jobs=1,
+                 projection=False, incremental=False, render_jobs=1,
+                 root=None, radius=None, relation=graph.RELATION_ALL,
+                 progress=None, image_limiter=None):
+
+        writers = list(writers)
+        writer.Writer.__init__(self, flocator, writers[0]._tr,
+                               encoding=encoding,
+                               encoding_errors=encoding_errors,
+                               sort_order=sort_order, name_fmt=name_fmt,
+                               make_images=make_images, make_stat=make_stat,
+                               make_toc=make_toc,
+                               events_without_dates=events_without_dates,
+                               record_cache_size=record_cache_size,
+                               cache_dir=cache_dir,
+                               streaming=streaming,
+                               parse_jobs=parse_jobs,
+                               projection=projection,
+                               incremental=incremental,
+                               render_jobs=render_jobs,
+                               root=root, radius=radius,
+                               relation=relation, progress=progress,
+                               image_limiter=image_limiter)
+
+        self._writers = writers
+        self._fragments_supported = all(w._fragments_supported
+                                        for w in self._writers)
+
+        # list of (tr, writers) for each translation
+        self._translations = []
+        groups = {}
+        for w in writers:
+            key = (w._tr.lang, w._tr.datefmt)
+            if key not in groups:
+                groups[key] = []
+                self._translations.append((w._tr, groups[key]))
+            groups[key].append(w)
+
+        self._tree_cache = {}
+        for w in writers:
+            w._tree_cache = self._tree_cache
+            if w._image_limiter is None:
+                w._image_limiter = image_limiter
+
+    def _each_translation(self):
+        """Generator which switches to each translation in turn.
+
+        Translation used for extraction and the list of writers which
+        receive extracted data are replaced for each iteration.
+        """
+        writers = self._writers
+        try:
+            for tr, group in self._translations:
+                self._tr, self._writers = tr, group
+                yield tr
+        finally:
+            self._tr, self._writers = self._translations[0][0], writers
+
+    def _use_indexes(self, graph, names, events):
+        writer.Writer._use_indexes(self, graph, names, events)
+        # ancestor trees are plotted by writers
+        for w in self._writers:
+            w._use_indexes(graph, names, events)
+
+    def _related_offsets(self, reader):
+        offsets = writer.Writer._related_offsets(self, reader)
+        # ancestor trees are plotted by writers
+        for w in self._writers:
+            w._subset = self._subset
+        return offsets
+
+    def _write_header(self):
+        for _ in self._each_translation():
+            writer.Writer._write_header(self)
+
+    def _write_trailer(self, stats):
+        for _ in self._each_translation():
+            writer.Writer._write_trailer(self, stats)
+
+    def _render_person_section(self, person, image_data=None):
+        """Produce output for one person in all documents.
+
+        :param person: INDI record (:py:class:`ged4py.model.Individual`)
+        :param bytes image_data: Person image data, if ``None`` then it is
+            loaded by this method.
+        """
+        if image_data is None:
+            # empty data means no image, it is loaded only once
+            image_data = self._make_main_image(person) or b""
+        try:
+            for _ in self._each_translation():
+                writer.Writer._render_person_section(self, person,
+                                                     image_data)
+        finally:
+            # trees are only re-used for the same person
+            self._tree_cache.clear()
+
+    def _fragment_options(self):
+        """Returns list of options which affect rendered person sections.
+        """
+        options = writer.Writer._fragment_options(self)
+        for w in self._writers:
+            options += [type(w).__name__] + w._fragment_options()
+        return options
+
+    def _fragment_generations(self):
+        """Returns number of ancestor generations rendered for each person.
+        """
+        return max(w._fragment_generations() for w in self._writers)
+
+    def _begin_fragment(self):
+        """Start collecting output of each writer into a fragment.
+        """
+        for w in self._writers:
+            w._begin_fragment()
+
+    def _end_fragment(self):
+        """Stop collecting output into a fragment and return fragment.
+
+        :return: List of fragments returned by each writer.
+        """
+        return [w._end_fragment() for w in self._writers]
+
+    def _replay_fragment(self, data):
+        """Add previously collected fragment to output documents.
+
+        :param data: Fragment data returned from :py:meth:`_end_fragment`.
+        """
+        for w, fragment in zip(self._writers, data):
+            w._replay_fragment(fragment)
+
+    def _render_prolog(self):
+        for w in self._writers:
+            w._render_prolog()
+
+    def _render_section(self, level, ref_id, title, newpage=False):
+        for w in self._writers:
+            w._render_section(level, ref_id, title, newpage)
+
+    def _render_person(self, person, image_data, attributes, families,
+                       events, notes):
+        for w in self._writers:
+            w._render_person(person, image_data, attributes, families,
+                             events, notes)
+
+    def _render_name_stat(self, n_total, n_females, n_males):
+        for w in self._writers:
+            w._render_name_stat(n_total, n_females, n_males)
+
+    def _render_name_freq(self, freq_table):
+        for w in self._writers:
+            w._render_name_freq(freq_table)
+
+    def _render_toc(self):
+        for w in self._writers:
+            w._render_toc()
+
+    def _finalize(self):
+        for w in self._writers:
+            w._finalize()
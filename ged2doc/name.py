@@ -3,6 +3,8 @@
 
 from __future__ import absolute_import, division, print_function
 
+from . import utils
+
 # Names can be rendered in different formats
 FMT_SURNAME_FIRST = 0x1  # Smith Jane
 FMT_COMMA = 0x2  # Smith, Jane -- only if surname is first
@@ -42,3 +44,103 @@ def name_fmt(name, fmt=0x0):
             return name.given + ' ' + surname
         else:
             return name.given or surname
+
+
+class NameCache(object):
+    """Cache of formatted person names.
+
+    Accessing ``person.name`` of ``ged4py`` record parses its NAME records
+    every time, and the same person is usually referenced from many other
+    persons (as a parent, spouse, or child) and shown in many ancestor
+    trees. This class keeps parsed names, formatted names and encoded
+    references (see :py:func:`ged2doc.utils.embed_ref`) keyed by person
+    reference ID and format, so each is made only once. Cache should only
+    be used while records do not change, e.g. for one conversion.
+    """
+
+    def __init__(self):
+        # maps xref_id to parsed name
+        self._names = {}
+        # maps (xref_id, kind) to string, kind is a format mask or one of
+        # the strings for other representations
+        self._cache = {}
+
+    def __contains__(self, xref_id):
+        """Returns ``True`` if name of a person is already in a cache.
+
+        :param str xref_id: Person reference ID.
+        """
+        return xref_id in self._names
+
+    def get(self, person):
+        """Returns parsed name of a person.
+
+        :param person: :py:class:`ged4py.model.Individual` instance.
+        :return: :py:class:`ged4py.model.Name` instance.
+        """
+        try:
+            return self._names[person.xref_id]
+        except KeyError:
+            name = self._names[person.xref_id] = person.name
+            return name
+
+    def name(self, person, fmt=0x0):
+        """Returns formatted full name of a person.
+
+        :param person: :py:class:`ged4py.model.Individual` instance.
+        :param int fmt: Bitmask of FMT_* flags.
+        """
+        key = (person.xref_id, fmt)
+        try:
+            return self._cache[key]
+        except KeyError:
+            name = self._cache[key] = name_fmt(self.get(person), fmt)
+            return name
+
+    def first(self, person):
+        """Returns first name of a person.
+
+        :param person: :py:class:`ged4py.model.Individual` instance.
+        """
+        key = (person.xref_id, "first")
+        try:
+            return self._cache[key]
+        except KeyError:
+            name = self._cache[key] = self.get(person).first
+            return name
+
+    def short(self, person, maiden=False):
+        """Returns first name and surname of a person, used in ancestor
+        trees.
+
+        :param person: :py:class:`ged4py.model.Individual` instance.
+        :param bool maiden: If ``True`` then use maiden name instead of
+            surname if maiden name is known.
+        """
+        key = (person.xref_id, "maiden" if maiden else "short")
+        try:
+            return self._cache[key]
+        except KeyError:
+            name = self.get(person)
+            surname = name.surname
+            if maiden:
+                surname = name.maiden or surname
+            short = (name.first or '') + ' ' + (surname or '')
+            self._cache[key] = short
+            return short
+
+    def ref(self, person, fmt=0x0, first=False):
+        """Returns encoded reference to a person.
+
+        :param person: :py:class:`ged4py.model.Individual` instance.
+        :param int fmt: Bitmask of FMT_* flags.
+        :param bool first: If ``True`` then reference shows first name,
+            otherwise formatted full name.
+        """
+        key = (person.xref_id, "ref.first" if first else ("ref", fmt))
+        try:
+            return self._cache[key]
+        except KeyError:
+            name = self.first(person) if first else self.name(person, fmt)
+            ref = self._cache[key] = utils.embed_ref(person.xref_id, name)
+            return ref
@@ -12,10 +12,12 @@ import logging
 from PIL import Image
 
 from ged4py import model
-from .plotter import Plotter
 from .size import Size
 from . import utils
+from . import graph
 from . import writer
+from odf.element import Element
+from odf.namespaces import nsdict
 from odf.opendocument import OpenDocumentText
 from odf import text, style, draw, table
 
@@ -23,6 +25,26 @@ from odf import text, style, draw, table
 _log = logging.getLogger(__name__)
 
 
+def _register_namespaces():
+    """Register namespaces of ODT document elements with odfpy.
+
+    odfpy keeps namespaces of all created elements in a dictionary shared
+    by all documents and adds declarations for all of them to each
+    document. Registering namespaces in advance means that dictionary does
+    not change while documents are made in several threads, and output
+    does not depend on documents made earlier.
+    """
+    # same order as they are added when first document is made
+    prefixes = ['office', 'text', 'meta', 'style', 'fo', 'table', 'draw',
+                'svg', 'xlink', 'manifest', 'chart', 'presentation']
+    namespaces = dict((prefix, ns) for ns, prefix in nsdict.items())
+    for prefix in prefixes:
+        Element.namespaces.setdefault(namespaces[prefix], prefix)
+
+
+_register_namespaces()
+
+
 # page layout, size and margins
 PageLayout = namedtuple("PageLayout", "width height left right top bottom")
 
@@ -71,6 +93,31 @@ class OdtWriter(writer.Writer):
     :param Size image_height: Size of the images.
     :param int tree_width: Number of generations in ancestor tree.
     :param int first_page: Number of the first generated page.
+    :param int record_cache_size: Maximum number of parsed GEDCOM records
+        kept in memory, ``None`` (default) means unlimited.
+    :param str cache_dir: Directory for snapshots of parsed GEDCOM data,
+        ``None`` (default) disables snapshots.
+    :param bool streaming: If ``True`` then use two-pass mode which does
+        not keep all parsed records in memory.
+    :param int parse_jobs: Number of processes used for parsing GEDCOM
+        file.
+    :param bool projection: If ``True`` then skip parsing of GEDCOM data
+        which is not used in output document.
+    :param bool incremental: If ``True`` then re-use person sections
+        rendered in previous conversion, requires ``cache_dir``.
+    :param int render_jobs: Number of processes used for rendering person
+        sections.
+    :param str root: Reference ID of a person, if given then only persons
+        related to this person are included.
+    :param int radius: Maximum number of relationship steps from root
+        person, ``None`` (default) means no limit.
+    :param str relation: Relations which are followed from root person,
+        one of the constants defined in :py:mod:`ged2doc.graph` module.
+    :param progress: Callable which is called with the number of rendered
+        persons and total number of persons after each person.
+    :param image_limiter: Context manager which is held while image is
+        decoded, not used by this writer because images are embedded
+        without decoding.
     """
 
     def __init__(self, flocator, output, tr, encoding=None,
@@ -82,20 +129,36 @@ class OdtWriter(writer.Writer):
                  margin_left="0.5in", margin_right="0.5in",
                  margin_top="0.5in", margin_bottom="0.25in",
                  image_width="2in", image_height="2in",
-                 tree_width=4, first_page=1):
+                 tree_width=4, first_page=1, record_cache_size=None,
+                 cache_dir=None, streaming=False, parse_jobs=1,
+                 projection=False, incremental=False, render_jobs=1,
+                 root=None, radius=None, relation=graph.RELATION_ALL,
+                 progress=None, image_limiter=None):
 
         writer.Writer.__init__(self, flocator, tr, encoding=encoding,
                                encoding_errors=encoding_errors,
                                sort_order=sort_order, name_fmt=name_fmt,
                                make_images=make_images, make_stat=make_stat,
                                make_toc=make_toc,
-                               events_without_dates=events_without_dates)
+                               events_without_dates=events_without_dates,
+                               record_cache_size=record_cache_size,
+                               cache_dir=cache_dir,
+                               streaming=streaming,
+                               parse_jobs=parse_jobs,
+                               projection=projection,
+                               incremental=incremental,
+                               render_jobs=render_jobs,
+                               root=root, radius=radius,
+                               relation=relation, progress=progress,
+                               image_limiter=image_limiter)
 
         self._output = output
         self._image_width = Size(image_width)
         self._image_height = Size(image_height)
         self._tree_width = tree_width
         self._first_page = first_page
+        # list of element descriptions when collecting a fragment
+        self._fragment = None
 
         doc = OpenDocumentText()
 
@@ -229,6 +292,93 @@ class OdtWriter(writer.Writer):
 
         return styles
 
+    _fragments_supported = True
+
+    def _fragment_options(self):
+        """Returns list of options which affect rendered person sections.
+        """
+        return writer.Writer._fragment_options(self) + [
+            self.layout, self._image_width, self._image_height,
+            self._tree_width]
+
+    def _fragment_generations(self):
+        """Returns number of ancestor generations rendered for each person.
+        """
+        return self._tree_width
+
+    def _begin_fragment(self):
+        """Start collecting element descriptions into a fragment.
+        """
+        self._fragment = []
+
+    def _end_fragment(self):
+        """Stop collecting element descriptions and return fragment.
+
+        :return: List of element descriptions, see :py:meth:`_add_element`.
+        """
+        data, self._fragment = self._fragment, None
+        return data
+
+    def _replay_fragment(self, data):
+        """Add previously collected fragment to output document.
+
+        :param data: Fragment data returned from :py:meth:`_end_fragment`.
+        """
+        for item in data:
+            self._add_element(*item)
+
+    def _emit(self, *item):
+        """Add element to a document or to a fragment being collected.
+
+        ODF elements are linked to the document and cannot be pickled, so
+        person sections are described by plain tuples which are turned into
+        elements by :py:meth:`_add_element`.
+        """
+        if self._fragment is not None:
+            self._fragment.append(item)
+        else:
+            self._add_element(*item)
+
+    def _add_element(self, kind, *args):
+        """Make element from its description and add it to a document.
+
+        Following descriptions are supported:
+
+        - ``("H", title, level, style)`` - heading;
+        - ``("P", text, style)`` - paragraph, style can be ``None``;
+        - ``("IMG", filename, mime, data, width, height)`` - paragraph with
+          a person image;
+        - ``("TREE", filename, mime, data, width, height)`` - centered
+          paragraph with ancestor tree picture.
+
+        Styles are given as keys in ``self.styles``.
+        """
+        if kind == "H":
+            title, level, stylekey = args
+            self.doc.text.addElement(text.H(
+                text=title, outlinelevel=level,
+                stylename=self.styles.get(stylekey)))
+        elif kind == "P":
+            value, stylekey = args
+            if stylekey is None:
+                para = text.P(text=value)
+            else:
+                para = text.P(text=value, stylename=self.styles[stylekey])
+            self.doc.text.addElement(para)
+        else:
+            filename, mime, data, width, height = args
+            frame = draw.Frame(width=width, height=height)
+            imgref = self.doc.addPicture(filename, mime, data)
+            frame.addElement(draw.Image(href=imgref))
+            if kind == "IMG":
+                p = text.P()
+                frame.setAttribute('stylename', self.styles['img'])
+                frame.setAttribute('anchortype', 'paragraph')
+            else:
+                p = text.P(stylename=self.styles['center'])
+            p.addElement(frame)
+            self.doc.text.addElement(p)
+
     def _interpolate(self, text):
         """Takes text with embedded references and returns proporly
         escaped text with HTML links.
@@ -260,11 +410,10 @@ class OdtWriter(writer.Writer):
         style = "h" + str(level)
         if newpage:
             style += "br"
-        self.doc.text.addElement(text.H(text=title, outlinelevel=level,
-                                        stylename=self.styles.get(style)))
+        self._emit("H", title, level, style)
         if level == 1:
             # page break after H1
-            self.doc.text.addElement(text.P(text='', stylename="Break"))
+            self._emit("P", '', 'br')
 
     def _render_person(self, person, image_data, attributes, families,
                        events, notes):
@@ -296,37 +445,30 @@ class OdtWriter(writer.Writer):
 
         # image if present
         if image_data:
-            imgframe = self._getImageFragment(image_data)
-            p = text.P()
-            imgframe.setAttribute('stylename', self.styles['img'])
-            imgframe.setAttribute('anchortype', 'paragraph')
-            p.addElement(imgframe)
-            self.doc.text.addElement(p)
+            self._emit(*self._getImageFragment(image_data))
 
         # all attributes follow
         for attr, value in attributes:
-            self.doc.text.addElement(text.P(text=attr + ": " +
-                                            self._interpolate(value)))
+            self._emit("P", attr + ": " + self._interpolate(value), None)
 
         if families:
             hdr = self._tr.tr(TR("Spouses and children"), person.sex)
             self._render_section(3, "", hdr)
             for family in families:
-                family = self._interpolate(family)
-                self.doc.text.addElement(text.P(text=family))
+                self._emit("P", self._interpolate(family), None)
 
         if events:
             hdr = self._tr.tr(TR("Events and dates"))
             self._render_section(3, "", hdr)
             for date, facts in events:
                 facts = self._interpolate(facts)
-                self.doc.text.addElement(text.P(text=date + ": " + facts))
+                self._emit("P", date + ": " + facts, None)
 
         if notes:
             hdr = self._tr.tr(TR("Comments"))
             self._render_section(3, "", hdr)
             for note in notes:
-                self.doc.text.addElement(text.P(text=note))
+                self._emit("P", note, None)
 
         tree_svg = self._make_ancestor_tree(person)
         if tree_svg:
@@ -335,19 +477,13 @@ class OdtWriter(writer.Writer):
             # convert it to binary
             svg_data = svg_data.encode("utf_8")
 
-            # store image
             filename = u"Pictures/" + \
                 hashlib.sha1(svg_data).hexdigest() + '.svg'
-            imgref = self.doc.addPicture(filename, mime, svg_data)
-
-            frame = draw.Frame(width=str(width), height=str(height))
-            frame.addElement(draw.Image(href=imgref))
 
             hdr = self._tr.tr(TR("Ancestor tree"))
             self._render_section(3, "", hdr)
-            p = text.P(stylename=self.styles['center'])
-            p.addElement(frame)
-            self.doc.text.addElement(p)
+            self._emit("TREE", filename, mime, svg_data, str(width),
+                       str(height))
 
     def _render_name_stat(self, n_total, n_females, n_males):
         """Produces summary table.
@@ -438,9 +574,11 @@ class OdtWriter(writer.Writer):
             self.doc.save(self._output)
 
     def _getImageFragment(self, image_data):
-        '''Adds Image to the document as person's picture.
+        '''Returns description of person's picture for
+        :py:meth:`_add_element`.
         '''
 
+        # only image header is read, pixels are not decoded
         img = Image.open(io.BytesIO(image_data))
         filename = u"Pictures/" + \
             hashlib.sha1(image_data).hexdigest() + '.' + img.format.lower()
@@ -449,11 +587,8 @@ class OdtWriter(writer.Writer):
         maxsize = (self._image_width.inches,
                    self._image_height.inches)
         w, h = utils.resize(img.size, maxsize)
-        frame = draw.Frame(width="%.3fin" % w, height="%.3fin" % h)
-        imgref = self.doc.addPicture(filename, utils.img_mime_type(img),
-                                     image_data)
-        frame.addElement(draw.Image(href=imgref))
-        return frame
+        return ("IMG", filename, utils.img_mime_type(img), image_data,
+                "%.3fin" % w, "%.3fin" % h)
 
     def _make_ancestor_tree(self, person):
         """"Returns SVG picture for parent tree or None.
@@ -464,7 +599,6 @@ class OdtWriter(writer.Writer):
         """
         width = self.layout.width - self.layout.left - self.layout.right
         width = width ^ 'in'
-        plotter = Plotter(width=width, gen_dist="12pt", font_size="9pt",
-                          fullxml=True, refs=False, max_gen=self._tree_width)
-        img = plotter.parent_tree(person, 'in')
-        return img
+        return self._parent_tree(person, 'in', width=width, gen_dist="12pt",
+                                 font_size="9pt", fullxml=True, refs=False,
+                                 max_gen=self._tree_width)
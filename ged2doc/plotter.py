@@ -6,6 +6,7 @@ from __future__ import absolute_import, division, print_function
 import logging
 
 from .dumbsvg import Doc, Line
+from .name import NameCache
 from .size import Size
 from .textbox import TextBox
 
@@ -17,6 +18,12 @@ _pline_unknown_style = "fill:none;stroke-width:0.5pt;stroke:grey"
 _log = logging.getLogger(__name__)
 
 
+def _parents(person):
+    """Returns mother and father of a person.
+    """
+    return person.mother, person.father
+
+
 class _PersonBox(object):
     """Class implementing "drawing" of SVG box with person name.
 
@@ -29,12 +36,15 @@ class _PersonBox(object):
     :param max_box_width: `Size`
     :param font_size: `Size`
     :param gen_dist: `Size`,  Distance between boxes of different generations
+    :param names: `NameCache`, Cache of person names
+    :param links: Set of reference IDs of persons whose boxes are links,
+        ``None`` means all persons
     """
 
     _margin = Size('1pt')
 
     def __init__(self, person, gen, motherBox, fatherBox, box_width,
-                 max_box_width, font_size, gen_dist):
+                 max_box_width, font_size, gen_dist, names, links=None):
         self.mother = motherBox
         self.father = fatherBox
         self.generation = gen
@@ -43,15 +53,16 @@ class _PersonBox(object):
         if person is None:
             self.name = '?'
         elif gen == 0:
-            self.name = (person.name.first or '') + ' ' + \
-                (person.name.maiden or person.name.surname or '')
+            self.name = names.short(person, maiden=True)
             if not self.name.strip():
                 self.name = '...'
         else:
-            self.name = (person.name.first or '') + ' ' + \
-                (person.name.surname or '')
+            self.name = names.short(person)
         style = _rect_unknown_style if person is None else _rect_style
-        href = None if person is None else ('#person.' + person.xref_id)
+        href = None
+        if person is not None and (links is None or
+                                   person.xref_id in links):
+            href = '#person.' + person.xref_id
         x0 = gen * (gen_dist + box_width) + Size('1pt')
         self.box = TextBox(text=self.name, x0=x0, width=box_width,
                            maxwidth=max_box_width, font_size=font_size,
@@ -132,17 +143,29 @@ class Plotter(object):
         headers, otherwise only SVG contents.
     :param boolean refs: If True make person name a link. This parameter is
         ignored for now, links are always made.
+    :param parents: Function which takes a person and returns tuple
+        (mother, father), e.g. :py:meth:`ged2doc.writer.Writer._parents`;
+        by default ``mother`` and ``father`` attributes of a person are used.
+    :param names: :py:class:`ged2doc.name.NameCache` instance which can be
+        shared between plots, by default new cache is made for each plotter.
+    :param links: Set of reference IDs of persons which have sections in a
+        document, names of other persons are not links; ``None`` (default)
+        means that names of all persons are links.
 
     """
 
     def __init__(self, max_gen=4, width="5in", gen_dist="12pt",
-                 font_size="10pt", fullxml=True, refs=False):
+                 font_size="10pt", fullxml=True, refs=False, parents=None,
+                 names=None, links=None):
         self.max_gen = max_gen
+        self.parents = parents or _parents
+        self.names = NameCache() if names is None else names
         self.width = Size(width)
         self.gen_dist = Size(gen_dist)
         self.font_size = Size(font_size)
         self.fullxml = fullxml
         self.refs = refs
+        self.links = links
         self.vmargin = Size("4pt")
         self.vmargin2 = Size("6pt")
 
@@ -163,11 +186,13 @@ class Plotter(object):
             image_height : `Size`
         """
 
-        # returns number known generations for a person
-        def _genDepth(person):
-            if not person:
+        # returns number known generations for a person, at most max_gen
+        def _genDepth(person, max_gen):
+            if not person or max_gen == 0:
                 return 0
-            return max(_genDepth(person.father), _genDepth(person.mother)) + 1
+            mother, father = self.parents(person)
+            return max(_genDepth(father, max_gen - 1),
+                       _genDepth(mother, max_gen - 1)) + 1
 
         # generator for person parents, returns None for unknown parent
         def _boxes(box):
@@ -179,8 +204,8 @@ class Plotter(object):
                     yield p
 
         # get the number of generations, limit to 4
-        ngen = min(_genDepth(person), self.max_gen)
-        _log.debug('parent_tree: person = %s', person.name)
+        ngen = _genDepth(person, self.max_gen)
+        _log.debug('parent_tree: person = %s', person.xref_id)
         _log.debug('parent_tree: ngen = %d', ngen)
 
         # if no parents then do not plot anything
@@ -230,11 +255,13 @@ class Plotter(object):
 
             motherTree = None
             fatherTree = None
-            if person and (person.mother or person.father):
-                motherTree = self._makeTree(person.mother, gen + 1, max_gen,
+            mother, father = self.parents(person) if person else (None, None)
+            if mother or father:
+                motherTree = self._makeTree(mother, gen + 1, max_gen,
                                             box_width, max_box_width)
-                fatherTree = self._makeTree(person.father, gen + 1, max_gen,
+                fatherTree = self._makeTree(father, gen + 1, max_gen,
                                             box_width, max_box_width)
             box = _PersonBox(person, gen, motherTree, fatherTree, box_width,
-                             max_box_width, self.font_size, self.gen_dist)
+                             max_box_width, self.font_size, self.gen_dist,
+                             self.names, self.links)
             return box
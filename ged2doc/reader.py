@@ -0,0 +1,811 @@
+"""Module which defines GEDCOM reader used by writers.
+
+Writers navigate GEDCOM structure by following pointers (e.g. person's
+mother or father, family children and spouses). In :py:mod:`ged4py` every
+pointer dereference reads and parses pointed record from a file again, so
+frequently referenced records (e.g. parents with many children) can be
+parsed many times. Reader class in this module keeps an identity map of
+parsed level-0 records so that each record is parsed only once (as long
+as it stays in the cache).
+
+Parsed records can also be saved to a snapshot file on disk, next time the
+same GEDCOM file is converted the records are loaded from a snapshot
+without parsing GEDCOM file again.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__all__ = ["RecordCache", "CachingReader", "RecordStore", "open_reader",
+           "allow_gc_pause"]
+
+import bisect
+import collections
+import contextlib
+import gc
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+import threading
+
+import ged4py
+from ged4py import parser
+from . import scan
+from .mmapfile import MappedFile
+
+
+_log = logging.getLogger(__name__)
+
+
+# if False then _gc_disabled() does nothing, see allow_gc_pause()
+_gc_pause_allowed = False
+
+# number of active _gc_disabled() contexts and state of garbage collector
+# before the first of them
+_gc_lock = threading.Lock()
+_gc_depth = 0
+_gc_enabled = False
+
+
+def allow_gc_pause(allow=True):
+    """Allow disabling of garbage collector while records are parsed.
+
+    Parsing or unpickling many records creates lots of container objects,
+    which triggers garbage collection very often, none of these objects are
+    garbage though. With this option garbage collector is disabled while
+    records are parsed, loaded from or saved to a snapshot, which makes
+    parsing of large files about 10% faster.
+
+    Garbage collector is global for the whole process, so this is only
+    enabled by command line scripts which run one conversion at a time.
+    Applications which run conversions in several threads (e.g. with
+    :py:mod:`ged2doc.aio`) should not enable it, overlapping conversions
+    could keep garbage collector disabled for a long time and other threads
+    would accumulate garbage in reference cycles. Disabled by default.
+
+    :param bool allow: ``True`` to allow disabling of garbage collector.
+    """
+    global _gc_pause_allowed
+    _gc_pause_allowed = allow
+
+
+@contextlib.contextmanager
+def _gc_disabled():
+    """Context manager which disables garbage collector if this is allowed
+    by :py:func:`allow_gc_pause`.
+
+    When context is used by several threads garbage collector is enabled
+    again when the last thread leaves it.
+    """
+    global _gc_depth, _gc_enabled
+    if not _gc_pause_allowed:
+        yield
+        return
+    with _gc_lock:
+        if _gc_depth == 0:
+            _gc_enabled = gc.isenabled()
+            gc.disable()
+        _gc_depth += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_depth -= 1
+            if _gc_depth == 0 and _gc_enabled:
+                gc.enable()
+
+
+class RecordCache(object):
+    """Identity map for level-0 GEDCOM records.
+
+    Records are indexed by their offset in a file. If ``max_size`` is given
+    then cache keeps at most that number of records, least recently used
+    records are evicted when cache is full.
+
+    :param int max_size: Maximum number of records in a cache, ``None``
+        (default) means unlimited.
+
+    :ivar int hits: Number of lookups which found record in a cache.
+    :ivar int misses: Number of lookups which did not find record.
+    """
+
+    def __init__(self, max_size=None):
+        self._max_size = max_size
+        self._records = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, offset):
+        """Returns cached record or ``None``.
+
+        :param int offset: Record offset in a file.
+        """
+        if self._max_size is None:
+            # nothing is evicted, order does not matter
+            record = self._records.get(offset)
+        else:
+            record = self._records.pop(offset, None)
+            if record is not None:
+                # re-insert to make it most recently used
+                self._records[offset] = record
+        if record is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return record
+
+    def put(self, offset, record):
+        """Add record to a cache.
+
+        :param int offset: Record offset in a file.
+        :param record: :py:class:`ged4py.model.Record` instance.
+        """
+        self._records.pop(offset, None)
+        self._records[offset] = record
+        if self._max_size is not None:
+            while len(self._records) > max(self._max_size, 0):
+                self._records.popitem(last=False)
+
+    def clear(self):
+        """Remove all records from a cache, counters are not reset.
+        """
+        self._records.clear()
+
+    def __contains__(self, offset):
+        return offset in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+
+# CachingReader depends on these internals of ged4py 0.1 GedcomReader
+# (version is pinned in setup.py):
+# - ``_init_index()`` is overridden to build the index with a faster scan
+#   and sets ``_index0``, ``_xref0`` and ``_header``;
+# - ``_make_record()`` is overridden to apply projection;
+# - ``_file`` (BinaryFileCR wrapper which is removed for mapped files),
+#   ``_bom_size``, ``_encoding`` and ``_errors`` are read and used to scan
+#   or re-open the file.
+
+
+class CachingReader(parser.GedcomReader):
+    """GEDCOM reader which caches level-0 records.
+
+    This is a sub-class of :py:class:`ged4py.parser.GedcomReader` which
+    returns the same instance of a record every time the record is read
+    from the same location. Because ``ged4py`` pointers dereference their
+    records via :py:meth:`read_record` this also applies to all navigation
+    methods (e.g. ``person.mother`` or ``fam.sub_tags("CHIL")``).
+
+    :param file: File name or file object open in binary mode, file must
+        be seekable.
+    :param str encoding: If None (default) then file is analyzed using
+        `guess_codec()` method to determine correct codec. Otherwise
+        file is open using specified codec.
+    :param str errors: Controls error handling behavior during string
+        decoding, accepts same values as standard `codecs.decode` method.
+    :param int cache_size: Maximum number of records in a cache, ``None``
+        (default) means unlimited.
+    :param tuple index: Optional tuple (index0, xref0) with pre-built index
+        of level-0 records, if not given the index is built by scanning
+        the file.
+    :param dict projection: Optional description of sub-records to keep,
+        see below.
+
+    Projection is used to skip parsing of sub-records which are not needed
+    by application. It is a dictionary indexed by level-0 record tag, for
+    records with tags not in the dictionary all sub-records are kept. Values
+    are dictionaries indexed by tag names of level-1 sub-records, sub-records
+    with other tags are skipped together with all their sub-records. Values
+    in those dictionaries are either ``None`` meaning that all sub-records
+    are kept, or a set of tag names of level-2 sub-records to keep (with all
+    their sub-records). Value of a skipped record is not available too, but
+    ``CONT`` and ``CONC`` records are always merged into the value of the
+    kept record.
+
+    :ivar cache: :py:class:`RecordCache` instance.
+    """
+
+    def __init__(self, file, encoding=None, errors="strict", cache_size=None,
+                 index=None, projection=None):
+        self.cache = RecordCache(cache_size)
+        self._index = index
+        self._projection = projection
+        # projection rules for current level-0 and level-1 records
+        self._proj_rules0 = None
+        self._proj_rules1 = None
+        parser.GedcomReader.__init__(self, file, encoding=encoding,
+                                     errors=errors)
+        if isinstance(file, MappedFile):
+            # mapped file understands CR line terminators itself, there is
+            # no need for ged4py wrapper which reads lines byte by byte
+            self._file = self._file.detach()
+            self._file.seek(self._bom_size)
+
+    def _init_index(self):
+        """Build index of level-0 records.
+
+        This replaces ged4py implementation with faster scan which does not
+        parse every line of a file.
+        """
+        if self._index is None:
+            self._index = scan.index_records0(self._file, self._bom_size,
+                                              self._encoding, self._errors)
+        if isinstance(self._file, MappedFile):
+            # from now on records are read in random order
+            self._file.advise(sequential=False)
+        self._index0, self._xref0 = self._index
+        if self._index0 and self._index0[0][1] == 'HEAD':
+            self._header = self.read_record(self._index0[0][0])
+
+    def read_record(self, offset):
+        """Read complete record from a file starting at given position.
+
+        Level-0 records are returned from cache if they were read already.
+
+        :param int offset: Position in file to start reading from.
+        :return: :py:class:`ged4py.model.Record` instance or None if offset
+            points past EOF.
+        """
+        record = self.cache.get(offset)
+        if record is None:
+            record = parser.GedcomReader.read_record(self, offset)
+            if record is not None and record.level == 0:
+                self.cache.put(offset, record)
+        return record
+
+    def _make_record(self, parent, gline):
+        """Make new record from a parsed line.
+
+        Extends ged4py implementation by skipping records (and their
+        sub-records) which are not included in projection.
+        """
+        if self._projection is None:
+            return parser.GedcomReader._make_record(self, parent, gline)
+
+        level = gline.level
+        if level == 0:
+            self._proj_rules0 = self._projection.get(gline.tag)
+            self._proj_rules1 = None
+        elif parent is None:
+            # parent was skipped
+            return None
+        elif gline.tag in ("CONT", "CONC"):
+            pass
+        elif level == 1:
+            if self._proj_rules0 is not None:
+                if gline.tag not in self._proj_rules0:
+                    return None
+                self._proj_rules1 = self._proj_rules0[gline.tag]
+        elif level == 2:
+            if self._proj_rules0 is not None and \
+                    self._proj_rules1 is not None and \
+                    gline.tag not in self._proj_rules1:
+                return None
+        return parser.GedcomReader._make_record(self, parent, gline)
+
+    def record(self, xref_id):
+        """Returns level-0 record with given reference ID.
+
+        :param str xref_id: Record reference ID, e.g. "@I1@".
+        :return: :py:class:`ged4py.model.Record` instance or ``None`` if
+            there is no record with that ID.
+        """
+        offset, _ = self.xref0.get(xref_id, (None, None))
+        if offset is None:
+            return None
+        return self.read_record(offset)
+
+    def preload(self, jobs=1):
+        """Parse all level-0 records and add them to the cache.
+
+        If ``jobs`` is more than one then records are parsed by that many
+        worker processes, each worker parses a contiguous range of level-0
+        records. Parsed records are merged into cache in the order of their
+        positions in a file, so the result is identical to parsing in a
+        single process. This only makes sense when cache size is unlimited.
+
+        :param int jobs: Number of worker processes.
+        """
+        offsets = [offset for offset, _ in self.index0
+                   if offset not in self.cache]
+        if jobs <= 1 or len(offsets) < 2:
+            with _gc_disabled():
+                for offset in offsets:
+                    self.read_record(offset)
+            return
+
+        # split into chunks of approximately equal size in bytes, few
+        # chunks per process to balance load
+        nchunks = min(jobs * 4, len(offsets))
+        chunk_size = (offsets[-1] - offsets[0]) / nchunks
+        chunks = [[]]
+        for offset in offsets:
+            if chunks[-1] and offset - chunks[-1][0] >= chunk_size:
+                chunks.append([])
+            chunks[-1].append(offset)
+
+        gfile = self._file
+        if not isinstance(gfile, MappedFile):
+            # workers need their own copy of the data
+            gfile.seek(0)
+            gfile = io.BytesIO(gfile.read())
+        _log.debug("preload: parse %d records in %d chunks by %d processes",
+                   len(offsets), len(chunks), jobs)
+        pool = multiprocessing.Pool(jobs, _init_worker,
+                                    (gfile, self._encoding, self._errors,
+                                     self.dialect, self._projection))
+        try:
+            # imap returns results in the order of chunks
+            for data in pool.imap(_parse_chunk, chunks):
+                unpickler = _SnapshotUnpickler(io.BytesIO(data), self)
+                with _gc_disabled():
+                    records = unpickler.load()
+                for offset, record in records:
+                    self.cache.put(offset, record)
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+class RecordStore(object):
+    """Reader-like object which holds all level-0 records in memory.
+
+    Instances of this class are created from snapshot files, they support
+    the subset of :py:class:`ged4py.parser.GedcomReader` interface that is
+    used by writers (and by ``ged4py`` pointers).
+
+    :param list index0: List of level-0 record positions and tag names.
+    :param dict xref0: Dictionary which maps xref_id to level-0 record
+        position and tag name.
+    :param str dialect: File dialect as one of DIALECT_* constants.
+
+    :ivar cache: :py:class:`RecordCache` instance holding all records.
+    """
+
+    def __init__(self, index0, xref0, dialect):
+        self.index0 = index0
+        self.xref0 = xref0
+        self.dialect = dialect
+        self.cache = RecordCache()
+
+    @property
+    def header(self):
+        """Header record.
+        """
+        if self.index0 and self.index0[0][1] == 'HEAD':
+            return self.read_record(self.index0[0][0])
+        return None
+
+    def records0(self, tag=None):
+        """Iterator over all level=0 records.
+
+        :param str tag: If ``None`` is given (default) then return all level=0
+            records, otherwise return level=0 records with the given tag.
+        """
+        for offset, xtag in self.index0:
+            if tag is None or tag == xtag:
+                yield self.read_record(offset)
+
+    def preload(self, jobs=1):
+        """Parse all level-0 records, does nothing as all records are in
+        memory already.
+        """
+        pass
+
+    def read_record(self, offset):
+        """Returns level-0 record at given position or ``None``.
+
+        :param int offset: Record position in a file.
+        """
+        return self.cache.get(offset)
+
+    def record(self, xref_id):
+        """Returns level-0 record with given reference ID.
+
+        :param str xref_id: Record reference ID, e.g. "@I1@".
+        :return: :py:class:`ged4py.model.Record` instance or ``None`` if
+            there is no record with that ID.
+        """
+        offset, _ = self.xref0.get(xref_id, (None, None))
+        if offset is None:
+            return None
+        return self.read_record(offset)
+
+
+def _reader_ref():
+    """Placeholder for a reader instance in pickled records.
+    """
+    raise pickle.UnpicklingError("reader reference outside of snapshot")
+
+
+def _reduce_reader(reader):
+    return _reader_ref, ()
+
+
+class _SnapshotPickler(pickle.Pickler):
+    """Pickler which replaces reader instance with a placeholder.
+
+    Pointer records keep reference to a reader, reader itself cannot be
+    pickled, on unpickling it is replaced with new :py:class:`RecordStore`.
+    Dispatch table is used for that instead of ``persistent_id()`` which
+    would be called for every pickled object.
+    """
+
+    def __init__(self, file, reader):
+        pickle.Pickler.__init__(self, file, pickle.HIGHEST_PROTOCOL)
+        self.dispatch_table = {type(reader): _reduce_reader}
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """Unpickler which resolves reader placeholder into a store.
+    """
+
+    def __init__(self, file, store):
+        pickle.Unpickler.__init__(self, file)
+        self._store = store
+
+    def find_class(self, module, name):
+        if module == __name__ and name == "_reader_ref":
+            return lambda: self._store
+        return pickle.Unpickler.find_class(self, module, name)
+
+
+# Reader instance used by worker process in CachingReader.preload()
+_worker_reader = None
+
+
+def _init_worker(gfile, encoding, errors, dialect, projection):
+    """Initialize worker process for parsing records.
+    """
+    global _worker_reader
+    _worker_reader = CachingReader(gfile, encoding=encoding, errors=errors,
+                                   cache_size=0, projection=projection)
+    _worker_reader.dialect = dialect
+
+
+def _parse_chunk(offsets):
+    """Parse records in a worker process.
+
+    :param list offsets: Positions of level-0 records.
+    :return: Pickled list of (offset, record) tuples.
+    """
+    with _gc_disabled():
+        records = [(offset, _worker_reader.read_record(offset))
+                   for offset in offsets]
+    buf = io.BytesIO()
+    _SnapshotPickler(buf, _worker_reader).dump(records)
+    return buf.getvalue()
+
+
+def _key_options(encoding, errors, projection):
+    """Returns list of options which are included in snapshot and index
+    keys.
+    """
+    from . import __version__
+    options = [encoding or "", errors, ged4py.__version__, __version__,
+               "py{0}.{1}".format(*sys.version_info[:2])]
+    if projection is not None:
+        # make it independent of dict/set ordering
+        options.append(repr(sorted(
+            (tag0, sorted((tag1, sorted(tags2) if tags2 else tags2)
+                          for tag1, tags2 in rules.items()))
+            for tag0, rules in projection.items())))
+    return options
+
+
+def _snapshot_key(gfile, encoding, errors, projection=None):
+    """Returns snapshot key for the contents of a GEDCOM file.
+
+    Key is a hash of a file contents, encoding options, projection, and
+    versions of the packages which define record classes. File position is
+    reset to the beginning of the file.
+    """
+    digest = hashlib.sha1()
+    gfile.seek(0)
+    while True:
+        data = gfile.read(1024 * 1024)
+        if not data:
+            break
+        digest.update(data)
+    gfile.seek(0)
+    options = _key_options(encoding, errors, projection)
+    digest.update(":".join(options).encode("utf_8"))
+    return digest.hexdigest()
+
+
+def _file_identity(gfile):
+    """Returns list of strings which identify a file on disk or ``None``.
+
+    Identity is made of file name, size and modification time (and position
+    of a member for a part of ZIP archive), it is only available for regular
+    files and memory-mapped files.
+    """
+    if isinstance(gfile, MappedFile):
+        identity = [gfile.name, gfile._offset, gfile._size]
+    elif isinstance(gfile, (io.BufferedReader, io.FileIO)):
+        identity = [gfile.name]
+    else:
+        return None
+    if not isinstance(gfile.name, (str, type(u""))):
+        return None
+    try:
+        stat = os.stat(gfile.name)
+    except OSError:
+        return None
+    identity += [stat.st_size, stat.st_mtime]
+    return [repr(item) for item in identity]
+
+
+def _index_key(gfile, encoding, errors, projection=None):
+    """Returns key of a stored index for a GEDCOM file.
+
+    For files on disk the key is a hash of file identity (see
+    :py:func:`_file_identity`) and options, so that the file does not need
+    to be read, for other file objects this is the same as
+    :py:func:`_snapshot_key`.
+    """
+    identity = _file_identity(gfile)
+    if identity is None:
+        return _snapshot_key(gfile, encoding, errors, projection)
+    options = identity + _key_options(encoding, errors, projection)
+    return hashlib.sha1(":".join(options).encode("utf_8")).hexdigest()
+
+
+def _load_snapshot(path):
+    """Load records from a snapshot file.
+
+    :param str path: Snapshot file name.
+    :return: :py:class:`RecordStore` instance.
+    """
+    with open(path, "rb") as snapfile:
+        unpickler = pickle.Unpickler(snapfile)
+        index0, xref0, dialect = unpickler.load()
+        store = RecordStore(index0, xref0, dialect)
+        unpickler = _SnapshotUnpickler(snapfile, store)
+        with _gc_disabled():
+            records = unpickler.load()
+        for offset, record in records:
+            store.cache.put(offset, record)
+    return store
+
+
+def _save_snapshot(path, reader, jobs=1):
+    """Parse all records and save them to a snapshot file.
+
+    :param str path: Snapshot file name.
+    :param reader: :py:class:`CachingReader` instance.
+    :param int jobs: Number of processes used for parsing.
+    """
+    reader.preload(jobs)
+    records = [(offset, reader.read_record(offset))
+               for offset, _ in reader.index0]
+    _dump_atomic(path, (reader.index0, reader.xref0, reader.dialect),
+                 records, reader)
+
+
+def _dump_atomic(path, data, records=None, reader=None):
+    """Pickle data to a file.
+
+    Data is written to a temporary file first and renamed so that
+    concurrent runs never see partially written file. If ``records`` is
+    given then it is pickled after ``data`` with references to ``reader``
+    replaced by placeholder.
+    """
+    dirname = os.path.dirname(path)
+    if dirname and not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    fd, tmpname = tempfile.mkstemp(suffix=".tmp", dir=dirname)
+    try:
+        with os.fdopen(fd, "wb") as outfile:
+            pickle.Pickler(outfile, pickle.HIGHEST_PROTOCOL).dump(data)
+            if records is not None:
+                _SnapshotPickler(outfile, reader).dump(records)
+        try:
+            os.rename(tmpname, path)
+        except OSError:
+            # on Windows rename fails if destination exists, which means
+            # somebody else made identical file
+            os.unlink(tmpname)
+    except Exception:
+        if os.path.exists(tmpname):
+            os.unlink(tmpname)
+        raise
+
+
+class _IndexedReader(CachingReader):
+    """Reader which uses index of level-0 records stored in a file.
+
+    Index file is found by the name, size and modification time of GEDCOM
+    file and not by its contents, so it may not match the file (e.g. if
+    file was modified and its modification time restored). Each level-0
+    record is checked against the index when it is read from a file, on
+    the first mismatch index is built again and saved, and the record is
+    looked up in the new index. Records which were read before that are
+    not affected as they match their index entries.
+
+    :param str path: Name of the index file.
+
+    Other parameters are the same as for :py:class:`CachingReader`.
+    """
+
+    def __init__(self, file, path, encoding=None, errors="strict",
+                 cache_size=None, index=None, projection=None):
+        self._index_path = path
+        # index which was replaced by a new index
+        self._stale_index = None
+        CachingReader.__init__(self, file, encoding=encoding, errors=errors,
+                               cache_size=cache_size, index=index,
+                               projection=projection)
+
+    def _init_index(self):
+        """Build index of level-0 records if it was not loaded from a file.
+        """
+        build = self._index is None
+        CachingReader._init_index(self)
+        if build:
+            self._save_index()
+
+    def _save_index(self):
+        """Save current index to index file.
+        """
+        try:
+            _dump_atomic(self._index_path, self._index)
+        except (IOError, OSError) as exc:
+            _log.warning("Failed to save index file %s: %s",
+                         self._index_path, exc)
+
+    def read_record(self, offset):
+        """Read complete record from a file starting at given position.
+
+        Extends :py:meth:`CachingReader.read_record` by checking that
+        record matches the index.
+        """
+        if offset in self.cache:
+            return CachingReader.read_record(self, offset)
+        try:
+            record = CachingReader.read_record(self, offset)
+        except parser.ParserError:
+            record = None
+        if self._matches_index(offset, record):
+            return record
+
+        if self._stale_index is None:
+            _log.warning("Index file %s does not match GEDCOM file, "
+                         "rebuilding index", self._index_path)
+            self._stale_index = self._index
+            self.cache.clear()
+            self._index = scan.index_records0(self._file, self._bom_size,
+                                              self._encoding, self._errors)
+            self._index0, self._xref0 = self._index
+            self._save_index()
+        offset = self._relocate(offset)
+        if offset is None:
+            return None
+        return CachingReader.read_record(self, offset)
+
+    def _matches_index(self, offset, record):
+        """Returns ``True`` if record matches index entry at given position.
+        """
+        if record is None or record.level != 0:
+            return False
+        pos = bisect.bisect_left(self._index0, (offset,))
+        if pos == len(self._index0) or \
+                self._index0[pos] != (offset, record.tag):
+            return False
+        if record.xref_id is not None:
+            offset0, _ = self._xref0.get(record.xref_id, (None, None))
+            return offset0 == offset
+        return True
+
+    def _relocate(self, offset):
+        """Returns position of a record in current index given its
+        position in stale index, ``None`` if record is not in the index.
+
+        Records are matched by reference ID, or by tag and the number of
+        preceding records with the same tag for records without ID.
+        """
+        index0, xref0 = self._stale_index
+        for xref_id, (offset0, _) in xref0.items():
+            if offset0 == offset:
+                offset, _ = self._xref0.get(xref_id, (None, None))
+                return offset
+        pos = bisect.bisect_left(index0, (offset,))
+        if pos == len(index0) or index0[pos][0] != offset:
+            return None
+        tag = index0[pos][1]
+        count = len([1 for _, tag0 in index0[:pos] if tag0 == tag])
+        offsets = [offset0 for offset0, tag0 in self._index0 if tag0 == tag]
+        return offsets[count] if count < len(offsets) else None
+
+
+def _open_indexed(gfile, encoding, errors, cache_size, projection, path):
+    """Make reader instance using index stored in a file.
+
+    If index file does not exist then it is created.
+    """
+    index = None
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as idxfile:
+                index = pickle.load(idxfile)
+        except Exception as exc:
+            _log.warning("Failed to read index file %s: %s", path, exc)
+
+    return _IndexedReader(gfile, path, encoding=encoding, errors=errors,
+                          cache_size=cache_size, index=index,
+                          projection=projection)
+
+
+def open_reader(gfile, encoding=None, errors="strict", cache_size=None,
+                cache_dir=None, snapshot=True, projection=None, jobs=1):
+    """Make reader instance for a GEDCOM file.
+
+    If ``cache_dir`` is given then snapshot of the parsed records is looked
+    up in that directory and if it exists records are loaded from snapshot
+    without parsing GEDCOM file. If snapshot does not exist then file is
+    parsed and snapshot is saved for the next use. Snapshots are identified
+    by the hash of the file contents, encoding options, and versions of
+    ``ged2doc`` and ``ged4py``.
+
+    If ``snapshot`` is ``False`` then only the index of level-0 records
+    (record positions in a file) is stored in ``cache_dir``, records are
+    read from GEDCOM file when they are needed. This is useful when only
+    few records need to be read from a large file. For files on disk the
+    index is identified by file name, size and modification time, so the
+    file is not read to find the index (other file objects, e.g. files
+    decompressed into memory, are hashed like for snapshots). Records are
+    checked against the index when they are read, and index is rebuilt if
+    it does not match the file.
+
+    Snapshots and indices are stored in Python pickle format, ``cache_dir``
+    should only be shared between trusted users.
+
+    :param gfile: File object for GEDCOM file open in binary mode, must
+        support ``seek()``.
+    :param str encoding: GEDCOM file encoding, if ``None`` then encoding is
+        determined from file itself.
+    :param str errors: Controls error handling behavior during string
+        decoding.
+    :param int cache_size: Maximum number of records in a cache, ``None``
+        (default) means unlimited. Ignored when snapshots are used.
+    :param str cache_dir: Directory for snapshot files, ``None`` (default)
+        disables snapshots.
+    :param bool snapshot: If ``False`` then only store index in
+        ``cache_dir`` instead of complete snapshot.
+    :param dict projection: Sub-records to keep when parsing records, see
+        :py:class:`CachingReader`, ``None`` (default) keeps all sub-records.
+    :param int jobs: Number of processes used for parsing records when new
+        snapshot is made, see :py:meth:`CachingReader.preload`.
+    :return: :py:class:`CachingReader` or :py:class:`RecordStore` instance.
+    """
+    if cache_dir is None:
+        return CachingReader(gfile, encoding=encoding, errors=errors,
+                             cache_size=cache_size, projection=projection)
+
+    if not snapshot:
+        key = _index_key(gfile, encoding, errors, projection)
+        return _open_indexed(gfile, encoding, errors, cache_size, projection,
+                             os.path.join(cache_dir, key + ".index"))
+
+    key = _snapshot_key(gfile, encoding, errors, projection)
+    path = os.path.join(cache_dir, key + ".snapshot")
+    if os.path.exists(path):
+        try:
+            _log.debug("open_reader: loading snapshot %s", path)
+            return _load_snapshot(path)
+        except Exception as exc:
+            _log.warning("Failed to read snapshot file %s: %s", path, exc)
+
+    reader = CachingReader(gfile, encoding=encoding, errors=errors,
+                           projection=projection)
+    try:
+        _log.debug("open_reader: saving snapshot %s", path)
+        _save_snapshot(path, reader, jobs)
+    except (IOError, OSError) as exc:
+        _log.warning("Failed to save snapshot file %s: %s", path, exc)
+    return reader
@@ -0,0 +1,225 @@
+"""Methods for fast scanning of GEDCOM files without parsing them.
+
+Methods in this module work on raw bytes of GEDCOM file and only look at
+the lines which start level-0 records. This is much faster than parsing
+every line with :py:mod:`ged4py` and is sufficient for building index of
+records in a file.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__all__ = ["iter_lines", "index_records0", "iter_records0", "record_hashes"]
+
+import hashlib
+import re
+
+
+# same grammar as in ged4py.parser but only for level-0 lines
+_re_line0 = re.compile(br"""
+        ^
+        [ ]*(?P<level>\d+)                       # integer level number
+        (?:[ ]*(?P<xref>@[A-Z-a-z0-9][^@]*@))?    # optional @xref@
+        [ ]*(?P<tag>[A-Z-a-z0-9_]+)               # tag name
+        (?:[ ](?P<value>.*))?                    # optional value
+        $
+""", re.X)
+
+# line terminators, same as supported by ged4py
+_re_eol = re.compile(br"\r\n|\r|\n")
+
+# complete level-0 record (with all sub-records) in normalized data, starts
+# with preceding line terminator
+_re_record0 = re.compile(br"""
+        \n(                                        # whole record
+        0+[ ]+                                     # level 0
+        (?:(?P<xref>@[A-Z-a-z0-9][^@]*@)[ ]+)?     # optional @xref@
+        (?P<tag>[A-Z-a-z0-9_]+)                    # tag name
+        [^\n]*                                     # rest of the line
+        (?:\n(?!0+[ ])[^\n]*)*                     # all non-level-0 lines
+        )
+""", re.X)
+
+# line terminators and leading whitespace on the next line
+_re_line_sep = re.compile(br"\n+[ ]*")
+
+
+def iter_lines(fobj, offset=0, blocksize=1024 * 1024):
+    """Generator for all lines in a file.
+
+    Lines can be terminated by LF, CR-LF or CR characters. Leading
+    whitespace and line terminators are removed from returned lines.
+
+    :param fobj: File object open in binary mode, must support ``seek()``.
+    :param int offset: Position in the file to start reading.
+    :param int blocksize: Size of the blocks to read from file.
+    :returns: Iterator for tuples (offset, line), ``line`` is bytes.
+    """
+    fobj.seek(offset)
+    pending = b""
+    while True:
+        block = fobj.read(blocksize)
+        if not block:
+            break
+        data = pending + block
+        start = 0
+        for match in _re_eol.finditer(data):
+            if match.end() == len(data) and match.group() == b"\r":
+                # CR at the end of the block, could be a part of CR-LF
+                break
+            yield offset + start, data[start:match.start()].lstrip()
+            start = match.end()
+        pending = data[start:]
+        offset += start
+    if pending:
+        if pending.endswith(b"\r"):
+            pending = pending[:-1]
+        yield offset, pending.lstrip()
+
+
+def index_records0(fobj, offset=0, encoding="ascii", errors="strict"):
+    """Build index of level-0 records in a file.
+
+    Returns the index in the same format as used by
+    :py:class:`ged4py.parser.GedcomReader` for its ``index0`` and ``xref0``
+    properties.
+
+    :param fobj: File object open in binary mode, must support ``seek()``.
+    :param int offset: Position in the file to start reading (e.g. after
+        BOM).
+    :param str encoding: Encoding for decoding tags and reference IDs.
+    :param str errors: Controls error handling behavior during string
+        decoding.
+    :returns: Tuple (index0, xref0), ``index0`` is a list of (offset, tag)
+        for all level-0 records, ``xref0`` is a dictionary mapping xref_id
+        to (offset, tag).
+    """
+    index0 = []
+    xref0 = {}
+    for pos, line in iter_lines(fobj, offset):
+        if not line.startswith(b"0"):
+            continue
+        match = _re_line0.match(line)
+        if match is None or int(match.group('level')) != 0:
+            continue
+        tag = match.group('tag').decode(encoding, errors)
+        index0.append((pos, tag))
+        xref_id = match.group('xref')
+        if xref_id:
+            xref0[xref_id.decode(encoding, errors)] = (pos, tag)
+    return index0, xref0
+
+
+def _normalize(data):
+    """Normalize line terminators to LF, remove empty lines and leading
+    whitespace.
+
+    Common case (LF terminators without extra whitespace) is handled without
+    regular expressions.
+    """
+    if b"\r" in data:
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    if b"\n " in data or b"\n\n" in data:
+        data = _re_line_sep.sub(b"\n", data)
+    return data
+
+
+def _record_batches(fobj, offset=0, blocksize=16 * 1024 * 1024):
+    """Generator for lists of raw level-0 records.
+
+    Each list item is a tuple (record, xref_id, tag) of bytes, ``xref_id``
+    is empty for records without reference ID. Record data is normalized,
+    see :py:func:`iter_records0`.
+    """
+    fobj.seek(offset)
+    # all data is normalized before searching for records, raw data is cut
+    # at the last line terminator, so every normalized piece except the
+    # first one starts with LF, first one gets LF added
+    raw = b"\n"
+    pending = b""
+    while True:
+        block = fobj.read(blocksize)
+        raw += block
+        if block:
+            # cut before the whole run of terminators so that CR-LF is
+            # never split
+            end = max(raw.rfind(b"\n"), raw.rfind(b"\r"))
+            head = raw[:end].rstrip(b"\r\n")
+            if not head:
+                continue
+            raw, tail = head, raw[len(head):]
+        else:
+            tail = b""
+        data = pending + _normalize(raw)
+        raw = tail
+
+        if not block:
+            yield _re_record0.findall(data.rstrip(b"\n"))
+            break
+        # last record extends to the end of data and can continue in the
+        # next block
+        records = _re_record0.findall(data)
+        pending = b""
+        if records:
+            pending = b"\n" + records.pop()[0]
+            yield records
+
+
+def iter_records0(fobj, offset=0, blocksize=16 * 1024 * 1024):
+    """Generator for raw data of all level-0 records in a file.
+
+    Record data includes all sub-records, line terminators are normalized
+    to LF and leading whitespace is removed from every line, there is no
+    terminator after the last line. Normalized data can be parsed as GEDCOM
+    file with the same encoding as original file. This method works with
+    any ASCII-compatible file encoding.
+
+    :param fobj: File object open in binary mode.
+    :param int offset: Position in the file to start reading (e.g. after
+        BOM).
+    :param int blocksize: Size of the blocks to read from file.
+    :returns: Iterator for tuples (record, xref_id, tag), all items are
+        bytes, ``xref_id`` is empty for records without reference ID.
+    """
+    for records in _record_batches(fobj, offset, blocksize):
+        for record in records:
+            yield record
+
+
+def record_hashes(fobj, offset=0, encoding="ascii", errors="strict",
+                  blocksize=16 * 1024 * 1024):
+    """Compute hashes of all level-0 records which have reference ID.
+
+    Hash is computed from raw bytes of the record (including all its
+    sub-records) with normalized line terminators and without leading
+    whitespace, so it does not depend on record position in a file or line
+    terminator convention. This method works with any ASCII-compatible file
+    encoding.
+
+    :param fobj: File object open in binary mode.
+    :param int offset: Position in the file to start reading (e.g. after
+        BOM).
+    :param str encoding: Encoding for decoding tags and reference IDs.
+    :param str errors: Controls error handling behavior during string
+        decoding.
+    :param int blocksize: Size of the blocks to read from file.
+    :returns: Dictionary mapping xref_id to tuple (tag, hash), hash is a
+        binary SHA-1 digest.
+    """
+    hashes = {}
+    sha1 = hashlib.sha1
+
+    tags = {}
+
+    def _tag(tag):
+        # there are just a few distinct tags, decode each only once
+        try:
+            return tags[tag]
+        except KeyError:
+            return tags.setdefault(tag, tag.decode(encoding, errors))
+
+    for records in _record_batches(fobj, offset, blocksize):
+        hashes.update((xref_id.decode(encoding, errors),
+                       (_tag(tag), sha1(record).digest()))
+                      for record, xref_id, tag in records if xref_id)
+
+    return hashes
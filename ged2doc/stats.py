@@ -0,0 +1,124 @@
+"""Module with statistics of persons.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__all__ = ["Statistics", "LIFESPAN_BIN"]
+
+from .dates import jdn_year
+
+# Width of lifespan bins in years
+LIFESPAN_BIN = 10
+
+# Average length of Gregorian year in days
+_YEAR_DAYS = 365.2425
+
+
+def _day(key):
+    """Returns day in the middle of a date range, or ``None``.
+
+    :param key: :py:class:`ged2doc.dates.DateKey` instance or ``None``.
+    """
+    if key is None or key.earliest is None or key.latest is None:
+        return None
+    return (key.earliest + key.latest) // 2
+
+
+def _table(counts):
+    """Returns frequency table, list of (key, count) ordered by key."""
+    table = list(counts.items())
+    table.sort()
+    return table
+
+
+class Statistics(object):
+    """Statistics of persons collected in one pass.
+
+    Persons are added one at a time with :py:meth:`add`, only counters are
+    kept, so memory is proportional to the number of distinct names,
+    decades and lifespans, not to the number of persons. Tables are made
+    from counters when they are needed.
+
+    Birth decade is only counted for persons with birth date that has
+    bounded day range (see :py:class:`ged2doc.dates.DateKey`), middle of
+    the range is used. Lifespan also needs bounded death date, it is
+    counted in bins of :py:data:`LIFESPAN_BIN` years.
+
+    :ivar int n_total: Total number of persons.
+    :ivar int n_females: Number of female persons.
+    :ivar int n_males: Number of male persons.
+    """
+
+    def __init__(self):
+        self.n_total = 0
+        self.n_females = 0
+        self.n_males = 0
+        # maps sex to dictionary of first name counters
+        self._first_names = {'F': {}, 'M': {}}
+        self._surnames = {}
+        self._decades = {}
+        self._lifespans = {}
+
+    def add(self, sex, first_name, surname=None, birth=None, death=None):
+        """Add one person to statistics.
+
+        :param str sex: Person sex, "F", "M", or anything else if unknown.
+        :param str first_name: Person first name.
+        :param str surname: Person surname, ``None`` or empty if unknown.
+        :param birth: :py:class:`ged2doc.dates.DateKey` of birth date or
+            ``None``.
+        :param death: :py:class:`ged2doc.dates.DateKey` of death date or
+            ``None``.
+        """
+        self.n_total += 1
+        if sex == 'F':
+            self.n_females += 1
+        elif sex == 'M':
+            self.n_males += 1
+        names = self._first_names.get(sex)
+        if names is not None:
+            names[first_name] = names.get(first_name, 0) + 1
+        if surname:
+            self._surnames[surname] = self._surnames.get(surname, 0) + 1
+
+        birth_day = _day(birth)
+        if birth_day is None:
+            return
+        decade = jdn_year(birth_day) // 10 * 10
+        self._decades[decade] = self._decades.get(decade, 0) + 1
+        death_day = _day(death)
+        if death_day is not None and death_day >= birth_day:
+            years = int((death_day - birth_day) / _YEAR_DAYS)
+            years = years // LIFESPAN_BIN * LIFESPAN_BIN
+            self._lifespans[years] = self._lifespans.get(years, 0) + 1
+
+    def name_freq(self, sex):
+        """Returns first name frequency table for persons of given sex.
+
+        :param str sex: "F" or "M".
+        :return: List of (name, count) tuples ordered by name.
+        """
+        return _table(self._first_names.get(sex, {}))
+
+    def surname_freq(self):
+        """Returns surname frequency table.
+
+        :return: List of (surname, count) tuples ordered by surname.
+        """
+        return _table(self._surnames)
+
+    def birth_decades(self):
+        """Returns histogram of birth decades.
+
+        :return: List of (year, count) tuples ordered by year, year is the
+            first year of a decade.
+        """
+        return _table(self._decades)
+
+    def lifespans(self):
+        """Returns lifespan distribution.
+
+        :return: List of (years, count) tuples ordered by years, years is
+            the lower bound of a bin.
+        """
+        return _table(self._lifespans)
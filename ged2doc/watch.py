@@ -0,0 +1,327 @@
+"""Module which implements watch mode.
+
+In watch mode GEDCOM file is converted once and then converted again every
+time the file changes, e.g. to keep a preview of a file that is edited in
+another application. Parsed records and rendered person sections are kept
+in memory between conversions. When file changes its level-0 records are
+compared with the previous version using hashes of raw record data (see
+:py:func:`ged2doc.scan.iter_records0`), only new and modified records are
+parsed, and only persons whose sections depend on these records are rendered
+again (see :py:class:`ged2doc.fragments.FragmentCache`).
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__all__ = ["Watcher"]
+
+import codecs
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from ged4py import model
+from . import scan
+from .fragments import FragmentCache
+from .reader import CachingReader, RecordCache, RecordStore, _gc_disabled
+
+
+_log = logging.getLogger(__name__)
+
+# Records are updated in place, which depends on these internals of
+# ged4py 0.1 (version is pinned in setup.py):
+# - ``Pointer.parser`` is the reader used to dereference the pointer;
+# - ``Pointer._value`` caches dereferenced record, ``[]`` means not
+#   resolved yet;
+# - ``Individual._mother`` and ``Individual._father`` cache parents in the
+#   same way.
+
+
+def _iter_pointers(record):
+    """Generator for all pointer records in a record and its sub-records.
+    """
+    for sub in record.sub_records:
+        if isinstance(sub, model.Pointer):
+            yield sub
+        for pointer in _iter_pointers(sub):
+            yield pointer
+
+
+def _stamp(path):
+    """Returns modification time and size of a file.
+    """
+    stat = os.stat(path)
+    return stat.st_mtime, stat.st_size
+
+
+class Watcher(object):
+    """Converts GEDCOM file every time it changes.
+
+    Watcher owns in-memory :py:class:`ged2doc.reader.RecordStore` with all
+    parsed records which is updated after every change of the input file,
+    unchanged records are re-used. New writer instance is made for every
+    conversion, output is written to a temporary file which then replaces
+    output file, so that output file is always complete.
+
+    :param str path: Name of the input file, only used to check when the
+        file changes.
+    :param make_locator: Callable with no arguments which returns
+        :py:class:`ged2doc.input.FileLocator` instance for input file. Input
+        file can be rewritten in place while it is read, locator should not
+        memory-map it (see ``use_mmap`` parameter of
+        :py:func:`ged2doc.input.make_file_locator`), otherwise access to
+        truncated file kills the process instead of raising an exception.
+    :param make_writer: Callable which takes file locator and output file
+        object and returns :py:class:`ged2doc.writer.Writer` instance.
+    :param str output: Name of the output file.
+    :param float interval: Time between checks of input file in seconds.
+
+    :ivar int updates: Number of conversions done so far.
+    """
+
+    def __init__(self, path, make_locator, make_writer, output, interval=1.):
+        self._path = path
+        self._make_locator = make_locator
+        self._make_writer = make_writer
+        self._output = output
+        self._interval = interval
+        self._stamp = None
+        self._store = None
+        self._encoding = None
+        # maps xref_id (or (tag, hash) for records without xref_id) to
+        # tuple (hash, record)
+        self._records = {}
+        # list of (key, tag) for all records in the store index
+        self._index = None
+        # ordering data for INDI records, see Writer._write()
+        self._indis = {}
+        # maps xref_id to dictionary of Pointer lists indexed by key of
+        # the record that contains them
+        self._pointers = {}
+        self._fragments = None
+        # False if output does not match current records
+        self._current = False
+        self.updates = 0
+
+    def run(self):
+        """Convert input file and convert it again after every change.
+
+        This method never returns, it can be stopped by
+        :py:exc:`KeyboardInterrupt`. Errors during conversion are logged,
+        the file is converted again after the next change.
+        """
+        _log.info("Watching %s for changes, press Ctrl-C to stop", self._path)
+        while True:
+            try:
+                self.update()
+            except Exception as exc:
+                _log.error("Error while producing a document: %s", exc,
+                           exc_info=_log.isEnabledFor(logging.DEBUG))
+            time.sleep(self._interval)
+
+    def update(self):
+        """Convert input file if it has changed since last conversion.
+
+        :return: ``True`` if output file was produced.
+        """
+        stamp = _stamp(self._path)
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+
+        start = time.time()
+        flocator = self._make_locator()
+        gfile = flocator.open_gedcom()
+        if not gfile:
+            raise OSError("Failed to locate input file")
+
+        dirname = os.path.dirname(os.path.abspath(self._output))
+        fd, tmpname = tempfile.mkstemp(suffix=".tmp", dir=dirname)
+        try:
+            # temporary file is only readable by owner
+            if os.path.exists(self._output):
+                shutil.copymode(self._output, tmpname)
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(tmpname, 0o666 & ~umask)
+            with os.fdopen(fd, "wb") as output:
+                writer = self._make_writer(flocator, output)
+                changed = self._load(gfile, writer)
+                if changed or not self._current:
+                    self._current = False
+                    writer._write(self._store, self._fragments, self._indis,
+                                  writer._render_jobs)
+            if not self._current:
+                # os.rename() fails on Windows if destination exists
+                getattr(os, "replace", os.rename)(tmpname, self._output)
+            else:
+                os.unlink(tmpname)
+        except Exception:
+            if os.path.exists(tmpname):
+                os.unlink(tmpname)
+            raise
+
+        if self._current:
+            _log.info("No records changed in %s", self._path)
+            return False
+        self._current = True
+        self.updates += 1
+        _log.info("Produced %s in %.3f sec", self._output,
+                  time.time() - start)
+        return True
+
+    def _load(self, gfile, writer):
+        """Update record store from a new contents of input file.
+
+        :return: Number of added, removed or modified records.
+        """
+        # skip UTF-8 BOM, only ASCII-compatible encodings are supported
+        gfile.seek(0)
+        offset = 0
+        if gfile.read(3) == codecs.BOM_UTF8:
+            offset = 3
+
+        # find records which have changed
+        records = []
+        hashes = {}
+        parse = []
+        sha1 = hashlib.sha1
+        tags = {}
+        with _gc_disabled():
+            for raw, xref_id, tag in scan.iter_records0(gfile, offset):
+                digest = sha1(raw).digest()
+                try:
+                    tag = tags[tag]
+                except KeyError:
+                    tag = tags[tag] = tag.decode("ascii", "replace")
+                if xref_id:
+                    key = xref_id.decode("utf_8", "replace")
+                    hashes[key] = (tag, digest)
+                else:
+                    key = (tag, digest)
+                entry = self._records.get(key)
+                if entry is None or entry[0] != digest:
+                    parse.append((key, tag, digest, raw, len(records)))
+                records.append((key, tag))
+
+        old_records = self._records
+        new_records = dict(old_records)
+        new_records.update(self._parse(parse, writer))
+        removed = [key for key, _, _, _, _ in parse if key in old_records]
+        if records != self._index:
+            current = set(key for key, _ in records)
+            for key in old_records:
+                if key not in current:
+                    del new_records[key]
+                    removed.append(key)
+        _log.debug("_load: %d records, %d parsed, %d removed or replaced",
+                   len(records), len(parse), len(removed))
+
+        if self._store is None:
+            # empty file
+            self._store = RecordStore([], {}, model.DIALECT_DEFAULT)
+
+        # update pointer registry and reset pointers to changed records
+        for key in removed:
+            for pointer in _iter_pointers(old_records[key][1]):
+                self._pointers.get(pointer.value, {}).pop(key, None)
+        for key, _, _, _, _ in parse:
+            record = new_records[key][1]
+            for pointer in _iter_pointers(record):
+                pointer.parser = self._store
+                self._pointers.setdefault(pointer.value, {}).setdefault(
+                    key, []).append(pointer)
+        self._records = new_records
+        changed = set(key for key in removed if not isinstance(key, tuple))
+        changed.update(key for key, _, _, _, _ in parse
+                       if not isinstance(key, tuple))
+        for xref_id in changed:
+            self._reset_pointers(xref_id)
+
+        # positions in the index are record numbers, index only needs
+        # to be rebuilt if records were added, removed or moved
+        store = self._store
+        if records == self._index:
+            for key, _, _, _, pos in parse:
+                store.cache.put(pos, new_records[key][1])
+        else:
+            store.index0 = []
+            store.xref0 = {}
+            store.cache = RecordCache()
+            for pos, (key, tag) in enumerate(records):
+                record = new_records[key][1]
+                store.index0.append((pos, tag))
+                if record.xref_id:
+                    store.xref0[record.xref_id] = (pos, tag)
+                store.cache.put(pos, record)
+            self._index = records
+
+        if writer._fragments_supported:
+            if self._fragments is None:
+                self._fragments = FragmentCache(
+                    None, hashes, writer._fragment_generations())
+            else:
+                persons = self._fragments.update(hashes)
+                _log.debug("_load: %d persons need rendering", len(persons))
+        elif self.updates == 0:
+            _log.warning("%s does not support fragments, all persons will "
+                         "be rendered after every change",
+                         type(writer).__name__)
+
+        return len(parse) + len(removed)
+
+    def _parse(self, records, writer):
+        """Parse raw records.
+
+        :param list records: List of tuples (key, tag, hash, raw, pos).
+        :return: List of (key, (hash, record)) tuples.
+        """
+        if not records:
+            return []
+        index0 = []
+        pos = 0
+        for _, tag, _, raw, _ in records:
+            index0.append((pos, tag))
+            pos += len(raw) + 1
+        data = io.BytesIO(b"\n".join(raw for _, _, _, raw, _ in records))
+
+        # first time file encoding and dialect are determined from header
+        encoding = self._encoding or writer._encoding
+        reader = CachingReader(data, encoding=encoding,
+                               errors=writer._encoding_errors,
+                               index=(index0, {}),
+                               projection=writer._projection)
+        if self._store is None:
+            self._encoding = reader._encoding
+            self._store = RecordStore([], {}, reader.dialect)
+        else:
+            reader.dialect = self._store.dialect
+        reader.preload(writer._parse_jobs)
+        return [(key, (digest, reader.read_record(pos)))
+                for (key, _, digest, _, _), (pos, _) in zip(records, index0)]
+
+    def _reset_pointers(self, xref_id):
+        """Reset pointers to a record so that they are resolved again.
+
+        This resets private caches of ged4py records, see the comment at
+        the top of this module.
+
+        Individual records also remember their parents, these are reset
+        for individuals which point to a record or to a family which points
+        to a record.
+        """
+        for key, pointers in self._pointers.get(xref_id, {}).items():
+            for pointer in pointers:
+                pointer._value = []
+            record = self._records[key][1]
+            if isinstance(record, model.Individual):
+                record._mother = record._father = []
+            elif record.tag == 'FAM':
+                for ikey in self._pointers.get(record.xref_id, {}):
+                    indi = self._records[ikey][1]
+                    if isinstance(indi, model.Individual):
+                        indi._mother = indi._father = []
@@ -5,35 +5,80 @@ from __future__ import absolute_import, division, print_function
 
 __all__ = ["Writer"]
 
+import contextlib
+import hashlib
+import itertools
 import logging
+import multiprocessing
+import os
 
-from .events import indi_attributes, indi_events, family_events
-from .name import name_fmt
+from . import events as _events
+from .dates import date_key
+from .events import EventCache, RecordEvents
+from .name import NameCache
+from .plotter import Plotter
 
 from . import utils
-from ged4py import model, parser
+from .diff import file_hashes
+from .fragments import FragmentCache
+from .graph import FamilyGraph, RELATION_ALL
+from .reader import open_reader
+from .stats import Statistics
+import ged4py
+from ged4py import model
 
 
 _log = logging.getLogger(__name__)
 
-# this is no-op function, only used to mark translatable strings,
-# to extract all strings run "pygettext -k TR ..."
+# Size of the record cache in streaming mode if not given explicitly
+_STREAMING_CACHE_SIZE = 1000
 
 
-def TR(x): return x  # NOQA
+def _make_projection():
+    """Returns projection of INDI and FAM records which includes only
+    sub-records used by writers (see :py:class:`ged2doc.reader.CachingReader`
+    for projection format).
+    """
+    # sub-records used by events module
+    event_tags = frozenset(['TYPE', 'DATE', 'PLAC', 'NOTE', 'CAUS'])
+    indi = dict.fromkeys(_events._indi_events_tags |
+                         _events._indi_attr_tags, event_tags)
+    # pointers and simple values, their sub-records are not used
+    indi.update(dict.fromkeys(['FAMS', 'FAMC', '_UID'], frozenset()))
+    indi.update(NAME=None, SEX=None, OBJE=None, NOTE=None)
+    fam = dict.fromkeys(_events._fam_events_tags, event_tags)
+    fam.update(dict.fromkeys(['HUSB', 'WIFE', 'CHIL'], frozenset()))
+    return dict(INDI=indi, FAM=fam)
+
 
+_PROJECTION = _make_projection()
 
-def _spouse(person, fam):
-    """Returns person spouse in a given family
+
+class _Relative(object):
+    """Person referenced from a section of other person or from ancestor
+    tree.
+
+    References only need reference ID, sex and name of a person, sex is
+    taken from :py:class:`ged2doc.graph.FamilyGraph` and name from
+    :py:class:`ged2doc.name.NameCache`, so the record of a person is not
+    read. Instances are only made for persons whose names are in a cache.
     """
-    # list of Pointers
-    spouses = fam.sub_tags("HUSB", "WIFE", follow=False)
-    spouses = [rec for rec in spouses
-               if rec.value != person.xref_id]
-    # more than one spouse is odd (from the structural concern)
-    if spouses:
-        return spouses[0].ref
-    return None
+
+    __slots__ = ["xref_id", "sex"]
+
+    def __init__(self, xref_id, sex):
+        self.xref_id = xref_id
+        self.sex = sex
+
+    def __repr__(self):
+        return "_Relative({0!r}, {1!r})".format(self.xref_id, self.sex)
+
+
+# this is no-op function, only used to mark translatable strings,
+# to extract all strings run "pygettext -k TR ..."
+
+
+def TR(x): return x  # NOQA
 
 
 class Writer(object):
@@ -63,12 +108,59 @@ class Writer(object):
         Contents.
     :param bool events_without_dates: If ``True`` (default) then show events
         that have no associated dates.
+    :param int record_cache_size: Maximum number of parsed GEDCOM records
+        kept in memory, ``None`` (default) means unlimited.
+    :param str cache_dir: Directory for snapshots of parsed GEDCOM data,
+        ``None`` (default) disables snapshots.
+    :param bool streaming: If ``True`` then use two-pass mode which does
+        not keep all parsed records in memory, useful for very large files.
+    :param int parse_jobs: Number of processes used for parsing GEDCOM
+        file, ignored in streaming mode or when record cache size is
+        limited.
+    :param bool projection: If ``True`` then sub-records of persons and
+        families which are not used in output document (e.g. source
+        citations) are skipped during parsing.
+    :param bool incremental: If ``True`` then rendered person sections are
+        saved in ``cache_dir`` and re-used in the next conversion if none of
+        the records that they depend on have changed. Ignored if
+        ``cache_dir`` is not given or if writer does not support it.
+    :param int render_jobs: Number of processes used for rendering person
+        sections. All records are parsed before rendering, so this is
+        ignored in streaming mode or when record cache size is limited,
+        and also if writer does not support fragments.
+    :param str root: Reference ID of a person, if given then only persons
+        related to this person are included in output document, records
+        of other persons are not read.
+    :param int radius: Maximum number of relationship steps between root
+        person and included persons, ``None`` (default) means no limit.
+        Ignored if ``root`` is not given.
+    :param str relation: Relations which are followed from root person,
+        one of the constants defined in :py:mod:`ged2doc.graph` module.
+        Ignored if ``root`` is not given.
+    :param progress: Callable which is called with the number of rendered
+        persons and total number of persons after each person section,
+        exception raised by it stops conversion.
+    :param image_limiter: Context manager (e.g. ``threading.Semaphore``)
+        which is held while image pixels are decoded and resized, can be
+        shared by several writers to limit the number of concurrent image
+        decodes.
+
+    :ivar statistics: :py:class:`ged2doc.stats.Statistics` instance with
+        statistics of persons in the last produced document, ``None``
+        before the document is produced or if ``make_stat`` is ``False``.
     """
 
+    # True for sub-classes which implement fragment methods
+    _fragments_supported = False
+
     def __init__(self, flocator, tr, encoding=None, encoding_errors="strict",
                  sort_order=model.ORDER_SURNAME_GIVEN, name_fmt=0,
                  make_images=True, make_stat=True, make_toc=True,
-                 events_without_dates=True):
+                 events_without_dates=True, record_cache_size=None,
+                 cache_dir=None, streaming=False, parse_jobs=1,
+                 projection=False, incremental=False, render_jobs=1,
+                 root=None, radius=None, relation=RELATION_ALL,
+                 progress=None, image_limiter=None):
 
         self._floc = flocator
         self._encoding = encoding
@@ -79,7 +171,32 @@ class Writer(object):
         self._make_stat = make_stat
         self._make_toc = make_toc
         self._events_without_dates = events_without_dates
+        self._record_cache_size = record_cache_size
+        self._cache_dir = cache_dir
+        self._streaming = streaming
+        self._parse_jobs = parse_jobs
+        self._projection = _PROJECTION if projection else None
+        self._incremental = incremental
+        self._render_jobs = render_jobs
+        self._root = root
+        self._radius = radius
+        self._relation = relation
+        # set of reference IDs of persons included in output document,
+        # None if all persons are included
+        self._subset = None
+        # index of relationships and caches of names and events for
+        # current reader
+        self._graph = None
+        self._names = None
+        self._event_cache = None
         self._tr = tr
+        self._reader = None
+        # optional dictionary with plotted ancestor trees, can be shared
+        # between writers which render the same persons
+        self._tree_cache = None
+        self._progress = progress
+        self._image_limiter = image_limiter
+        self.statistics = None
 
     def save(self):
         """Produce output document.
@@ -93,147 +210,233 @@ class Writer(object):
         if not gfile:
             raise OSError("Failed to locate input file")
 
-        reader = parser.GedcomReader(gfile, encoding=self._encoding,
-                                     errors=self._encoding_errors)
+        # in streaming mode records are not kept in memory, only their
+        # positions in a file, and snapshot is replaced with index
+        cache_size = self._cache_size()
+        # with root person only related records are read, so they are
+        # located with the index instead of parsing complete file
+        subset = self._root is not None
+        reader = open_reader(gfile, encoding=self._encoding,
+                             errors=self._encoding_errors,
+                             cache_size=cache_size,
+                             cache_dir=self._cache_dir,
+                             snapshot=not (self._streaming or subset),
+                             projection=self._projection,
+                             jobs=self._parse_jobs)
+        if cache_size is None and self._parse_jobs > 1 and not subset:
+            _log.debug('Parse all records using %d processes',
+                       self._parse_jobs)
+            reader.preload(self._parse_jobs)
+
+        # rendering processes must not read input file which they share
+        # with the parent process, so all records have to be in memory
+        jobs = self._render_jobs
+        if jobs > 1:
+            if subset:
+                _log.warning('Parallel rendering is not supported with '
+                             'root person, using one process')
+                jobs = 1
+            elif cache_size is not None:
+                _log.warning('Parallel rendering needs unlimited record '
+                             'cache, using one process')
+                jobs = 1
+            elif self._parse_jobs <= 1:
+                reader.preload(1)
+
+        fragments = None
+        if self._incremental and self._cache_dir is not None:
+            if self._fragments_supported:
+                fragments = self._make_fragment_cache()
+            else:
+                _log.warning("%s does not support incremental mode",
+                             type(self).__name__)
 
-        # generate starting sequence
-        self._render_prolog()
+        offsets = None
+        self._subset = None
+        if subset:
+            offsets = self._related_offsets(reader)
 
-        # title page
-        title = self._tr.tr(TR(u"Person List"))
-        self._render_section(1, 'personList', title)
+        self._write(reader, fragments, jobs=jobs, indi_offsets=offsets)
 
-        # Index of all INDI records
-        _log.debug('Scan all INDI records')
-
-        # filter out some fake records that some apps add
-        indis = []
-        for indi in reader.records0('INDI'):
-            if indi.sub_tag_value("_UID") == "Unassociated photos":
-                continue
-            indis.append(indi)
-
-        # loop over all individuals
-        indis.sort(key=lambda x: x.name.order(self._sort_order))
-        for person in indis:
+    def _cache_size(self):
+        """Returns maximum number of records kept in memory, ``None`` means
+        unlimited.
+        """
+        if self._streaming and self._record_cache_size is None:
+            return _STREAMING_CACHE_SIZE
+        return self._record_cache_size
 
-            name = name_fmt(person.name, self._name_fmt)
+    def _related_offsets(self, reader):
+        """Find persons related to the root person.
 
-            person_id = "person." + person.xref_id
-            self._render_section(2, person_id, name, True)
+        Sets ``_subset`` to the reference IDs of related persons.
 
-            _log.debug('Found INDI: %s', person)
-            _log.debug('INDI name: %r', name)
+        :param reader: Reader instance.
+        :return: List of positions of INDI records of related persons.
+        :raises KeyError: If there is no person with root reference ID.
+        """
+        root = reader.record(self._root)
+        if root is None or root.tag != 'INDI':
+            raise KeyError("Unknown person reference ID: " + self._root)
+
+        relatives = FamilyGraph(reader).relatives(self._root, self._radius,
+                                                  self._relation)
+        offsets = []
+        for xref_id in relatives:
+            # pointers may refer to missing records
+            offset, tag = reader.xref0.get(xref_id, (None, None))
+            if tag == 'INDI':
+                offsets.append(offset)
+        self._subset = frozenset(relatives)
+        _log.info('Render %d persons related to %s', len(offsets),
+                  self._root)
+        return sorted(offsets)
+
+    def _write(self, reader, fragments=None, index_cache=None, jobs=1,
+               indi_offsets=None):
+        """Produce output document from records provided by a reader.
+
+        :param reader: Reader instance, e.g.
+            :py:class:`ged2doc.reader.CachingReader` or
+            :py:class:`ged2doc.reader.RecordStore`.
+        :param fragments: Optional :py:class:`ged2doc.fragments.FragmentCache`
+            instance, only used by writers which support fragments.
+        :param dict index_cache: Optional dictionary which maps INDI records
+            to their ordering data, can be passed to subsequent calls for
+            the same record instances (with the same options). Dictionary
+            is updated to contain only current records.
+        :param int jobs: Number of processes used for rendering person
+            sections, if more than one then all records must be already
+            in memory.
+        :param list indi_offsets: Positions of INDI records to include in
+            output document, ``None`` (default) includes all INDI records.
+        """
 
-            image_data = self._make_main_image(person)
+        # relations of persons are added to index when their records are
+        # scanned, families are added when they are first used
+        self._use_indexes(FamilyGraph(reader), NameCache(),
+                          EventCache(self._cache_size()))
 
-            attributes = []
+        self._write_header()
 
-            # birth date and place
-            born = []
-            bday = person.sub_tag("BIRT/DATE")
-            if bday:
-                born += [self._tr.tr_date(bday.value)]
-            else:
-                born += [self._tr.tr(TR('Date Unknown'), person.sex)]
-            bplace = person.sub_tag_value("BIRT/PLAC")
-            if bplace:
-                born += [bplace]
-            born = ', '.join(born)
-            if born:
-                attributes += [(self._tr.tr(TR('Born'), person.sex), born)]
-
-            # maiden name
-            if person.name.maiden:
-                attributes += [(self._tr.tr(TR('Maiden name'), person.sex),
-                                person.name.maiden)]
-
-            # Parents
-            if person.mother:
-                attributes += [(self._tr.tr(TR('Mother'), person.mother.sex),
-                                self._person_ref(person.mother))]
-            if person.father:
-                attributes += [(self._tr.tr(TR('Father'), person.father.sex),
-                                self._person_ref(person.father))]
-
-            # add some extra info
-            indi_attr = indi_attributes(person)
-            for tag in ['EDUC', 'OCCU', 'RESI', 'NMR', 'NCHI', 'TITL', 'DSCR',
-                        'RELI', 'FACT']:
-                for attrib in indi_attr:
-                    if attrib.tag == tag:
-                        attributes += [self._formatIndiAttr(person, attrib)]
-
-            # all families as spouse
-            families = []
-            own_kids = []
-            fams = person.sub_tags("FAMS")
-            for fam in fams:
-
-                spouse = _spouse(person, fam)
-                children = fam.sub_tags("CHIL")
-
-                children_ids = [rec.xref_id for rec in children]
-                _log.debug('spouse = %s; children ids = %s; children = %s',
-                           spouse, children_ids, children)
-
-                if spouse:
-                    pfmt = u'{person}: {ref}'
-                    family = pfmt.format(person=self._tr.tr(TR('Spouse'),
-                                                            spouse.sex),
-                                         ref=self._person_ref(spouse))
-                    kids = []
-                    if children:
-                        kids = [self._person_ref(c, c.name.first)
-                                for c in children]
-                        family += "; " + self._tr.tr(TR('kids')) + ': ' + \
-                            ', '.join(kids)
-                    families += [family]
+        # Index of all INDI records, for each record only keep the data
+        # needed for ordering: (sort_key, offset); offsets are increasing
+        # so sorting is stable. Statistics are collected in the same pass.
+        _log.debug('Scan INDI records')
+        if indi_offsets is None:
+            indi_offsets = [offset for offset, tag in reader.index0
+                            if tag == 'INDI']
+        indis = []
+        entries = {}
+        stats = Statistics() if self._make_stat else None
+        for offset in indi_offsets:
+            indi = reader.read_record(offset)
+            # names and sex in index are used for references to relatives
+            self._graph.add_record(indi)
+            self._names.get(indi)
+            entry = None
+            if index_cache is not None:
+                entry = index_cache.get(indi)
+            if entry is None:
+                entry = self._index_entry(indi)
+            if index_cache is not None:
+                entries[indi] = entry
+            if entry:
+                indis.append((entry[0], offset))
+                if stats is not None:
+                    stats.add(*entry[1:])
+        indis.sort()
+        if index_cache is not None:
+            index_cache.clear()
+            index_cache.update(entries)
+        self.statistics = stats
+
+        # loop over all individuals, records are read again from their
+        # offsets, in streaming mode they are dropped from cache eventually
+        offsets = [offset for _, offset in indis]
+        if jobs > 1 and len(offsets) > 1 and self._fragments_supported:
+            self._render_persons_parallel(reader, offsets, fragments, jobs)
+        else:
+            for count, offset in enumerate(offsets, 1):
+                person = reader.read_record(offset)
+                if fragments is None:
+                    self._render_person_section(person)
                 else:
-                    own_kids += [self._person_ref(c, c.name.first)
-                                 for c in children]
-            if own_kids:
-                family = self._tr.tr(TR('Kids')) + ': ' + ', '.join(own_kids)
-                families += [family]
-
-            # collect all events from person and families
-            events = self._events(person)
+                    self._render_person_cached(person, fragments)
+                if self._progress is not None:
+                    self._progress(count, len(offsets))
+        if fragments is not None:
+            _log.info('Fragment cache: %d hits, %d misses', fragments.hits,
+                      fragments.misses)
+            fragments.save()
+
+        self._write_trailer(stats)
+
+        _log.info('Record cache: %d hits, %d misses', reader.cache.hits,
+                  reader.cache.misses)
+
+    def _index_entry(self, indi):
+        """Returns data needed for ordering and statistics of a person.
+
+        :param indi: INDI record (:py:class:`ged4py.model.Individual`)
+        :return: Tuple (sort_key, sex, first_name, surname, birth, death),
+            birth and death are :py:class:`ged2doc.dates.DateKey` instances
+            or ``None`` (always ``None`` if statistics are disabled), empty
+            tuple for records which are not included in output.
+        """
+        # filter out some fake records that some apps add
+        if indi.sub_tag_value("_UID") == "Unassociated photos":
+            return ()
+        name = self._names.get(indi)
+        birth = death = None
+        if self._make_stat:
+            events = self._record_events(indi)
+            births = events.tag('BIRT')
+            if births:
+                birth = self._date_key(births[0].date)
+            deaths = events.tag('DEAT')
+            if deaths:
+                death = self._date_key(deaths[0].date)
+        return (name.order(self._sort_order), indi.sex, name.first,
+                name.surname, birth, death)
+
+    def _write_header(self):
+        """Produce the part of output document which precedes persons.
+        """
+        # generate starting sequence
+        self._render_prolog()
 
-            # Comments are published as set of paragraphs
-            notes = []
-            for note in person.sub_tags('NOTE'):
-                notes += note.value.split('\n')
+        # title page
+        title = self._tr.tr(TR(u"Person List"))
+        self._render_section(1, 'personList', title)
 
-            # render whole person info
-            self._render_person(person, image_data, attributes, families,
-                                events, notes)
+    def _write_trailer(self, stats):
+        """Produce the part of output document which follows persons.
 
+        :param stats: :py:class:`ged2doc.stats.Statistics` instance, or
+            ``None`` if statistics section is not produced.
+        """
         # generate some stats
-        if self._make_stat:
+        if stats is not None:
             section = self._tr.tr(TR("Statistics"))
             self._render_section(1, 'statistics', section)
 
             section = self._tr.tr(TR("Total Statistics"))
             self._render_section(2, 'total_statistics', section)
 
-            nmales = len([person for person in indis if person.sex == 'M'])
-            nfemales = len([person for person in indis if person.sex == 'F'])
-            self._render_name_stat(len(indis), nfemales, nmales)
+            self._render_name_stat(stats.n_total, stats.n_females,
+                                   stats.n_males)
 
             section = self._tr.tr(TR("Name Statistics"))
             self._render_section(2, 'name_statistics', section)
 
             section = self._tr.tr(TR("Female Name Frequency"))
             self._render_section(3, 'female_name_freq', section)
-            name_freq = self._name_freq(person for person in indis
-                                        if person.sex == 'F')
-            self._render_name_freq(name_freq)
+            self._render_name_freq(stats.name_freq('F'))
 
             section = self._tr.tr(TR("Male Name Frequency"))
             self._render_section(3, 'male_name_freq', section)
-            name_freq = self._name_freq(person for person in indis
-                                        if person.sex == 'M')
-            self._render_name_freq(name_freq)
+            self._render_name_freq(stats.name_freq('M'))
 
         # add table of contents
         if self._make_toc:
@@ -242,14 +445,396 @@ class Writer(object):
         # finish
         self._finalize()
 
-    def _events(self, person):
+    def render_person(self, xref_id):
+        """Produce output for a single person.
+
+        This method renders the same information for a person as
+        :py:meth:`save` does, but only for one person, and returns it as a
+        fragment instead of adding it to the output document. Person record
+        (and records that it refers to) are located using the index of
+        GEDCOM file without reading other records. Index is built by
+        scanning complete file, if writer was configured with ``cache_dir``
+        then index is stored on disk and re-used by other instances for the
+        same file, see :py:func:`ged2doc.reader.open_reader`.
+
+        Base class implementation returns fragment data (see
+        :py:meth:`_end_fragment`), subclasses may convert it to more
+        convenient form.
+
+        :param str xref_id: Person reference ID, e.g. "@I1@".
+        :return: Fragment data.
+        :raises KeyError: If there is no person with given ID.
+        :raises NotImplementedError: If writer does not support fragments.
+        """
+        if not self._fragments_supported:
+            raise NotImplementedError(
+                "{0} does not support rendering of single person".format(
+                    type(self).__name__))
+        if self._reader is None:
+            gfile = self._floc.open_gedcom()
+            if not gfile:
+                raise OSError("Failed to locate input file")
+            self._reader = open_reader(gfile, encoding=self._encoding,
+                                       errors=self._encoding_errors,
+                                       cache_size=self._record_cache_size,
+                                       cache_dir=self._cache_dir,
+                                       snapshot=False,
+                                       projection=self._projection)
+            self._use_indexes(FamilyGraph(self._reader), NameCache(),
+                              EventCache(self._record_cache_size))
+
+        person = self._reader.record(xref_id)
+        if person is None or person.tag != 'INDI':
+            raise KeyError("Unknown person reference ID: " + xref_id)
+        self._begin_fragment()
+        try:
+            self._render_person_section(person)
+        finally:
+            data = self._end_fragment()
+        return data
+
+    def _use_indexes(self, graph, names, events):
+        """Set indexes which are valid while records do not change.
+
+        :param graph: :py:class:`ged2doc.graph.FamilyGraph` instance used
+            to find relatives of persons.
+        :param names: :py:class:`ged2doc.name.NameCache` instance.
+        :param events: :py:class:`ged2doc.events.EventCache` instance.
+        """
+        self._graph = graph
+        self._names = names
+        self._event_cache = events
+
+    def _record_events(self, record):
+        """Returns events of a person or family.
+
+        :param record: INDI or FAM record.
+        :return: :py:class:`ged2doc.events.RecordEvents` instance.
+        """
+        if self._event_cache is None:
+            return RecordEvents(record)
+        if isinstance(record, _Relative):
+            events = self._event_cache.find(record.xref_id)
+            if events is not None:
+                return events
+            record = self._graph.reader.record(record.xref_id)
+        return self._event_cache.get(record)
+
+    def _date_key(self, date):
+        """Returns sortable key of event date.
+
+        :param date: ``DateValue`` instance or ``None``.
+        :return: :py:class:`ged2doc.dates.DateKey` instance.
+        """
+        if self._event_cache is None:
+            return date_key(date)
+        return self._event_cache.dates.get(date)
+
+    def _name_cache(self):
+        """Returns cache of names, new cache is made if indexes are not set
+        (e.g. when rendering persons from IR).
+        """
+        if self._names is None:
+            return NameCache()
+        return self._names
+
+    def _record(self, xref_id):
+        """Returns record with given reference ID or ``None``.
+
+        :param str xref_id: Reference ID or ``None``.
+        """
+        if xref_id is None:
+            return None
+        return self._graph.reader.record(xref_id)
+
+    def _relative(self, xref_id):
+        """Returns person referenced from other person or ``None``.
+
+        If person name is already cached then returned object only has
+        ``xref_id`` and ``sex`` attributes (:py:class:`_Relative`) and the
+        record is not read, otherwise it is a record.
+
+        :param str xref_id: Reference ID or ``None``.
+        """
+        if xref_id is None:
+            return None
+        sex = self._graph.sex(xref_id)
+        if sex is None:
+            # pointer to missing record
+            return None
+        if xref_id in self._names:
+            return _Relative(xref_id, sex)
+        return self._record(xref_id)
+
+    def _parents(self, person):
+        """Returns mother and father of a person.
+
+        Without relationship index (e.g. when rendering persons from IR)
+        ``mother`` and ``father`` attributes of a person are used.
+
+        :param person: INDI record (:py:class:`ged4py.model.Individual`) or
+            value returned from :py:meth:`_relative`.
+        :return: Tuple (mother, father), ``None`` for unknown parent,
+            parents are values returned from :py:meth:`_relative`.
+        """
+        if self._graph is None:
+            return person.mother, person.father
+        xref_id = person.xref_id
+        return (self._relative(self._graph.mother(xref_id)),
+                self._relative(self._graph.father(xref_id)))
+
+    def _families(self, person):
+        """Returns families where person is a spouse.
+
+        :param person: INDI record (:py:class:`ged4py.model.Individual`)
+        :return: List of (family, spouse, children) tuples, family is a
+            record, spouse (can be ``None``) and items of children list
+            are values returned from :py:meth:`_relative`.
+        """
+        families = []
+        for fam, spouse, children in self._graph.families(person.xref_id):
+            fam = self._record(fam)
+            if fam is None:
+                continue
+            # pointers to missing records are ignored
+            children = [child for child in map(self._relative, children)
+                        if child is not None]
+            families.append((fam, self._relative(spouse), children))
+        return families
+
+    def _make_fragment_cache(self):
+        """Returns fragment cache for current GEDCOM file and options.
+
+        Fragments for different options are stored in different files.
+        """
+        from . import __version__
+        options = [type(self).__name__, __version__, ged4py.__version__]
+        options += [str(opt) for opt in self._fragment_options()]
+        digest = hashlib.sha1(":".join(options).encode("utf_8"))
+        path = os.path.join(self._cache_dir,
+                            digest.hexdigest() + ".fragments")
+        _log.debug('Compute record hashes')
+        hashes = file_hashes(self._floc)
+        return FragmentCache(path, hashes, self._fragment_generations())
+
+    def _fragment_options(self):
+        """Returns list of options which affect rendered person sections.
+
+        Subclasses should extend the list with their own options.
+        """
+        options = [self._encoding, self._encoding_errors, self._name_fmt,
+                   self._make_images, self._events_without_dates,
+                   self._tr.lang, self._tr.datefmt]
+        if self._root is not None:
+            # references to persons outside of subset are not rendered
+            options += [self._root, self._radius, self._relation]
+        return options
+
+    def _fragment_generations(self):
+        """Returns number of ancestor generations rendered for each person.
+        """
+        return 1
+
+    def _render_person_cached(self, person, fragments):
+        """Produce output for one person re-using cached fragment.
+
+        :param person: INDI record (:py:class:`ged4py.model.Individual`)
+        :param fragments: :py:class:`ged2doc.fragments.FragmentCache`
+            instance.
+        """
+        image_data = self._make_main_image(person) or b""
+        key = fragments.key(person, image_data)
+        data = fragments.get(person.xref_id, key)
+        if data is None:
+            self._begin_fragment()
+            try:
+                self._render_person_section(person, image_data)
+            finally:
+                data = self._end_fragment()
+            fragments.put(person.xref_id, key, data)
+        self._replay_fragment(data)
+
+    def _render_persons_parallel(self, reader, offsets, fragments, jobs):
+        """Produce output for all persons using a pool of processes.
+
+        Worker processes are forked from this process, each of them renders
+        a contiguous range of persons into fragments which are then added
+        to output in the original order, so output is identical to
+        rendering in one process. Images are read and cached fragments are
+        looked up in this process before workers are forked, so workers
+        never use file locator and its open files.
+
+        :param reader: Reader instance, all records must be in memory.
+        :param list offsets: Positions of INDI records in output order.
+        :param fragments: :py:class:`ged2doc.fragments.FragmentCache`
+            instance or ``None``.
+        :param int jobs: Number of worker processes.
+        """
+        context = _fork_context()
+        if context is None:
+            _log.warning('Parallel rendering is not supported on this '
+                         'platform, using one process')
+            jobs = 1
+
+        # list of (person, key, data), data is None if person needs
+        # rendering, those go to workers as (offset, image_data), empty
+        # image data means that person has no image
+        persons = []
+        tasks = []
+        for offset in offsets:
+            person = reader.read_record(offset)
+            image_data = self._make_main_image(person) or b""
+            key = data = None
+            if fragments is not None:
+                key = fragments.key(person, image_data)
+                data = fragments.get(person.xref_id, key)
+            if data is None:
+                tasks.append((offset, image_data))
+            persons.append((person, key, data))
+
+        if jobs <= 1 or len(tasks) < 2:
+            results = iter(_render_chunk(tasks, (self, reader)))
+            pool = None
+        else:
+            # few chunks per process to balance load
+            nchunks = min(jobs * 4, len(tasks))
+            chunks = [tasks[i * len(tasks) // nchunks:
+                            (i + 1) * len(tasks) // nchunks]
+                      for i in range(nchunks)]
+            _log.debug('Render %d persons in %d chunks by %d processes',
+                       len(tasks), nchunks, jobs)
+            pool = context.Pool(jobs, _init_render_worker, (self, reader))
+            # imap returns results in the order of chunks
+            results = itertools.chain.from_iterable(
+                pool.imap(_render_chunk, chunks))
+        try:
+            for count, (person, key, data) in enumerate(persons, 1):
+                if data is None:
+                    data = next(results)
+                    if fragments is not None:
+                        fragments.put(person.xref_id, key, data)
+                self._replay_fragment(data)
+                if self._progress is not None:
+                    self._progress(count, len(persons))
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+    def _render_person_section(self, person, image_data=None):
+        """Produce output for one person.
+
+        :param person: INDI record (:py:class:`ged4py.model.Individual`)
+        :param bytes image_data: Person image data, if ``None`` then it is
+            loaded by this method, empty bytes means that person has no
+            image.
+        """
+        name = self._name_cache().name(person, self._name_fmt)
+
+        person_id = "person." + person.xref_id
+        self._render_section(2, person_id, name, True)
+
+        _log.debug('Found INDI: %s', person)
+        _log.debug('INDI name: %r', name)
+
+        if image_data is None:
+            image_data = self._make_main_image(person)
+        elif not image_data:
+            image_data = None
+
+        attributes = []
+
+        # birth date and place
+        revents = self._record_events(person)
+        births = revents.tag('BIRT')
+        born = []
+        if births and births[0].date is not None:
+            born += [self._tr.tr_date(births[0].date)]
+        else:
+            born += [self._tr.tr(TR('Date Unknown'), person.sex)]
+        if births and births[0].place:
+            born += [births[0].place]
+        born = ', '.join(born)
+        if born:
+            attributes += [(self._tr.tr(TR('Born'), person.sex), born)]
+
+        # maiden name
+        maiden = self._name_cache().get(person).maiden
+        if maiden:
+            attributes += [(self._tr.tr(TR('Maiden name'), person.sex),
+                            maiden)]
+
+        # Parents
+        mother, father = self._parents(person)
+        if mother:
+            attributes += [(self._tr.tr(TR('Mother'), mother.sex),
+                            self._person_ref(mother))]
+        if father:
+            attributes += [(self._tr.tr(TR('Father'), father.sex),
+                            self._person_ref(father))]
+
+        # add some extra info
+        for tag in ['EDUC', 'OCCU', 'RESI', 'NMR', 'NCHI', 'TITL', 'DSCR',
+                    'RELI', 'FACT']:
+            for attrib in revents.tag(tag):
+                attributes += [self._formatIndiAttr(person, attrib)]
+
+        # all families as spouse
+        fams = self._families(person)
+        families = []
+        own_kids = []
+        for fam, spouse, children in fams:
+
+            children_ids = [rec.xref_id for rec in children]
+            _log.debug('spouse = %s; children ids = %s; children = %s',
+                       spouse, children_ids, children)
+
+            if spouse:
+                pfmt = u'{person}: {ref}'
+                family = pfmt.format(person=self._tr.tr(TR('Spouse'),
+                                                        spouse.sex),
+                                     ref=self._person_ref(spouse))
+                kids = []
+                if children:
+                    kids = [self._person_ref(c, first=True)
+                            for c in children]
+                    family += "; " + self._tr.tr(TR('kids')) + ': ' + \
+                        ', '.join(kids)
+                families += [family]
+            else:
+                own_kids += [self._person_ref(c, first=True)
+                             for c in children]
+        if own_kids:
+            family = self._tr.tr(TR('Kids')) + ': ' + ', '.join(own_kids)
+            families += [family]
+
+        # collect all events from person and families
+        events = self._events(person, fams)
+
+        # Comments are published as set of paragraphs
+        notes = []
+        for note in person.sub_tags('NOTE'):
+            notes += note.value.split('\n')
+
+        # render whole person info
+        self._render_person(person, image_data, attributes, families,
+                            events, notes)
+
+    def _events(self, person, families=None):
         """Returns a list of events for a given person.
 
         Returned list contains tuples (date, info).
+
+        :param person: INDI record (:py:class:`ged4py.model.Individual`)
+        :param list families: Value returned from :py:meth:`_families`, if
+            ``None`` then it is computed by this method.
         """
+        if families is None:
+            families = self._families(person)
+
         # collect all events from person and families
         events = []
-        for evt in indi_events(person):
+        for evt in self._record_events(person).indi_events():
             # BIRT was already rendered
             if evt.tag != 'BIRT':
                 # for generic EVEN event, use TYPE as even name, we cannot
@@ -267,11 +852,9 @@ class Writer(object):
                     facts.append(pfmt.format(cause=evt.cause))
                 events += [(evt.date, facts)]
 
-        for fam in person.sub_tags("FAMS"):
-
-            spouse = _spouse(person, fam)
+        for fam, spouse, children in families:
 
-            for evt in family_events(fam):
+            for evt in self._record_events(fam).family_events():
                 facts = [self._tr.tr("FAMEVT." + evt.tag)]
                 if spouse:
                     note = u'{spouse}: {ref}'.format(
@@ -283,11 +866,11 @@ class Writer(object):
                           evt.note]
                 events += [(evt.date, facts)]
 
-            for child in fam.sub_tags("CHIL"):
-                for evt in indi_events(child, ['BIRT']):
+            for child in children:
+                for evt in self._record_events(child).tag('BIRT'):
                     pfmt = self._tr.tr(TR(u"CHILD.BORN {child}"),
                                        child.sex)
-                    childRef = self._person_ref(child, child.name.first)
+                    childRef = self._person_ref(child, first=True)
                     facts = [pfmt.format(child=childRef),
                              evt.value,
                              evt.place,
@@ -295,12 +878,9 @@ class Writer(object):
                     events += [(evt.date, facts)]
 
         def _date_key(event):
-            "Return event date, used for comparison"
-            date = event[0]
-            if date is None:
-                # use date in the future
-                date = model.DateValue()
-            return date
+            "Return event date ordering, used for comparison"
+            # events without dates are ordered after all dates
+            return self._date_key(event[0]).order
 
         # order events (only those with dates)
         sevents = []
@@ -341,17 +921,45 @@ class Writer(object):
 
         return None
 
-    def _name_freq(self, people):
-        """Returns name frequency table,list of (name, count) ordered by name.
+    @contextlib.contextmanager
+    def _decoding_image(self):
+        """Context manager used while image data is decoded, waits until
+        image limiter allows decoding if limiter is set.
         """
-        namefreq = {}
-        for person in people:
-            namefreq.setdefault(person.name.first, 0)
-            namefreq[person.name.first] += 1
-        namefreq = [(key, val) for key, val in namefreq.items()]
-        # sort ascending in name
-        namefreq.sort()
-        return namefreq
+        if self._image_limiter is None:
+            yield
+        else:
+            with self._image_limiter:
+                yield
+
+    def _parent_tree(self, person, units, **kwargs):
+        """Returns ancestor tree plotted with
+        :py:class:`~ged2doc.plotter.Plotter`.
+
+        Tree layout does not depend on language, if ``_tree_cache`` is set
+        then plotted trees are re-used for the same person and options.
+
+        :param person: Individual record
+        :param str units: Units for output lengths, e.g. "in" or "px".
+        :param kwargs: Keyword arguments for Plotter constructor.
+        :return: Value returned by
+            :py:meth:`~ged2doc.plotter.Plotter.parent_tree`.
+        """
+        cache = self._tree_cache
+        key = None
+        if cache is not None:
+            key = (person.xref_id, units, tuple(sorted(kwargs.items())))
+            try:
+                return cache[key]
+            except KeyError:
+                pass
+        # persons outside of subset have no sections to link to
+        plotter = Plotter(parents=self._parents, names=self._names,
+                          links=self._subset, **kwargs)
+        img = plotter.parent_tree(person, units)
+        if cache is not None:
+            cache[key] = img
+        return img
 
     def _formatIndiAttr(self, person, attrib, prefix="ATTR."):
         """Formatting of the individual's attributes.
@@ -380,11 +988,13 @@ class Writer(object):
         props = u", ".join(props)
         return (attr, props)
 
-    def _person_ref(self, person, name=None):
+    def _person_ref(self, person, name=None, first=False):
         """Returns encoded person reference.
 
         If person is None then None is returned. If name is not given then
-        properly formatted person full name is used.
+        properly formatted person full name (or first name if ``first`` is
+        ``True``) is used. For persons which are not included in output
+        document only the name is returned.
 
         Encoded reference consists of ASCII character SOH (\001) followed by
         reference ID, STX (\002), person name, and ETX (\003). This sequence
@@ -394,8 +1004,15 @@ class Writer(object):
         """
         if person is None:
             return None
+        names = self._name_cache()
+        if self._subset is not None and person.xref_id not in self._subset:
+            if name is not None:
+                return name
+            if first:
+                return names.first(person)
+            return names.name(person, self._name_fmt)
         if name is None:
-            name = name_fmt(person.name, self._name_fmt)
+            return names.ref(person, self._name_fmt, first)
         return utils.embed_ref(person.xref_id, name)
 
     def _render_prolog(self):
@@ -443,6 +1060,29 @@ class Writer(object):
         """
         raise NotImplemented()
 
+    def _begin_fragment(self):
+        """Start collecting output of one person section into a fragment
+        instead of output document.
+
+        Only needs to be implemented by sub-classes which set
+        ``_fragments_supported`` to ``True``.
+        """
+        raise NotImplementedError()
+
+    def _end_fragment(self):
+        """Stop collecting output into a fragment and return fragment.
+
+        :return: Fragment data, has to be picklable.
+        """
+        raise NotImplementedError()
+
+    def _replay_fragment(self, data):
+        """Add previously collected fragment to output document.
+
+        :param data: Fragment data returned from :py:meth:`_end_fragment`.
+        """
+        raise NotImplementedError()
+
     def _render_name_stat(self, n_total, n_females, n_males):
         """Produces summary table.
 
@@ -471,3 +1111,50 @@ class Writer(object):
         """Finalize output.
         """
         raise NotImplemented()
+
+
+def _fork_context():
+    """Returns multiprocessing context which forks worker processes, or
+    ``None`` if fork is not available.
+
+    Rendering workers need a copy of the writer and all parsed records,
+    these cannot be pickled so workers can only be forked.
+    """
+    if not hasattr(multiprocessing, "get_context"):
+        # Python 2 always forks on POSIX
+        return multiprocessing if os.name == "posix" else None
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    return multiprocessing.get_context("fork")
+
+
+_worker_args = None
+
+
+def _init_render_worker(writer, reader):
+    """Initialize worker process for rendering persons.
+    """
+    global _worker_args
+    _worker_args = (writer, reader)
+
+
+def _render_chunk(tasks, args=None):
+    """Render persons into fragments.
+
+    :param list tasks: List of (offset, image_data) tuples, image data is
+        empty for persons without image.
+    :param tuple args: Writer and reader instances, by default the ones
+        passed to :py:func:`_init_render_worker` are used.
+    :return: List of fragments.
+    """
+    writer, reader = args or _worker_args
+    result = []
+    for offset, image_data in tasks:
+        person = reader.read_record(offset)
+        writer._begin_fragment()
+        try:
+            writer._render_person_section(person, image_data)
+        finally:
+            data = writer._end_fragment()
+        result.append(data)
+    return result
@@ -11,8 +11,9 @@ with open('README.rst') as readme_file:
 with open('HISTORY.rst') as history_file:
     history = history_file.read()
 
+# reader and watch modules depend on ged4py internals, see comments there
 requirements = [
-    'ged4py>=0.1.7',
+    'ged4py>=0.1.13,<0.2',
     "pillow",
     "odfpy"
 ]
@@ -37,6 +38,8 @@ setup(
     entry_points={
         'console_scripts': [
             'ged2doc=ged2doc.cli:main',
+            'ged2doc-diff=ged2doc.diff:main',
+            'ged2doc-batch=ged2doc.batch:main',
         ]
     },
     include_package_data=True,
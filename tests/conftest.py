@@ -0,0 +1,9 @@
+"""Configuration of unit tests.
+"""
+
+import sys
+
+# asyncio API uses syntax which is only available in Python 3.5
+collect_ignore = []
+if sys.version_info < (3, 5):
+    collect_ignore.append("test_aio.py")
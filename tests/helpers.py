@@ -0,0 +1,60 @@
+"""Sample data and helper methods shared by unit tests.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import io
+import zipfile
+
+from ged2doc.input import make_file_locator
+
+
+# I4 - I1 = I2 - I3, I5 is not related
+GEDCOM = b"""0 HEAD
+1 CHAR UTF-8
+0 @I1@ INDI
+1 NAME John /Smith/
+1 SEX M
+1 BIRT
+2 DATE 1 JAN 1950
+1 FAMS @F1@
+1 FAMC @F0@
+0 @I2@ INDI
+1 NAME Jane /Smith/
+1 SEX F
+1 FAMS @F1@
+1 NOTE @N1@
+0 @I3@ INDI
+1 NAME Jim /Smith/
+1 FAMC @F1@
+0 @I4@ INDI
+1 NAME Joe /Smith/
+1 FAMS @F0@
+0 @I5@ INDI
+1 NAME Bob /Brown/
+0 @F0@ FAM
+1 HUSB @I4@
+1 CHIL @I1@
+0 @F1@ FAM
+1 HUSB @I1@
+1 WIFE @I2@
+1 CHIL @I3@
+1 MARR
+2 DATE 1975
+0 @N1@ NOTE Some note
+0 TRLR
+"""
+
+
+def flocator(data=GEDCOM):
+    """Returns file locator for GEDCOM data."""
+    return make_file_locator(io.BytesIO(data), "*.ged", None)
+
+
+def odt_contents(data):
+    """Returns contents of ODT document members."""
+    odt = zipfile.ZipFile(io.BytesIO(data))
+    # meta.xml has timestamps, odfpy adds namespace declarations to
+    # styles.xml depending on documents made earlier in the same process
+    return dict((name, odt.read(name)) for name in odt.namelist()
+                if name not in ("meta.xml", "styles.xml"))
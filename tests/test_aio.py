@@ -0,0 +1,153 @@
+"""Unit test for aio module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import io
+import threading
+import zipfile
+
+import pytest
+
+asyncio = pytest.importorskip("asyncio")
+
+from ged2doc import aio, api, odt_writer  # noqa: E402
+
+
+def _gedcom(count):
+    """Returns GEDCOM data with given number of persons."""
+    lines = ["0 HEAD", "1 CHAR UTF-8"]
+    for i in range(count):
+        lines += ["0 @I{0}@ INDI".format(i),
+                  "1 NAME Person{0} /Smith/".format(i),
+                  "1 SEX M"]
+    lines += ["0 TRLR", ""]
+    return "\n".join(lines).encode()
+
+
+def _content(data):
+    """Returns content.xml of ODT document."""
+    return zipfile.ZipFile(io.BytesIO(data)).read("content.xml")
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_001_convert_async():
+    """Test that conversions are limited and produce the same output."""
+
+    data = _gedcom(30)
+    expect = io.BytesIO()
+    api.convert(io.BytesIO(data), expect, dict(type="odt"))
+
+    lock = threading.Lock()
+    running = set()
+    max_running = [0]
+
+    def progress(count, total):
+        with lock:
+            running.add(threading.current_thread())
+            max_running[0] = max(max_running[0], len(running))
+        if count == total:
+            with lock:
+                running.discard(threading.current_thread())
+
+    converter = aio.Converter(max_conversions=2, batch_size=5)
+
+    async def main():
+        outputs = [io.BytesIO() for _ in range(5)]
+        options = dict(type="odt", progress=progress)
+        results = await asyncio.gather(*[
+            converter.convert(io.BytesIO(data), output, options)
+            for output in outputs])
+        return outputs, results
+
+    try:
+        outputs, results = _run(main())
+    finally:
+        converter.shutdown()
+    assert 1 <= max_running[0] <= 2
+    assert [stats.n_total for stats in results] == [30] * 5
+    for output in outputs:
+        assert _content(output.getvalue()) == _content(expect.getvalue())
+
+    output = io.BytesIO()
+    stats = _run(aio.convert_async(io.BytesIO(data), output,
+                                   dict(type="odt")))
+    assert stats.n_males == 30
+    assert _content(output.getvalue()) == _content(expect.getvalue())
+
+
+def test_002_cancel():
+    """Test cancellation of conversion."""
+
+    counts = []
+    started = threading.Event()
+
+    def progress(count, total):
+        counts.append(count)
+        started.set()
+
+    converter = aio.Converter(max_conversions=1)
+
+    async def main():
+        options = dict(type="odt", progress=progress)
+        task = asyncio.ensure_future(converter.convert(
+            io.BytesIO(_gedcom(2000)), io.BytesIO(), options))
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, started.wait)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # slot is released after conversion stopped
+        return await converter.convert(io.BytesIO(_gedcom(3)), io.BytesIO(),
+                                       dict(type="odt"))
+
+    try:
+        stats = _run(main())
+    finally:
+        converter.shutdown()
+    assert stats.n_total == 3
+    assert 0 < len(counts) < 2000
+
+
+def test_003_image_limiter(monkeypatch):
+    """Test that image limiter is given to writers."""
+
+    limiters = []
+
+    class Writer(odt_writer.OdtWriter):
+        def save(self):
+            limiters.append(self._image_limiter)
+            odt_writer.OdtWriter.save(self)
+
+    monkeypatch.setitem(api.DOC_TYPES, "odt", Writer)
+    converter = aio.Converter(max_image_decodes=1)
+    try:
+        _run(converter.convert(io.BytesIO(_gedcom(1)), io.BytesIO(),
+                               dict(type="odt")))
+    finally:
+        converter.shutdown()
+    assert limiters == [converter._images]
+    assert converter._images is not None
+
+
+def test_004_several_loops():
+    """Test shared converter used from consecutive event loops."""
+
+    data = _gedcom(20)
+
+    async def main():
+        results = await asyncio.gather(*[
+            aio.convert_async(io.BytesIO(data), io.BytesIO(),
+                              dict(type="odt"))
+            for _ in range(4)])
+        return [stats.n_total for stats in results]
+
+    assert _run(main()) == [20] * 4
+    assert _run(main()) == [20] * 4
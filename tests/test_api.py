@@ -0,0 +1,97 @@
+"""Unit test for api module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import io
+import threading
+import zipfile
+
+import pytest
+
+from ged2doc import api
+from ged2doc.i18n import I18N
+
+
+_GEDCOM = b"""0 HEAD
+1 CHAR UTF-8
+0 @I1@ INDI
+1 NAME John /Smith/
+1 SEX M
+1 BIRT
+2 DATE 1 JAN 1950
+1 DEAT
+2 DATE 2010
+1 FAMS @F1@
+0 @I2@ INDI
+1 NAME Jane /Smith/
+1 SEX F
+1 FAMS @F1@
+0 @I3@ INDI
+1 NAME Jim /Smith/
+1 SEX M
+1 FAMC @F1@
+0 @F1@ FAM
+1 HUSB @I1@
+1 WIFE @I2@
+1 CHIL @I3@
+0 TRLR
+"""
+
+
+def _convert(lang):
+    """Returns content.xml of ODT document."""
+    output = io.BytesIO()
+    api.convert(io.BytesIO(_GEDCOM), output, dict(type="odt", lang=lang))
+    return zipfile.ZipFile(io.BytesIO(output.getvalue())).read("content.xml")
+
+
+def test_001_convert():
+    """Test convert method."""
+
+    output = io.BytesIO()
+    options = dict(type="odt", lang="en", tree_width=3)
+    stats = api.convert(io.BytesIO(_GEDCOM), output, options)
+    assert options == dict(type="odt", lang="en", tree_width=3)
+    assert (stats.n_total, stats.n_females, stats.n_males) == (3, 1, 2)
+    assert stats.name_freq("M") == [("Jim", 1), ("John", 1)]
+    assert stats.lifespans() == [(60, 1)]
+    assert b"John" in zipfile.ZipFile(output).read("content.xml")
+
+    stats = api.convert(io.BytesIO(_GEDCOM), io.BytesIO(),
+                        dict(type="odt", make_stat=False))
+    assert stats is None
+
+    with pytest.raises(ValueError):
+        api.convert(io.BytesIO(_GEDCOM), io.BytesIO())
+    with pytest.raises(ValueError):
+        api.convert(io.BytesIO(_GEDCOM), "output.pdf")
+    with pytest.raises(ValueError):
+        api.convert(io.BytesIO(_GEDCOM), io.BytesIO(), dict(type="pdf"))
+
+
+def test_002_threads():
+    """Test concurrent conversions."""
+
+    langs = ["en", "ru", "pl", "en"] * 2
+    expect = dict((lang, _convert(lang)) for lang in set(langs))
+
+    results = [None] * len(langs)
+
+    def run(index):
+        results[index] = _convert(langs[index])
+
+    threads = [threading.Thread(target=run, args=(i,))
+               for i in range(len(langs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [expect[lang] for lang in langs]
+
+
+def test_003_shared_catalogs():
+    """Test that translations are loaded once."""
+
+    assert I18N("ru")._tr is I18N("ru", "D.M.Y")._tr
+    assert I18N("en")._tr is not I18N("ru")._tr
@@ -0,0 +1,120 @@
+"""Unit test for batch module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import io
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+
+import pytest
+
+from ged2doc import api, batch
+
+
+_GEDCOM = b"""0 HEAD
+1 CHAR UTF-8
+0 @I1@ INDI
+1 NAME John /Smith/
+1 SEX M
+0 @I2@ INDI
+1 NAME Jane /Smith/
+1 SEX F
+0 TRLR
+"""
+
+
+def test_001_read_manifest():
+    """Test read_manifest method."""
+
+    manifest = io.StringIO(u"""# comment
+a.ged a.html
+
+"b c.zip"   'b c.odt'
+""")
+    assert batch.read_manifest(manifest) == [("a.ged", "a.html"),
+                                             ("b c.zip", "b c.odt")]
+
+    with pytest.raises(ValueError):
+        batch.read_manifest(io.StringIO(u"a.ged\n"))
+    with pytest.raises(ValueError):
+        batch.read_manifest(io.StringIO(u"a.ged b.odt c.odt\n"))
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_002_main(jobs):
+    """Test main method."""
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        paths = [os.path.join(tmpdir, name)
+                 for name in ("a.ged", "b.ged", "missing.ged")]
+        for path in paths[:2]:
+            with open(path, "wb") as output:
+                output.write(_GEDCOM)
+        manifest = os.path.join(tmpdir, "manifest.txt")
+        summary = os.path.join(tmpdir, "summary.txt")
+        with io.open(manifest, "w") as output:
+            for path in paths:
+                output.write(u"'{0}' '{0}.odt'\n".format(path))
+
+        status = batch.main(["-j", str(jobs), "-l", "en", "--summary",
+                             summary, manifest])
+        assert status == 1
+
+        with io.open(summary) as input:
+            lines = [line.rstrip(u"\n").split(u"\t") for line in input]
+        assert lines[0] == [u"status", u"seconds", u"input", u"output",
+                            u"error"]
+        assert [line[0] for line in lines[1:]] == [u"ok", u"ok", u"error"]
+        assert [line[2] for line in lines[1:]] == paths
+        assert lines[1][4] == u""
+        assert lines[3][4] != u""
+
+        for path in paths[:2]:
+            content = zipfile.ZipFile(path + ".odt").read("content.xml")
+            assert b"Jane" in content
+        assert not os.path.exists(paths[2] + ".odt")
+
+        with pytest.raises(SystemExit):
+            batch.main(["-l", "en,ru", manifest])
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_003_worker_failures(monkeypatch):
+    """Test that crashed and hanging conversions are reported."""
+
+    if batch._fork_context() is None:
+        pytest.skip("workers have to be forked to see patched convert()")
+
+    convert = api.convert
+
+    def patched(input, output, options=None):
+        if input == "crash.ged":
+            os._exit(3)
+        if input == "hang.ged":
+            time.sleep(60)
+        return convert(io.BytesIO(_GEDCOM), output, options)
+
+    monkeypatch.setattr(api, "convert", patched)
+    tmpdir = tempfile.mkdtemp()
+    try:
+        names = ["a.ged", "crash.ged", "hang.ged", "b.ged"]
+        tasks = [(name, os.path.join(tmpdir, name + ".odt"))
+                 for name in names]
+        start = time.time()
+        results = batch.run_batch(tasks, dict(type="odt"), jobs=2,
+                                  timeout=2)
+        assert time.time() - start < 30
+        assert [result.input for result in results] == names
+        assert [result.status for result in results] == \
+            ["ok", "error", "error", "ok"]
+        assert "exit code 3" in results[1].error
+        assert "Timed out" in results[2].error
+        assert results[2].seconds >= 2
+    finally:
+        shutil.rmtree(tmpdir)
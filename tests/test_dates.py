@@ -0,0 +1,92 @@
+"""Unit test for dates module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import itertools
+
+from ged2doc import dates
+from ged4py.detail.date import DateValue
+
+
+_DATES = ["1950", "DEC 1950", "31 DEC 1950", "1 JAN 1950", "BET 1950 AND 1960",
+          "FROM 1949 TO 1951", "ABT 1900", "BEF 1900", "AFT 1900", "1000B.C.",
+          "FEB 1699/00", "@#DJULIAN@ 1 JAN 1950", "@#DHEBREW@ 5700",
+          "@#DFRENCH R@ VEND 3", "(phrase)", "INT 1900 (phrase)", "",
+          "31 FEB 1900", "XYZ 1900"]
+
+
+def test_001_jdn():
+    """Test day numbers."""
+
+    key = dates.date_key(DateValue.parse("1 JAN 2000"))
+    assert key.earliest == key.latest == 2451545
+    # first day of Gregorian calendar follows last day of Julian
+    key = dates.date_key(DateValue.parse("@#DJULIAN@ 4 OCT 1582"))
+    assert key.earliest == 2299160
+    key = dates.date_key(DateValue.parse("15 OCT 1582"))
+    assert key.earliest == 2299161
+
+    key = dates.date_key(DateValue.parse("1900"))
+    assert key.latest - key.earliest == 364
+    key = dates.date_key(DateValue.parse("FEB 1900"))
+    assert key.latest - key.earliest == 27
+    key = dates.date_key(DateValue.parse("@#DJULIAN@ FEB 1900"))
+    assert key.latest - key.earliest == 28
+    key = dates.date_key(DateValue.parse("1B.C."))
+    first_day = dates.date_key(DateValue.parse("1 JAN 1")).earliest
+    assert key.latest + 1 == first_day
+
+
+def test_002_date_key():
+    """Test qualifiers and ranges."""
+
+    key = dates.date_key(DateValue.parse("31 DEC 1950"))
+    assert key == ((1950, 12, 31), 2433647, 2433647, dates.QUALIFIER_EXACT)
+
+    key = dates.date_key(DateValue.parse("BET 1950 AND 1960"))
+    assert key.order == (1950, 99, 99)
+    assert key.earliest == dates.date_key(DateValue.parse("1950")).earliest
+    assert key.latest == dates.date_key(DateValue.parse("1960")).latest
+    assert key.qualifier == dates.QUALIFIER_RANGE
+
+    key = dates.date_key(DateValue.parse("BEF 1900"))
+    assert key.earliest is None and key.latest is not None
+    assert key.qualifier == dates.QUALIFIER_BEFORE
+    key = dates.date_key(DateValue.parse("AFT 1900"))
+    assert key.earliest is not None and key.latest is None
+    assert key.qualifier == dates.QUALIFIER_AFTER
+
+    key = dates.date_key(DateValue.parse("@#DHEBREW@ 5700"))
+    assert key == ((5700, 99, 99), None, None, dates.QUALIFIER_EXACT)
+    key = dates.date_key(DateValue.parse("(phrase)"))
+    assert key == ((9999, 99, 99), None, None, dates.QUALIFIER_PHRASE)
+    assert dates.date_key(None).qualifier == dates.QUALIFIER_NONE
+
+
+def test_003_order():
+    """Test that ordering is the same as ordering of DateValue."""
+
+    values = [DateValue.parse(date) for date in _DATES] + [DateValue()]
+    for date1, date2 in itertools.product(values, values):
+        key1 = dates.date_key(date1).order
+        key2 = dates.date_key(date2).order
+        assert (key1 < key2) == (date1 < date2)
+        assert (key1 == key2) == (date1 == date2)
+    assert dates.date_key(None).order == dates.date_key(DateValue()).order
+
+
+def test_004_cache():
+    """Test DateKeyCache class."""
+
+    cache = dates.DateKeyCache()
+    for date in _DATES:
+        key = cache.get(DateValue.parse(date))
+        assert key == dates.date_key(DateValue.parse(date))
+        # same text gives the same instance
+        assert cache.get(DateValue.parse(date)) is key
+    assert len(cache._keys) == len(_DATES)
+    assert cache.get(None) == dates.date_key(None)
+    # calendar is a part of cache key
+    assert cache.get(DateValue.parse("@#DJULIAN@ 1950")) != \
+        cache.get(DateValue.parse("1950"))
@@ -0,0 +1,80 @@
+"""Unit test for diff module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import io
+import os
+import shutil
+import tempfile
+
+from ged2doc import diff
+from ged2doc.input import make_file_locator
+
+
+_GEDCOM = b"""0 HEAD
+1 CHAR UTF-8
+0 @I1@ INDI
+1 NAME John /Smith/
+0 @I2@ INDI
+1 NAME Jane /Smith/
+0 @I3@ INDI
+1 NAME Jim /Smith/
+0 @F1@ FAM
+1 HUSB @I1@
+1 WIFE @I2@
+0 @S1@ SOUR
+1 TITL Book
+0 TRLR
+"""
+
+
+def test_001_diff_hashes():
+    """Test diff_hashes method."""
+
+    old = {"@I1@": ("INDI", "1"), "@I2@": ("INDI", "2"),
+           "@F1@": ("FAM", "3"), "@S1@": ("SOUR", "4")}
+    new = {"@I1@": ("INDI", "1"), "@I3@": ("INDI", "5"),
+           "@F1@": ("FAM", "6"), "@S1@": ("SOUR", "7")}
+    result = diff.diff_hashes(old, new)
+    assert result.added == [("INDI", "@I3@")]
+    assert result.removed == [("INDI", "@I2@")]
+    assert result.modified == [("FAM", "@F1@")]
+
+    result = diff.diff_hashes(old, new, None)
+    assert result.modified == [("FAM", "@F1@"), ("SOUR", "@S1@")]
+
+    assert not any(diff.diff_hashes(old, old))
+
+
+def test_002_diff_files():
+    """Test diff_files method."""
+
+    new_data = (_GEDCOM.replace(b"0 @I3@ INDI\n1 NAME Jim /Smith/\n", b"")
+                .replace(b"1 WIFE @I2@\n", b"1 WIFE @I2@\n1 CHIL @I4@\n")
+                .replace(b"0 TRLR", b"0 @I4@ INDI\n1 NAME Joe\n0 TRLR")
+                .replace(b"Book", b"Journal"))
+    old = make_file_locator(io.BytesIO(_GEDCOM), "", None)
+    new = make_file_locator(io.BytesIO(new_data), "", None)
+    result = diff.diff_files(old, new)
+    assert result.added == [("INDI", "@I4@")]
+    assert result.removed == [("INDI", "@I3@")]
+    assert result.modified == [("FAM", "@F1@")]
+
+
+def test_003_main(capsys):
+    """Test main method."""
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        old = os.path.join(tmpdir, "diff")
+        new = os.path.join(tmpdir, "new.ged")
+        with open(old, "wb") as output:
+            output.write(_GEDCOM)
+        with open(new, "wb") as output:
+            output.write(_GEDCOM.replace(b"Jim", b"James"))
+        assert diff.main([old, old]) == 0
+        assert diff.main([old, new]) == 1
+        assert capsys.readouterr().out == "modified INDI @I3@\n"
+    finally:
+        shutil.rmtree(tmpdir)
@@ -92,3 +92,32 @@ def test_003_family_events():
     evts = events.family_events(fam, ['MARR'])
     assert len(evts) == 1
     assert evts[0].tag == 'MARR'
+
+
+def test_004_record_events():
+    """Test RecordEvents and EventCache classes."""
+
+    dialect = model.DIALECT_MYHERITAGE
+
+    rtype = model.make_record(2, None, "TYPE", "SomeType", [], 0, dialect, None).freeze()
+    plac1 = model.make_record(2, None, "PLAC", "Place 1", [], 0, dialect, None).freeze()
+    plac2 = model.make_record(2, None, "PLAC", "Place 2", [], 0, dialect, None).freeze()
+    rec1 = model.make_record(1, None, "BIRT", "", [plac1, plac2], 0, dialect, None).freeze()
+    rec2 = model.make_record(1, None, "OCCU", "Job 1", [rtype], 0, dialect, None).freeze()
+    rec3 = model.make_record(1, None, "DEAT", "Y", [], 0, dialect, None).freeze()
+    rec4 = model.make_record(1, None, "OCCU", "Job 2", [], 0, dialect, None).freeze()
+    rec5 = model.make_record(1, None, "MARR", "", [], 0, dialect, None).freeze()
+    person = model.make_record(0, "@I1@", "INDI", "", [rec1, rec2, rec3, rec4, rec5], 0, dialect, None).freeze()
+
+    revents = events.RecordEvents(person)
+    assert [evt.tag for evt in revents.events] == ['BIRT', 'OCCU', 'DEAT', 'OCCU', 'MARR']
+    assert revents.indi_events() == events.indi_events(person)
+    assert revents.indi_attributes() == events.indi_attributes(person)
+    assert [evt.value for evt in revents.tag('OCCU')] == ['Job 1', 'Job 2']
+    assert revents.tag('OCCU')[0].type == 'SomeType'
+    assert revents.tag('EDUC') == []
+    # first sub-record is used, like in sub_tag_value()
+    assert revents.tag('BIRT')[0].place == 'Place 1'
+
+    cache = events.EventCache()
+    assert cache.get(person) is cache.get(person)
@@ -0,0 +1,110 @@
+"""Unit test for fragments module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import io
+import os
+import shutil
+import tempfile
+
+from ged2doc import fragments, reader, scan
+
+from . import helpers
+
+
+def _keys(data, generations=2, path="/nonexistent/fragments"):
+    """Returns dictionary with fragment keys for all persons."""
+    greader = reader.CachingReader(io.BytesIO(data))
+    hashes = scan.record_hashes(io.BytesIO(data))
+    cache = fragments.FragmentCache(path, hashes, generations)
+    return dict((indi.xref_id, cache.key(indi))
+                for indi in greader.records0("INDI"))
+
+
+def test_001_keys():
+    """Test dependencies of fragment keys."""
+
+    keys = _keys(helpers.GEDCOM)
+    assert None not in keys.values()
+    assert len(set(keys.values())) == 5
+
+    # unrelated person changes
+    keys2 = _keys(helpers.GEDCOM.replace(b"Bob /Brown/", b"Bill /Brown/"))
+    changed = set(key for key in keys if keys[key] != keys2[key])
+    assert changed == set(["@I5@"])
+
+    # grandparent changes, visible to grandchild with two generations
+    keys2 = _keys(helpers.GEDCOM.replace(b"Joe /Smith/", b"Joseph /Smith/"))
+    changed = set(key for key in keys if keys[key] != keys2[key])
+    assert changed == set(["@I1@", "@I3@", "@I4@"])
+
+    # only one generation of ancestors
+    keys1 = _keys(helpers.GEDCOM, 1)
+    keys2 = _keys(helpers.GEDCOM.replace(b"Joe /Smith/", b"Joseph /Smith/"), 1)
+    changed = set(key for key in keys1 if keys1[key] != keys2[key])
+    assert changed == set(["@I1@", "@I4@"])
+
+    # child changes, visible to parents
+    keys2 = _keys(helpers.GEDCOM.replace(b"Jim /Smith/", b"James /Smith/"))
+    changed = set(key for key in keys if keys[key] != keys2[key])
+    assert changed == set(["@I1@", "@I2@", "@I3@"])
+
+    # note record changes, visible to person who refers to it and to
+    # everybody who depends on that person
+    keys2 = _keys(helpers.GEDCOM.replace(b"Some note", b"Other note"))
+    changed = set(key for key in keys if keys[key] != keys2[key])
+    assert changed == set(["@I1@", "@I2@", "@I3@"])
+
+    # line terminators do not matter
+    keys2 = _keys(helpers.GEDCOM.replace(b"\n", b"\r\n"))
+    assert keys2 == keys
+
+
+def test_002_cache():
+    """Test storing fragments in a cache file."""
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmpdir, "test.fragments")
+        greader = reader.CachingReader(io.BytesIO(helpers.GEDCOM))
+        hashes = scan.record_hashes(io.BytesIO(helpers.GEDCOM))
+        john, jane = greader.record("@I1@"), greader.record("@I2@")
+
+        cache = fragments.FragmentCache(path, hashes, 4)
+        key = cache.key(john)
+        assert cache.get("@I1@", key) is None
+        cache.put("@I1@", key, "John")
+        cache.put("@I2@", cache.key(jane), "Jane")
+        cache.put("@I3@", None, "Jim")
+        assert (cache.hits, cache.misses) == (0, 1)
+        cache.save()
+
+        cache = fragments.FragmentCache(path, hashes, 4)
+        assert cache.get("@I1@", key) == "John"
+        assert cache.get("@I1@", b"other key") is None
+        assert cache.get("@I3@", None) is None
+        assert (cache.hits, cache.misses) == (1, 2)
+        cache.save()
+
+        # only fragments used in previous run are kept
+        cache = fragments.FragmentCache(path, hashes, 4)
+        assert cache.get("@I1@", key) == "John"
+        assert cache.get("@I2@", cache.key(jane)) is None
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_003_dangling_pointers():
+    """Test keys of persons with dangling family pointers."""
+
+    data = helpers.GEDCOM.replace(b"1 FAMC @F0@\n", b"1 FAMC @F9@\n")
+    data = data.replace(b"1 NAME Bob /Brown/\n",
+                        b"1 NAME Bob /Brown/\n1 FAMS @F8@\n")
+    keys = _keys(data)
+    assert None not in keys.values()
+
+    # dangling pointer is a part of person record
+    keys2 = _keys(data.replace(b"@F8@", b"@F7@"))
+    changed = set(key for key in keys if keys[key] != keys2[key])
+    assert changed == set(["@I5@"])
@@ -0,0 +1,105 @@
+"""Unit test for graph module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import io
+
+import pytest
+
+from ged2doc import graph
+from ged2doc.reader import CachingReader
+
+
+# I4 - I1 = I2 - I3, I5 is not related, I3 refers to missing family
+_GEDCOM = b"""0 HEAD
+1 CHAR UTF-8
+0 @I1@ INDI
+1 NAME John /Smith/
+1 SEX M
+1 FAMS @F1@
+1 FAMC @F0@
+0 @I2@ INDI
+1 NAME Jane /Smith/
+1 FAMS @F1@
+0 @I3@ INDI
+1 NAME Jim /Smith/
+1 FAMC @F1@
+1 FAMS @F9@
+0 @I4@ INDI
+1 NAME Joe /Smith/
+1 FAMS @F0@
+0 @I5@ INDI
+1 NAME Bob /Brown/
+0 @F0@ FAM
+1 HUSB @I4@
+1 CHIL @I1@
+0 @F1@ FAM
+1 HUSB @I1@
+1 WIFE @I2@
+1 CHIL @I3@
+0 TRLR
+"""
+
+
+def test_001_relations():
+    """Test navigation methods."""
+
+    fgraph = graph.FamilyGraph(CachingReader(io.BytesIO(_GEDCOM)))
+    assert fgraph.parents("@I3@") == ["@I1@", "@I2@"]
+    assert fgraph.parents("@I4@") == []
+    assert fgraph.spouses("@I1@") == ["@I2@"]
+    assert fgraph.spouses("@I3@") == []
+    assert fgraph.children("@I1@") == ["@I3@"]
+    assert fgraph.children("@I99@") == []
+
+
+def test_002_relatives():
+    """Test breadth-first search."""
+
+    greader = CachingReader(io.BytesIO(_GEDCOM))
+    fgraph = graph.FamilyGraph(greader)
+    assert fgraph.relatives("@I3@") == {"@I3@": 0, "@I1@": 1, "@I2@": 1,
+                                        "@I4@": 2}
+    assert fgraph.relatives("@I3@", radius=1) == {"@I3@": 0, "@I1@": 1,
+                                                  "@I2@": 1}
+    assert fgraph.relatives("@I3@", radius=0) == {"@I3@": 0}
+    assert fgraph.relatives("@I2@", relation=graph.RELATION_ANCESTORS) == \
+        {"@I2@": 0}
+    assert fgraph.relatives("@I4@", relation=graph.RELATION_DESCENDANTS) \
+        == {"@I4@": 0, "@I1@": 1, "@I3@": 2}
+    # records of unrelated persons are not read
+    assert "@I5@" not in fgraph._persons
+    assert fgraph.relatives("@I5@") == {"@I5@": 0}
+
+    with pytest.raises(ValueError):
+        fgraph.relatives("@I1@", relation="cousins")
+
+
+def test_003_build():
+    """Test complete index and family queries."""
+
+    greader = CachingReader(io.BytesIO(_GEDCOM))
+    fgraph = graph.FamilyGraph(greader)
+    fgraph.build()
+    assert sorted(fgraph._persons) == ["@I1@", "@I2@", "@I3@", "@I4@",
+                                       "@I5@"]
+    assert sorted(fgraph._families) == ["@F0@", "@F1@"]
+
+    # queries do not read records
+    misses = greader.cache.misses
+    assert fgraph.mother("@I3@") == "@I2@"
+    assert fgraph.father("@I3@") == "@I1@"
+    assert fgraph.mother("@I1@") is None
+    assert fgraph.father("@I1@") == "@I4@"
+    assert fgraph.father("@I4@") is None
+    assert fgraph.families("@I1@") == [("@F1@", "@I2@", ["@I3@"])]
+    assert fgraph.families("@I4@") == [("@F0@", None, ["@I1@"])]
+    assert fgraph.sex("@I1@") == "M"
+    assert fgraph.sex("@I2@") == "U"
+    assert greader.cache.misses == misses
+
+    # missing family has no spouses and children
+    assert fgraph.families("@I3@") == [("@F9@", None, [])]
+    assert fgraph.families("@I3@") == [("@F9@", None, [])]
+    assert fgraph.sex("@I99@") is None
@@ -5,13 +5,22 @@ from __future__ import absolute_import, division, print_function
 
 __all__ = []
 
+import bz2
+import gzip
+import io
 import os
 import pytest
 import shutil
 import tempfile
 import zipfile
 
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
 from ged2doc import input as ged2doc_input
+from ged2doc.mmapfile import MappedFile
 
 @pytest.fixture
 def files_on_disk():
@@ -103,6 +112,12 @@ def test_FSLocator_name(files_on_disk):
 
     loc = ged2doc_input._FSLocator(os.path.join(tmpdir, "xxx.ged"), tmpdir)
     checkFilesLoc(loc)
+    assert isinstance(loc.open_gedcom(), MappedFile)
+
+    loc = ged2doc_input._FSLocator(os.path.join(tmpdir, "xxx.ged"), tmpdir,
+                                   use_mmap=False)
+    checkFilesLoc(loc)
+    assert not isinstance(loc.open_gedcom(), MappedFile)
 
 
 def test_FSLocator_fobj(files_on_disk):
@@ -184,3 +199,130 @@ def test_make_file_locator_zip_fobj(files_in_zip):
         loc = ged2doc_input.make_file_locator(fobj, "*.ged", None)
         assert isinstance(loc, ged2doc_input._ZipLocator)
         checkFilesLoc(loc)
+
+
+def test_ZipLocator_gedcom_modes():
+    """Test for different ways of opening GEDCOM file in _ZipLocator.
+    """
+    data = b"0 HEAD\n0 TRLR\n" * 100
+    fd, aname = tempfile.mkstemp(".zip")
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(aname, "w") as archive:
+            archive.writestr("dir1/one.jpg", b"one")
+            archive.writestr("stored.ged", data, zipfile.ZIP_STORED)
+            archive.writestr("deflated.ged", data, zipfile.ZIP_DEFLATED)
+
+        # stored file is mapped
+        loc = ged2doc_input._ZipLocator(aname, "stored.ged", None)
+        ged = loc.open_gedcom()
+        assert isinstance(ged, MappedFile)
+        assert ged.read() == data
+        ged.seek(7)
+        assert ged.readline() == b"0 TRLR\n"
+
+        # unless memory mapping is disabled
+        loc = ged2doc_input._ZipLocator(aname, "stored.ged", None,
+                                        use_mmap=False)
+        ged = loc.open_gedcom()
+        assert not isinstance(ged, MappedFile)
+        assert ged.read() == data
+
+        # compressed file is decompressed into memory
+        loc = ged2doc_input._ZipLocator(aname, "deflated.ged", None)
+        ged = loc.open_gedcom()
+        assert isinstance(ged, io.BytesIO)
+        assert ged.read() == data
+
+        # or into temporary file if it is too large
+        loc = ged2doc_input._ZipLocator(aname, "deflated.ged", None,
+                                        memory_limit=100)
+        ged = loc.open_gedcom()
+        assert not isinstance(ged, io.BytesIO)
+        assert ged.read() == data
+
+        # file object cannot be mapped
+        with open(aname, 'rb') as fobj:
+            loc = ged2doc_input._ZipLocator(fobj, "stored.ged", None)
+            ged = loc.open_gedcom()
+            assert isinstance(ged, io.BytesIO)
+            assert ged.read() == data
+    finally:
+        os.unlink(aname)
+
+
+def _gzip(data):
+    """Compress data with gzip, gzip.compress() is missing in Python 2."""
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode="wb") as fobj:
+        fobj.write(data)
+    return buf.getvalue()
+
+
+def _bzip2(data):
+    """Compress data with bzip2, bz2.compress() is missing in Python 2."""
+    compressor = bz2.BZ2Compressor()
+    return compressor.compress(data) + compressor.flush()
+
+
+class _Pipe(object):
+    """Non-seekable stream which returns data in small pieces.
+    """
+
+    def __init__(self, data):
+        self._data = data
+
+    def read(self, size=-1):
+        size = min(size, 3) if size >= 0 else 3
+        data, self._data = self._data[:size], self._data[size:]
+        return data
+
+
+def test_make_file_locator_stream(files_on_disk):
+    """Test for make_file_locator with non-seekable and compressed streams.
+    """
+    tmpdir = files_on_disk
+    data = b"0 HEAD\n0 TRLR\n" * 100
+
+    loc = ged2doc_input.make_file_locator(_Pipe(data), "", tmpdir)
+    assert isinstance(loc, ged2doc_input._FSLocator)
+    ged = loc.open_gedcom()
+    assert isinstance(ged, io.BytesIO)
+    assert ged.read() == data
+    assert loc.open_image("dir2/two.gif").read() == b"dir2/two.gif"
+
+    # small limit makes temporary file
+    loc = ged2doc_input.make_file_locator(_Pipe(data), "", tmpdir,
+                                          spool_memory_limit=100)
+    ged = loc.open_gedcom()
+    assert not isinstance(ged, io.BytesIO)
+    assert ged.read() == data
+
+    compressors = [_gzip, _bzip2]
+    if lzma is not None:
+        compressors.append(lzma.compress)
+    for compress in compressors:
+        cdata = compress(data)
+        loc = ged2doc_input.make_file_locator(_Pipe(cdata), "", tmpdir)
+        assert loc.open_gedcom().read() == data
+        loc = ged2doc_input.make_file_locator(io.BytesIO(cdata), "", tmpdir)
+        assert loc.open_gedcom().read() == data
+
+        # compressed file on disk
+        path = os.path.join(tmpdir, "yyy.ged.z")
+        with open(path, "wb") as fobj:
+            fobj.write(cdata)
+        loc = ged2doc_input.make_file_locator(path, "", None)
+        assert loc.open_gedcom().read() == data
+        assert loc.open_image("dir1/two.gif").read() == b"dir1/two.gif"
+
+
+def test_make_file_locator_zip_stream(files_in_zip):
+    """Test for make_file_locator with zip archive in non-seekable stream.
+    """
+    with open(files_in_zip, 'rb') as fobj:
+        data = fobj.read()
+
+    loc = ged2doc_input.make_file_locator(_Pipe(data), "*.ged", None)
+    assert isinstance(loc, ged2doc_input._ZipLocator)
+    checkFilesLoc(loc)
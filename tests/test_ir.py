@@ -0,0 +1,131 @@
+"""Unit test for ir module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import io
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from ged2doc.i18n import I18N
+from ged2doc import ir
+from ged2doc.ir import IRReader, IRWriter
+from ged2doc.odt_writer import OdtWriter
+
+from . import helpers
+
+
+def test_001_round_trip():
+    """Test that rendering from IR produces the same document."""
+
+    tr = I18N("en", "D.M.Y")
+
+    output = io.BytesIO()
+    OdtWriter(helpers.flocator(), output, tr).save()
+    expect = helpers.odt_contents(output.getvalue())
+    assert b"01.01.1950" in expect["content.xml"]
+    assert any(name.endswith(".svg") for name in expect)
+
+    irdata = io.BytesIO()
+    IRWriter(helpers.flocator(), irdata, tr).save()
+    lines = irdata.getvalue().splitlines()
+    header = json.loads(lines[0].decode())
+    assert header["language"] == "en"
+    assert header["date_format"] == "D.M.Y"
+    assert json.loads(lines[-1].decode()) == ["end"]
+
+    reader = IRReader(io.BytesIO(irdata.getvalue()))
+    assert reader.language == "en"
+    assert reader.date_format == "D.M.Y"
+    assert reader.tree_width == 4
+    output = io.BytesIO()
+    reader.render(OdtWriter(None, output,
+                            I18N(reader.language, reader.date_format)))
+    assert helpers.odt_contents(output.getvalue()) == expect
+
+
+def test_002_errors():
+    """Test reading invalid IR."""
+
+    with pytest.raises(ValueError):
+        IRReader(io.BytesIO(helpers.GEDCOM))
+    with pytest.raises(ValueError):
+        IRReader(io.BytesIO(b'{"format": "ged2doc-ir", "version": 1000}\n'))
+
+    irdata = io.BytesIO()
+    IRWriter(helpers.flocator(), irdata, I18N("en")).save()
+    truncated = irdata.getvalue().splitlines(True)[:-1]
+    reader = IRReader(io.BytesIO(b"".join(truncated)))
+    with pytest.raises(ValueError):
+        reader.render(OdtWriter(None, io.BytesIO(), I18N("en")))
+
+
+def test_003_tree_names():
+    """Test that ancestor trees use the same names as documents."""
+
+    from ged2doc.name import FMT_SURNAME_FIRST, FMT_MAIDEN, NameCache
+
+    tr = I18N("en")
+    name_fmt = FMT_SURNAME_FIRST | FMT_MAIDEN
+
+    output = io.BytesIO()
+    OdtWriter(helpers.flocator(), output, tr, name_fmt=name_fmt).save()
+    expect = helpers.odt_contents(output.getvalue())
+
+    irdata = io.BytesIO()
+    IRWriter(helpers.flocator(), irdata, tr, name_fmt=name_fmt).save()
+    reader = IRReader(io.BytesIO(irdata.getvalue()))
+    output = io.BytesIO()
+    reader.render(OdtWriter(None, output, tr, name_fmt=name_fmt))
+    assert helpers.odt_contents(output.getvalue()) == expect
+
+    # names in trees come from name cache of the writer
+    class Names(NameCache):
+        def get(self, person):
+            name = NameCache.get(self, person)
+            return ir._Name(name.first.upper(), name.surname, name.maiden)
+
+    writer = IRWriter(helpers.flocator(), io.BytesIO(), tr)
+    writer.save()
+    writer._names = Names()
+    person = writer._graph.reader.record("@I3@")
+    tree = ir._dump_tree(person, 2, writer._parents, writer._name_cache())
+    assert tree[:4] == ["@I3@", "U", "JIM", "Smith"]
+    assert tree[5][2] == "JANE"
+
+
+def test_004_close(monkeypatch):
+    """Test that IR file opened by reader is closed."""
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmpdir, "tree.ir")
+        IRWriter(helpers.flocator(), path, I18N("en")).save()
+        reader = IRReader(path)
+        reader.render(OdtWriter(None, io.BytesIO(), I18N("en")))
+        assert reader._input.closed
+
+        # file object given by caller is not closed
+        with open(path, "rb") as irfile:
+            reader = IRReader(irfile)
+            reader.render(OdtWriter(None, io.BytesIO(), I18N("en")))
+            assert not irfile.closed
+
+        with open(path, "wb") as irfile:
+            irfile.write(b"not IR\n")
+        opened = []
+
+        def patched(*args):
+            opened.append(io.open(*args))
+            return opened[-1]
+
+        monkeypatch.setattr(ir, "open", patched, raising=False)
+        with pytest.raises(ValueError):
+            IRReader(path)
+        assert opened[0].closed
+    finally:
+        shutil.rmtree(tmpdir)
@@ -0,0 +1,72 @@
+"""Unit test for mmapfile module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import io
+import os
+import tempfile
+
+import pytest
+
+from ged2doc.mmapfile import MappedFile
+
+
+@pytest.fixture
+def data_file():
+    """Fixture that makes a file with mixed line terminators
+    """
+    fd, path = tempfile.mkstemp(".ged")
+    with os.fdopen(fd, "wb") as fobj:
+        fobj.write(b"0 HEAD\r\n1 CHAR UTF-8\r0 @I1@ INDI\n0 TRLR")
+
+    yield path
+
+    os.unlink(path)
+
+
+def test_001_read(data_file):
+    """Test read/seek methods."""
+
+    mfile = MappedFile(data_file)
+    assert mfile.readable()
+    assert mfile.seekable()
+    assert mfile.read(6) == b"0 HEAD"
+    assert mfile.tell() == 6
+    assert mfile.read() == b"\r\n1 CHAR UTF-8\r0 @I1@ INDI\n0 TRLR"
+    assert mfile.read() == b""
+    assert mfile.seek(-4, os.SEEK_END) == 35
+    assert mfile.read(100) == b"TRLR"
+    assert mfile.seek(2) == 2
+    assert mfile.seek(2, os.SEEK_CUR) == 4
+    assert mfile.read(2) == b"AD"
+
+    buf = bytearray(4)
+    mfile.seek(0)
+    assert mfile.readinto(buf) == 4
+    assert buf == b"0 HE"
+
+    mfile.close()
+    assert mfile.closed
+
+
+def test_002_readline(data_file):
+    """Test readline method."""
+
+    mfile = MappedFile(data_file)
+    assert mfile.readline() == b"0 HEAD\r\n"
+    assert mfile.readline() == b"1 CHAR UTF-8\r"
+    assert mfile.readline() == b"0 @I1@ INDI\n"
+    assert mfile.readline() == b"0 TRLR"
+    assert mfile.readline() == b""
+
+    mfile.seek(0)
+    assert mfile.readline(3) == b"0 H"
+    assert mfile.readline(0) == b""
+    assert list(mfile) == [b"EAD\r\n", b"1 CHAR UTF-8\r", b"0 @I1@ INDI\n",
+                           b"0 TRLR"]
+
+    # buffered wrapper works too
+    mfile.seek(0)
+    bfile = io.BufferedReader(mfile)
+    assert bfile.read() == b"0 HEAD\r\n1 CHAR UTF-8\r0 @I1@ INDI\n0 TRLR"
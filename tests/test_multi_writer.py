@@ -0,0 +1,80 @@
+"""Unit test for multi_writer module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import io
+
+from ged2doc.i18n import I18N
+from ged2doc.ir import IRWriter
+from ged2doc.multi_writer import MultiWriter
+from ged2doc.odt_writer import OdtWriter
+
+from . import helpers
+
+
+def test_001_multi_writer():
+    """Test that documents are identical to separate conversions."""
+
+    tr = I18N("en")
+
+    odt = io.BytesIO()
+    OdtWriter(helpers.flocator(), odt, tr, tree_width=3).save()
+    ir = io.BytesIO()
+    IRWriter(helpers.flocator(), ir, tr).save()
+
+    for jobs in (1, 2):
+        flocator = helpers.flocator()
+        odt2 = io.BytesIO()
+        ir2 = io.BytesIO()
+        writers = [OdtWriter(flocator, odt2, tr, tree_width=3),
+                   IRWriter(flocator, ir2, tr)]
+        writer = MultiWriter(flocator, writers, render_jobs=jobs)
+        # IRWriter does not support fragments
+        assert not writer._fragments_supported
+        writer.save()
+        assert helpers.odt_contents(odt2.getvalue()) == \
+            helpers.odt_contents(odt.getvalue())
+        assert ir2.getvalue() == ir.getvalue()
+
+
+def test_002_fragments():
+    """Test fragment support with several writers."""
+
+    tr = I18N("en")
+    flocator = helpers.flocator()
+    outputs = [io.BytesIO(), io.BytesIO()]
+    writers = [OdtWriter(flocator, outputs[0], tr, tree_width=3),
+               OdtWriter(flocator, outputs[1], tr, tree_width=5)]
+    writer = MultiWriter(flocator, writers, render_jobs=2)
+    assert writer._fragments_supported
+    assert writer._fragment_generations() == 5
+    writer.save()
+
+    for output, width in zip(outputs, (3, 5)):
+        expect = io.BytesIO()
+        OdtWriter(helpers.flocator(), expect, tr, tree_width=width).save()
+        assert helpers.odt_contents(output.getvalue()) == \
+            helpers.odt_contents(expect.getvalue())
+
+
+def test_003_languages():
+    """Test writers with different languages."""
+
+    langs = ["en", "ru", "pl"]
+    for jobs in (1, 2):
+        flocator = helpers.flocator()
+        outputs = [io.BytesIO() for lang in langs]
+        writers = [OdtWriter(flocator, output, I18N(lang))
+                   for output, lang in zip(outputs, langs)]
+        writers.append(IRWriter(flocator, io.BytesIO(), I18N("ru")))
+        writer = MultiWriter(flocator, writers, render_jobs=jobs)
+        assert [tr.lang for tr, _ in writer._translations] == langs
+        writer.save()
+        assert writer._tr.lang == "en"
+
+        for output, lang in zip(outputs, langs):
+            expect = io.BytesIO()
+            OdtWriter(helpers.flocator(), expect, I18N(lang)).save()
+            assert helpers.odt_contents(output.getvalue()) == \
+                helpers.odt_contents(expect.getvalue())
@@ -136,3 +136,38 @@ def test_006_capital():
     name = Name(given="Jane", surname="Smith", maiden="Sawyer")
     assert name_fmt(name, flags) == "SMITH (SAWYER), Jane"
 
+
+class _Person(object):
+    """Mock for Individual class which counts name parsing."""
+
+    def __init__(self, xref_id, name):
+        self.xref_id = xref_id
+        self._name = name
+        self.count = 0
+
+    @property
+    def name(self):
+        self.count += 1
+        return self._name
+
+
+def test_007_cache():
+
+    # mock for Name class with first name
+    FullName = namedtuple("FullName", "given first surname maiden")
+    person = _Person("@I1@", FullName(given="Jane Ann", first="Jane",
+                                      surname="Smith", maiden="Sawyer"))
+    cache = NameCache()
+    assert "@I1@" not in cache
+
+    for _ in range(3):
+        assert cache.name(person) == "Jane Ann Smith"
+        assert cache.name(person, FMT_MAIDEN_ONLY) == "Jane Ann Sawyer"
+        assert cache.first(person) == "Jane"
+        assert cache.short(person) == "Jane Smith"
+        assert cache.short(person, maiden=True) == "Jane Sawyer"
+        assert cache.ref(person) == "\001person.@I1@\002Jane Ann Smith\003"
+        assert cache.ref(person, first=True) == \
+            "\001person.@I1@\002Jane\003"
+    assert person.count == 1
+    assert "@I1@" in cache
@@ -0,0 +1,336 @@
+"""Unit test for reader module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import gc
+import io
+import os
+import shutil
+import tempfile
+
+from ged2doc import mmapfile, reader, scan
+
+
+_GEDCOM = b"""0 HEAD
+1 CHAR UTF-8
+0 @I1@ INDI
+1 NAME John /Smith/
+1 SEX M
+1 FAMS @F1@
+0 @I2@ INDI
+1 NAME Jane /Smith/
+1 SEX F
+1 FAMS @F1@
+0 @I3@ INDI
+1 NAME Jim /Smith/
+1 SEX M
+1 FAMC @F1@
+0 @F1@ FAM
+1 HUSB @I1@
+1 WIFE @I2@
+1 CHIL @I3@
+0 TRLR
+"""
+
+
+def test_001_cache_lru():
+    """Test RecordCache eviction."""
+
+    cache = reader.RecordCache(2)
+    assert cache.get(1) is None
+    assert cache.misses == 1
+
+    rec1, rec2, rec3 = object(), object(), object()
+    cache.put(1, rec1)
+    cache.put(2, rec2)
+    assert len(cache) == 2
+    assert cache.get(1) is rec1
+    assert cache.hits == 1
+
+    # 2 is least recently used now
+    cache.put(3, rec3)
+    assert len(cache) == 2
+    assert cache.get(2) is None
+    assert cache.get(1) is rec1
+    assert cache.get(3) is rec3
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.hits == 3
+    assert cache.misses == 2
+
+
+def test_002_cache_unlimited():
+    """Test RecordCache without size limit."""
+
+    cache = reader.RecordCache()
+    for i in range(1000):
+        cache.put(i, object())
+    assert len(cache) == 1000
+
+
+def test_010_reader_identity():
+    """Test that CachingReader returns the same record instances."""
+
+    greader = reader.CachingReader(io.BytesIO(_GEDCOM))
+    jim = greader.record("@I3@")
+    assert jim.name.first == "Jim"
+    assert greader.record("@I3@") is jim
+    assert greader.record("@I99@") is None
+
+    mother = jim.mother
+    assert mother.name.first == "Jane"
+    assert mother is greader.record("@I2@")
+
+    fam = jim.sub_tag("FAMC")
+    assert fam.sub_tags("CHIL") == [jim]
+
+    indis = list(greader.records0("INDI"))
+    assert len(indis) == 3
+    assert indis[2] is jim
+    assert greader.cache.hits > 0
+
+
+def test_011_reader_limit():
+    """Test CachingReader with limited cache size."""
+
+    greader = reader.CachingReader(io.BytesIO(_GEDCOM), cache_size=1)
+    jim = greader.record("@I3@")
+    assert jim.mother.name.first == "Jane"
+    assert len(greader.cache) == 1
+    # was evicted, new instance is returned
+    jim2 = greader.record("@I3@")
+    assert jim2 is not jim
+    assert jim2.xref_id == jim.xref_id
+
+
+def test_020_snapshot():
+    """Test open_reader with snapshot directory."""
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        greader = reader.open_reader(io.BytesIO(_GEDCOM), cache_dir=tmpdir)
+        assert isinstance(greader, reader.CachingReader)
+        assert len(os.listdir(tmpdir)) == 1
+
+        store = reader.open_reader(io.BytesIO(_GEDCOM), cache_dir=tmpdir)
+        assert isinstance(store, reader.RecordStore)
+        assert store.header.tag == "HEAD"
+        indis = list(store.records0("INDI"))
+        assert [indi.xref_id for indi in indis] == ["@I1@", "@I2@", "@I3@"]
+        jim = store.record("@I3@")
+        assert jim is indis[2]
+        assert jim.mother is indis[1]
+        assert jim.father.name.first == "John"
+
+        # different options make different snapshot
+        greader = reader.open_reader(io.BytesIO(_GEDCOM), errors="replace",
+                                     cache_dir=tmpdir)
+        assert isinstance(greader, reader.CachingReader)
+        assert len(os.listdir(tmpdir)) == 2
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_021_no_snapshot():
+    """Test open_reader without snapshot directory."""
+
+    greader = reader.open_reader(io.BytesIO(_GEDCOM), cache_size=10)
+    assert isinstance(greader, reader.CachingReader)
+    assert greader.record("@I1@").name.first == "John"
+
+
+def test_022_index():
+    """Test open_reader with index stored on disk."""
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        greader = reader.open_reader(io.BytesIO(_GEDCOM), cache_dir=tmpdir,
+                                     snapshot=False)
+        assert isinstance(greader, reader.CachingReader)
+        index0 = greader.index0
+        assert len(index0) == 6
+        files = os.listdir(tmpdir)
+        assert len(files) == 1
+        assert files[0].endswith(".index")
+
+        greader = reader.open_reader(io.BytesIO(_GEDCOM), cache_dir=tmpdir,
+                                     snapshot=False)
+        assert greader.index0 == index0
+        assert greader.header.tag == "HEAD"
+        assert greader.record("@I3@").mother.name.first == "Jane"
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_023_snapshot_jobs(monkeypatch):
+    """Test that new snapshot is made from records parsed in parallel."""
+
+    calls = []
+    preload = reader.CachingReader.preload
+
+    def patched(self, jobs=1):
+        calls.append(jobs)
+        return preload(self, jobs)
+
+    monkeypatch.setattr(reader.CachingReader, "preload", patched)
+    tmpdir = tempfile.mkdtemp()
+    try:
+        greader = reader.open_reader(io.BytesIO(_GEDCOM), cache_dir=tmpdir,
+                                     jobs=2)
+        assert calls == [2]
+        assert len(greader.cache) == len(greader.index0)
+
+        store = reader.open_reader(io.BytesIO(_GEDCOM), cache_dir=tmpdir,
+                                   jobs=2)
+        assert isinstance(store, reader.RecordStore)
+        assert calls == [2]
+        jim = store.record("@I3@")
+        assert jim.mother is store.record("@I2@")
+        assert jim.father.name.first == "John"
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_012_reader_mapped():
+    """Test CachingReader with memory-mapped file."""
+
+    fd, path = tempfile.mkstemp(".ged")
+    try:
+        with os.fdopen(fd, "wb") as fobj:
+            # CR line terminators
+            fobj.write(_GEDCOM.replace(b"\n", b"\r"))
+        greader = reader.CachingReader(mmapfile.MappedFile(path))
+        assert len(greader.index0) == 6
+        jim = greader.record("@I3@")
+        assert jim.name.first == "Jim"
+        assert jim.mother.name.first == "Jane"
+        assert greader.header.sub_tag_value("CHAR") == "UTF-8"
+    finally:
+        os.unlink(path)
+
+
+def test_013_preload():
+    """Test CachingReader.preload with multiple processes."""
+
+    data = _GEDCOM.replace(b"0 TRLR\n", b"") + b"".join(
+        b"0 @I%d@ INDI\n1 NAME Kid%d /Smith/\n1 FAMC @F1@\n" % (i, i)
+        for i in range(10, 30)) + b"0 TRLR\n"
+
+    serial = reader.CachingReader(io.BytesIO(data))
+    serial.preload()
+    assert len(serial.cache) == len(serial.index0)
+
+    greader = reader.CachingReader(io.BytesIO(data))
+    head = greader.header
+    greader.preload(3)
+    assert len(greader.cache) == len(greader.index0)
+    assert greader.header is head
+    indis = list(greader.records0("INDI"))
+    assert [indi.name.first for indi in indis] == \
+        [indi.name.first for indi in serial.records0("INDI")]
+    # pointers refer to the same records
+    assert indis[-1].mother is indis[1]
+    assert indis[-1].sub_tag("FAMC") is greader.record("@F1@")
+
+
+def test_014_projection():
+    """Test CachingReader with projection."""
+
+    data = b"""0 HEAD
+0 @I1@ INDI
+1 NAME John /Smith/
+2 SOUR @S1@
+1 BIRT
+2 DATE 1 JAN 1900
+2 SOUR @S1@
+3 PAGE 12
+1 NOTE Line 1
+2 CONT Line 2
+1 CHAN
+2 DATE 1 JAN 2000
+1 _APID 1234
+0 @S1@ SOUR
+1 TITL Book
+0 TRLR
+"""
+    projection = {"INDI": {"NAME": None, "BIRT": {"DATE"}, "NOTE": set()}}
+    greader = reader.CachingReader(io.BytesIO(data), projection=projection)
+    john = greader.record("@I1@")
+    assert [rec.tag for rec in john.sub_records] == ["NAME", "BIRT", "NOTE"]
+    assert john.sub_tag("NAME/SOUR", follow=False).value == "@S1@"
+    assert [rec.tag for rec in john.sub_tag("BIRT").sub_records] == ["DATE"]
+    assert john.sub_tag_value("BIRT/DATE") is not None
+    assert john.sub_tag_value("NOTE") == "Line 1\nLine 2"
+    # other records are not affected
+    sour = greader.record("@S1@")
+    assert sour.sub_tag_value("TITL") == "Book"
+
+
+def test_024_index_file(monkeypatch):
+    """Test index stored for a file on disk."""
+
+    def fail(*args):
+        raise AssertionError("unexpected call")
+
+    def open_indexed():
+        with io.open(path, "rb") as gfile:
+            greader = reader.open_reader(gfile, cache_dir=cache_dir,
+                                         snapshot=False)
+            assert greader.record("@I1@").name.first == "John"
+            assert greader.record("@I3@").mother.name.first == "Jane"
+            return greader.xref0
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmpdir, "test.ged")
+        cache_dir = os.path.join(tmpdir, "cache")
+        with open(path, "wb") as fobj:
+            fobj.write(_GEDCOM)
+        os.utime(path, (1000000000, 1000000000))
+
+        # file contents are not hashed to find the index
+        monkeypatch.setattr(reader, "_snapshot_key", fail)
+        xref0 = open_indexed()
+        assert len(os.listdir(cache_dir)) == 1
+
+        # stored index is used, file is not scanned
+        index_records0 = scan.index_records0
+        monkeypatch.setattr(scan, "index_records0", fail)
+        assert open_indexed() == xref0
+
+        # swap John and Jane, size and modification time stay the same
+        start, middle, end = [_GEDCOM.index(b"0 @I%d@" % i) for i in (1, 2, 3)]
+        with open(path, "wb") as fobj:
+            fobj.write(_GEDCOM[:start] + _GEDCOM[middle:end] +
+                       _GEDCOM[start:middle] + _GEDCOM[end:])
+        os.utime(path, (1000000000, 1000000000))
+        monkeypatch.setattr(scan, "index_records0", index_records0)
+        xref1 = open_indexed()
+        assert xref1 != xref0
+
+        # rebuilt index was saved
+        monkeypatch.setattr(scan, "index_records0", fail)
+        assert open_indexed() == xref1
+        assert len(os.listdir(cache_dir)) == 1
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_030_gc_pause():
+    """Test that garbage collector is only disabled when allowed."""
+
+    reader.allow_gc_pause(False)
+    assert gc.isenabled()
+    with reader._gc_disabled():
+        assert gc.isenabled()
+    reader.allow_gc_pause()
+    try:
+        with reader._gc_disabled():
+            with reader._gc_disabled():
+                assert not gc.isenabled()
+            assert not gc.isenabled()
+        assert gc.isenabled()
+    finally:
+        reader.allow_gc_pause(False)
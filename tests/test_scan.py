@@ -0,0 +1,103 @@
+"""Unit test for scan module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import io
+
+from ged2doc import scan
+from ged4py import parser
+
+
+_GEDCOM = b"""0 HEAD
+1 CHAR UTF-8
+0 @I1@ INDI
+1 NAME John /Smith/
+2 NOTE 0 is not a level-0 line
+0 @I2@ INDI
+  1 NAME Jane /Smith/
+0 @F1@ FAM
+1 HUSB @I1@
+01 WIFE @I2@
+0 TRLR
+"""
+
+
+def test_001_iter_lines():
+    """Test iter_lines method."""
+
+    data = b"0 HEAD\n1 CHAR\r\n  0 TRLR\r0 X"
+    lines = list(scan.iter_lines(io.BytesIO(data)))
+    assert lines == [(0, b"0 HEAD"), (7, b"1 CHAR"), (15, b"0 TRLR"),
+                     (24, b"0 X")]
+
+    # tiny blocks, CR-LF split between blocks
+    for blocksize in range(1, 10):
+        lines2 = list(scan.iter_lines(io.BytesIO(data), blocksize=blocksize))
+        assert lines2 == lines
+
+    lines = list(scan.iter_lines(io.BytesIO(data), 15))
+    assert lines == [(15, b"0 TRLR"), (24, b"0 X")]
+
+
+def test_002_index_records0():
+    """Test index_records0 method."""
+
+    index0, xref0 = scan.index_records0(io.BytesIO(_GEDCOM))
+    assert [tag for _, tag in index0] == ["HEAD", "INDI", "INDI", "FAM",
+                                          "TRLR"]
+    assert sorted(xref0.keys()) == ["@F1@", "@I1@", "@I2@"]
+
+    # must be identical to ged4py index
+    reader = parser.GedcomReader(io.BytesIO(_GEDCOM))
+    assert index0 == reader.index0
+    assert xref0 == reader.xref0
+
+    for eol in (b"\r", b"\r\n"):
+        data = _GEDCOM.replace(b"\n", eol)
+        index0, xref0 = scan.index_records0(io.BytesIO(data))
+        reader = parser.GedcomReader(io.BytesIO(data))
+        assert index0 == reader.index0
+        assert xref0 == reader.xref0
+
+
+def test_003_record_hashes():
+    """Test record_hashes method."""
+
+    hashes = scan.record_hashes(io.BytesIO(_GEDCOM))
+    assert sorted(hashes) == ["@F1@", "@I1@", "@I2@"]
+    assert hashes["@I1@"][0] == "INDI"
+    assert hashes["@F1@"][0] == "FAM"
+    assert len(set(hashes.values())) == 3
+
+    # does not depend on line terminators and block size
+    for eol in (b"\r", b"\r\n"):
+        data = _GEDCOM.replace(b"\n", eol)
+        for blocksize in (1, 7, 100, 1000):
+            assert scan.record_hashes(io.BytesIO(data),
+                                      blocksize=blocksize) == hashes
+
+    # modified record
+    data = _GEDCOM.replace(b"Jane", b"Joan")
+    hashes2 = scan.record_hashes(io.BytesIO(data), blocksize=10)
+    assert hashes2["@I1@"] == hashes["@I1@"]
+    assert hashes2["@I2@"] != hashes["@I2@"]
+
+
+def test_004_iter_records0():
+    """Test iter_records0 method."""
+
+    records = list(scan.iter_records0(io.BytesIO(_GEDCOM)))
+    assert [(xref_id, tag) for _, xref_id, tag in records] == [
+        (b"", b"HEAD"), (b"@I1@", b"INDI"), (b"@I2@", b"INDI"),
+        (b"@F1@", b"FAM"), (b"", b"TRLR")]
+    # leading whitespace is removed
+    assert b"\n".join(record for record, _, _ in records) == \
+        _GEDCOM.replace(b"\n  1", b"\n1").rstrip(b"\n")
+
+    # normalized data does not depend on line terminators and block size
+    for eol in (b"\r", b"\r\n"):
+        data = _GEDCOM.replace(b"\n", eol)
+        for blocksize in (1, 7, 100, 1000):
+            assert list(scan.iter_records0(io.BytesIO(data),
+                                           blocksize=blocksize)) == records
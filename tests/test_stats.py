@@ -0,0 +1,45 @@
+"""Unit test for stats module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+from ged2doc.dates import date_key
+from ged2doc.stats import Statistics
+from ged4py.detail.date import DateValue
+
+
+def _key(date):
+    return date_key(DateValue.parse(date))
+
+
+def test_001_counts():
+    """Test counters and name frequencies."""
+
+    stats = Statistics()
+    stats.add("M", "John", "Smith")
+    stats.add("F", "Jane", "Smith")
+    stats.add("M", "Joe", "Brown")
+    stats.add("M", "John", None)
+    stats.add(None, "Pat", "Smith")
+    assert (stats.n_total, stats.n_females, stats.n_males) == (5, 1, 3)
+    assert stats.name_freq("M") == [("Joe", 1), ("John", 2)]
+    assert stats.name_freq("F") == [("Jane", 1)]
+    assert stats.surname_freq() == [("Brown", 1), ("Smith", 3)]
+    assert stats.birth_decades() == []
+    assert stats.lifespans() == []
+
+
+def test_002_dates():
+    """Test birth decades and lifespans."""
+
+    stats = Statistics()
+    stats.add("M", "A", "X", _key("1 JAN 1950"), _key("31 DEC 2019"))
+    stats.add("M", "B", "X", _key("1959"), _key("ABT 1960"))
+    stats.add("F", "C", "X", _key("BET 1940 AND 1941"), _key("2000"))
+    # open range, other calendar, and death before birth are not counted
+    stats.add("F", "D", "X", _key("AFT 1900"), _key("1990"))
+    stats.add("F", "E", "X", _key("@#DHEBREW@ 5700"))
+    stats.add("F", "F", "X", _key("1990"), _key("1900"))
+    stats.add("F", "G", "X", None, _key("1900"))
+    assert stats.birth_decades() == [(1940, 1), (1950, 2), (1990, 1)]
+    assert stats.lifespans() == [(0, 1), (50, 1), (60, 1)]
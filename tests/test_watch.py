@@ -0,0 +1,145 @@
+"""Unit test for watch module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import io
+import os
+import shutil
+import tempfile
+
+from ged2doc import writer
+from ged2doc.i18n import I18N
+from ged2doc.input import make_file_locator
+from ged2doc.watch import Watcher
+
+from . import helpers
+
+
+class _TextWriter(writer.Writer):
+    """Writer which produces plain text and remembers rendered persons."""
+
+    _fragments_supported = True
+
+    def __init__(self, flocator, output, rendered):
+        writer.Writer.__init__(self, flocator, I18N("en"), make_images=False,
+                               make_stat=False, make_toc=False)
+        self._output = output
+        self._rendered = rendered
+
+    def _text(self, text):
+        self._output.write(text.encode("utf_8") + b"\n")
+
+    def _render_prolog(self):
+        pass
+
+    def _render_section(self, level, ref_id, title, newpage=False):
+        self._text(u"{0} {1} {2}".format(level, ref_id, title))
+
+    def _render_person(self, person, image_data, attributes, families,
+                       events, notes):
+        self._rendered.append(person.xref_id)
+        for attr, value in attributes:
+            self._text(attr + u": " + value)
+        for text in families + notes:
+            self._text(text)
+        mother, father = person.mother, person.father
+        self._text(u"parents: {0} {1}".format(
+            mother.xref_id if mother else None,
+            father.xref_id if father else None))
+
+    def _render_toc(self):
+        pass
+
+    def _finalize(self):
+        pass
+
+    def _begin_fragment(self):
+        self._saved_output = self._output
+        self._output = io.BytesIO()
+
+    def _end_fragment(self):
+        data = self._output.getvalue()
+        self._output = self._saved_output
+        return data
+
+    def _replay_fragment(self, data):
+        self._output.write(data)
+
+
+def test_001_watch():
+    """Test updates after changes of input file."""
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmpdir, "input.ged")
+        output = os.path.join(tmpdir, "output.txt")
+        rendered = []
+
+        def make_locator():
+            return make_file_locator(path, "*.ged", None, use_mmap=False)
+
+        def make_writer(flocator, outfile):
+            return _TextWriter(flocator, outfile, rendered)
+
+        def convert():
+            """Returns output of regular conversion"""
+            outfile = io.BytesIO()
+            make_writer(make_locator(), outfile).save()
+            return outfile.getvalue()
+
+        def update(data, mtime):
+            with open(path, "wb") as gfile:
+                gfile.write(data)
+            os.utime(path, (mtime, mtime))
+            del rendered[:]
+            return watcher.update()
+
+        watcher = Watcher(path, make_locator, make_writer, output)
+
+        data = helpers.GEDCOM
+        assert update(data, 1000)
+        assert sorted(rendered) == ["@I1@", "@I2@", "@I3@", "@I4@", "@I5@"]
+        expect = convert()
+        with open(output, "rb") as outfile:
+            assert outfile.read() == expect
+
+        # file did not change
+        assert not watcher.update()
+
+        # same contents with different terminators
+        assert not update(data.replace(b"\n", b"\r\n"), 1001)
+        assert rendered == []
+
+        edits = [
+            # unrelated person
+            ((b"Bob /Brown/", b"Bill /Brown/"), ["@I5@"]),
+            # parent, grandchildren do not depend on it with one generation
+            ((b"Joe /Smith/", b"Joseph /Smith/"), ["@I1@", "@I4@"]),
+            # note record
+            ((b"Some note", b"Other note"), ["@I1@", "@I2@", "@I3@"]),
+            # new person added to a family
+            ((b"0 TRLR", b"0 @I6@ INDI\n1 NAME Ann /Smith/\n1 FAMC @F1@\n"
+              b"0 TRLR"), ["@I6@"]),
+            ((b"1 CHIL @I3@", b"1 CHIL @I3@\n1 CHIL @I6@"),
+             ["@I1@", "@I2@", "@I3@", "@I6@"]),
+            # family changes parents
+            ((b"1 WIFE @I2@", b"1 WIFE @I5@"),
+             ["@I1@", "@I2@", "@I3@", "@I6@"]),
+            # person removed
+            ((b"0 @I4@ INDI\n1 NAME Joseph /Smith/\n1 FAMS @F0@\n", b""),
+             ["@I1@"]),
+        ]
+        for mtime, ((old, new), persons) in enumerate(edits, 1002):
+            assert old in data
+            data = data.replace(old, new)
+            assert update(data, mtime)
+            assert sorted(rendered) == persons
+            expect = convert()
+            with open(output, "rb") as outfile:
+                assert outfile.read() == expect
+
+        assert watcher.updates == len(edits) + 1
+        assert sorted(os.listdir(tmpdir)) == ["input.ged", "output.txt"]
+    finally:
+        shutil.rmtree(tmpdir)
@@ -0,0 +1,220 @@
+"""Unit test for writer module
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+
+import pytest
+from PIL import Image
+
+from ged2doc import graph
+from ged2doc.html_writer import HtmlWriter
+from ged2doc.i18n import I18N
+from ged2doc.input import FileLocator
+from ged2doc.ir import IRWriter
+from ged2doc.multi_writer import MultiWriter
+from ged2doc.odt_writer import OdtWriter
+from ged2doc.reader import CachingReader
+
+from . import helpers
+
+
+def _convert_odt(**kw):
+    """Returns contents of ODT document members produced from test data."""
+    output = io.BytesIO()
+    OdtWriter(helpers.flocator(), output, I18N("en"), **kw).save()
+    return helpers.odt_contents(output.getvalue())
+
+
+def test_001_render_jobs():
+    """Test that parallel rendering produces identical output."""
+
+    expect = _convert_odt()
+    assert b"Some note" in expect["content.xml"]
+    assert any(name.endswith(".svg") for name in expect)
+    for jobs in (2, 3):
+        assert _convert_odt(render_jobs=jobs) == expect
+
+
+def test_002_render_jobs_incremental():
+    """Test parallel rendering with fragment cache."""
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        expect = _convert_odt()
+        for _ in range(2):
+            assert _convert_odt(render_jobs=2, cache_dir=tmpdir,
+                                incremental=True) == expect
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_003_root():
+    """Test that only persons related to root person are rendered."""
+
+    def convert(**kw):
+        flocator = helpers.flocator()
+        output = io.BytesIO()
+        IRWriter(flocator, output, I18N("en"), **kw).save()
+        items = [json.loads(line.decode())
+                 for line in output.getvalue().splitlines()[1:]]
+        persons = [item for item in items if item[0] == "person"]
+        stat = [item for item in items if item[0] == "name_stat"]
+        return persons, stat[0][1:]
+
+    persons, stat = convert(root="@I3@", radius=1)
+    assert [person[1][0] for person in persons] == ["@I2@", "@I3@", "@I1@"]
+    assert stat == [3, 1, 1]
+    # father of John is not rendered so he is not referenced
+    john = json.dumps(persons[2])
+    assert u"Joe Smith" in john
+    assert u"\\u0001person.@I4@" not in john
+    assert u"\\u0001person.@I2@" in john
+
+    persons, stat = convert(root="@I1@", relation=graph.RELATION_ANCESTORS)
+    assert [person[1][0] for person in persons] == ["@I4@", "@I1@"]
+
+    # persons which are not related to anybody
+    persons, stat = convert(root="@I5@")
+    assert [person[1][0] for person in persons] == ["@I5@"]
+
+    with pytest.raises(KeyError):
+        convert(root="@F1@")
+
+
+class _ParentLocator(FileLocator):
+    """File locator which fails when used by a forked worker process."""
+
+    def __init__(self, flocator):
+        self._floc = flocator
+        self._pid = os.getpid()
+
+    def open_gedcom(self):
+        assert os.getpid() == self._pid
+        return self._floc.open_gedcom()
+
+    def open_image(self, name):
+        assert os.getpid() == self._pid
+        return self._floc.open_image(name)
+
+
+def test_004_render_jobs_images():
+    """Test that rendering workers do not open input files."""
+
+    # person with image that cannot be located
+    data = helpers.GEDCOM.replace(b"1 NAME Bob /Brown/\n",
+                                  b"1 NAME Bob /Brown/\n1 OBJE\n"
+                                  b"2 FILE bob.jpg\n")
+    flocator = _ParentLocator(helpers.flocator(data))
+    output = io.BytesIO()
+    OdtWriter(flocator, output, I18N("en"), render_jobs=2).save()
+    content = zipfile.ZipFile(output).read("content.xml")
+    assert b"Bob" in content
+
+
+def test_005_root_tree_links():
+    """Test that ancestor trees only link to rendered persons."""
+
+    def svg_refs(multi):
+        flocator = helpers.flocator()
+        output = io.BytesIO()
+        kw = dict(root="@I3@", radius=1)
+        if multi:
+            writer = MultiWriter(flocator, [OdtWriter(flocator, output,
+                                                      I18N("en"))], **kw)
+        else:
+            writer = OdtWriter(flocator, output, I18N("en"), **kw)
+        writer.save()
+        odt = zipfile.ZipFile(output)
+        svg = b"".join(odt.read(name) for name in odt.namelist()
+                       if name.endswith(".svg"))
+        assert b"Joe Smith" in svg
+        return svg
+
+    for multi in (False, True):
+        svg = svg_refs(multi)
+        assert b"#person.@I1@" in svg
+        # John's father is not rendered
+        assert b"#person.@I4@" not in svg
+
+
+def test_006_relatives_from_index(monkeypatch):
+    """Test that references to relatives do not read their records."""
+
+    lookups = []
+    record = CachingReader.record
+
+    def patched(self, xref_id):
+        lookups.append(xref_id)
+        return record(self, xref_id)
+
+    monkeypatch.setattr(CachingReader, "record", patched)
+    content = _convert_odt()["content.xml"]
+    assert b"Joe Smith" in content
+    # only family records are read
+    assert lookups
+    assert all(xref_id.startswith("@F") for xref_id in lookups)
+
+
+def test_007_progress_limiter():
+    """Test progress and image_limiter options."""
+
+    class Limiter(object):
+        entered = 0
+
+        def __enter__(self):
+            Limiter.entered += 1
+
+        def __exit__(self, *args):
+            pass
+
+    counts = []
+    _convert_odt(progress=lambda count, total: counts.append((count, total)))
+    assert counts == [(count, 5) for count in range(1, 6)]
+
+    img = io.BytesIO()
+    Image.new("RGB", (20, 20)).save(img, "PNG")
+    flocator = helpers.flocator()
+    html = HtmlWriter(flocator, io.BytesIO(), I18N("en"),
+                      image_limiter=Limiter())
+    assert "data:image/png" in html._getImageFragment(img.getvalue())
+    assert Limiter.entered == 1
+
+    # writers without their own limiter use limiter of MultiWriter
+    limiter = Limiter()
+    odt = OdtWriter(flocator, io.BytesIO(), I18N("en"))
+    MultiWriter(flocator, [odt, html], image_limiter=limiter)
+    assert odt._image_limiter is limiter
+    assert html._image_limiter is not limiter
+
+
+def test_008_render_person():
+    """Test rendering of a single person."""
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        output = io.BytesIO()
+        odt = OdtWriter(helpers.flocator(), output, I18N("en"),
+                        cache_dir=tmpdir)
+        fragment = odt.render_person("@I1@")
+        assert fragment[0][:2] == ("H", "John Smith")
+        assert ("P", "Father: Joe Smith", None) in fragment
+        # fragment is not added to the document
+        assert not odt.doc.text.childNodes
+        assert output.getvalue() == b""
+        assert [name.endswith(".index") for name in os.listdir(tmpdir)] == \
+            [True]
+
+        with pytest.raises(KeyError):
+            odt.render_person("@F1@")
+        ir = IRWriter(helpers.flocator(), io.BytesIO(), I18N("en"))
+        with pytest.raises(NotImplementedError):
+            ir.render_person("@I1@")
+    finally:
+        shutil.rmtree(tmpdir)